@@ -9,14 +9,15 @@ Enhanced endpoints for admin dashboard v2:
 - Cursor-based pagination
 """
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import func, and_, or_
 from typing import Optional, List
 from datetime import datetime, timezone, timedelta
 from pydantic import BaseModel
 
-from app.database import get_db
-from app.api.deps import get_current_admin_user
+from app.database import get_db, get_async_db
+from app.api.deps import get_current_admin_user, get_admin_user_async
 from app.models import (
     User, Booking, BookingStatus, BookingStatusHistory,
     CleanerProfile, CleanerStatus, UserRole
@@ -26,6 +27,11 @@ from uuid import UUID
 from app.services.job_state_machine import JobStateMachine
 from app.services.events import event_publisher, EventType
 from app.services.cache import cache_service
+from app.services.dashboard_counters import get_dashboard_counters, reconcile_dashboard_counters
+from app.services.loop_monitor import get_loop_lag_metrics
+from app.services.query_stats import get_query_metrics
+from app.services.pagination import paginate, count_total
+from app.services.read_replicas import read_replicas, get_read_db
 from app.core.exceptions import NotFoundException, BadRequestException
 
 
@@ -84,6 +90,7 @@ class PaginatedJobsResponse(BaseModel):
     jobs: List[JobListItem]
     next_cursor: Optional[str] = None
     total_count: int
+    total_estimated: bool = False  # Cached or estimated total unless exact_count was requested
 
 
 class DashboardStats(BaseModel):
@@ -109,7 +116,7 @@ class AssignCleanerRequest(BaseModel):
 async def get_cleaners_status(
     status: Optional[str] = None,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get all cleaners with their current status.
@@ -147,7 +154,7 @@ async def get_cleaners_status(
 @router.get("/alerts/delayed-jobs", response_model=List[DelayedJobDTO])
 async def get_delayed_jobs(
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get jobs that have breached their SLA deadline.
@@ -192,76 +199,19 @@ async def get_delayed_jobs(
 
 @router.get("/stats/realtime", response_model=DashboardStats)
 async def get_realtime_stats(
-    current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_admin_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get real-time dashboard statistics.
-    """
-    now = datetime.now(timezone.utc)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    sla_threshold = timedelta(minutes=10)
-
-    # Active jobs (in progress or assigned)
-    active_jobs_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED])
-    ).scalar()
-
-    # Available cleaners
-    available_cleaners_count = db.query(func.count(CleanerProfile.id)).filter(
-        CleanerProfile.status == CleanerStatus.AVAILABLE
-    ).scalar()
-
-    # Busy cleaners
-    busy_cleaners_count = db.query(func.count(CleanerProfile.id)).filter(
-        CleanerProfile.status == CleanerStatus.BUSY
-    ).scalar()
 
-    # Delayed jobs
-    delayed_jobs_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS]),
-        or_(
-            Booking.sla_deadline < now,
-            Booking.scheduled_date + sla_threshold < now
-        )
-    ).scalar()
-
-    # Pending assignment
-    pending_assignment_count = db.query(func.count(Booking.id)).filter(
-        Booking.status.in_([BookingStatus.PENDING_ASSIGNMENT, BookingStatus.CONFIRMED])
-    ).scalar()
-
-    # Completed today
-    completed_today_count = db.query(func.count(Booking.id)).filter(
-        Booking.status == BookingStatus.COMPLETED,
-        Booking.actual_end_time >= today_start
-    ).scalar()
-
-    # Revenue today
-    revenue_today = db.query(func.sum(Booking.total_price)).filter(
-        Booking.status == BookingStatus.COMPLETED,
-        Booking.actual_end_time >= today_start
-    ).scalar() or 0
-
-    stats = DashboardStats(
-        active_jobs_count=active_jobs_count or 0,
-        available_cleaners_count=available_cleaners_count or 0,
-        busy_cleaners_count=busy_cleaners_count or 0,
-        delayed_jobs_count=delayed_jobs_count or 0,
-        pending_assignment_count=pending_assignment_count or 0,
-        completed_today_count=completed_today_count or 0,
-        revenue_today=float(revenue_today)
-    )
-
-    # Update cache with current stats
-    await cache_service.set_dashboard_stats({
-        "active_jobs": stats.active_jobs_count,
-        "available_cleaners": stats.available_cleaners_count,
-        "busy_cleaners": stats.busy_cleaners_count,
-        "delayed_jobs": stats.delayed_jobs_count,
-        "pending_assignment": stats.pending_assignment_count,
-        "completed_today": stats.completed_today_count,
-    })
+    Served from the incrementally maintained dashboard counters (one cache
+    read); they are only counted from the database if missing.
+    """
+    counters = await get_dashboard_counters()
+    if counters is None:
+        counters = await reconcile_dashboard_counters(db)
+    stats = DashboardStats(**counters)
 
     # Publish stats update event
     await event_publisher.publish(EventType.STATS_UPDATED, {
@@ -285,15 +235,17 @@ async def list_jobs_paginated(
     to_date: Optional[str] = None,
     cursor: Optional[str] = None,
     limit: int = Query(25, ge=1, le=100),
+    exact_count: bool = Query(False),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    Get jobs with cursor-based pagination and filtering.
+    Get jobs with cursor-based pagination and filtering, newest first.
     
-    Cursor is the last job ID from previous page.
+    Cursor is the opaque next_cursor from the previous page.
     """
     query = db.query(Booking)
+    filtered = any([status, cleaner_id, from_date, to_date])
     
     # Apply filters
     if status:
@@ -310,26 +262,23 @@ async def list_jobs_paginated(
         to_dt = datetime.fromisoformat(to_date.replace('Z', '+00:00'))
         query = query.filter(Booking.scheduled_date <= to_dt)
     
-    # Cursor pagination
-    if cursor:
-        try:
-            cursor_id = int(cursor)
-            query = query.filter(Booking.id < cursor_id)
-        except ValueError:
-            pass
-    
-    # Get total count (without pagination)
-    total_count = query.count()
-    
-    # Order and limit
-    jobs = query.options(joinedload(Booking.add_ons)).order_by(Booking.id.desc()).limit(limit + 1).all()
-    
-    # Check if there's a next page
-    has_next = len(jobs) > limit
-    if has_next:
-        jobs = jobs[:limit]
+    # Total for all pages (cached or estimated unless exact_count)
+    total_count, exact = await count_total(
+        db, query, "admin_jobs", exact=exact_count,
+        table=None if filtered else Booking.__table__
+    )
     
-    next_cursor = str(jobs[-1].id) if has_next and jobs else None
+    # Cursor pagination over the primary key
+    jobs, next_cursor = paginate(
+        query.options(
+            joinedload(Booking.customer),
+            joinedload(Booking.cleaner),
+            joinedload(Booking.service),
+            joinedload(Booking.address),
+            selectinload(Booking.add_ons)
+        ),
+        Booking.id, Booking.id, cursor=cursor, limit=limit
+    )
     
     # Format response
     job_list = []
@@ -354,7 +303,8 @@ async def list_jobs_paginated(
     return PaginatedJobsResponse(
         jobs=job_list,
         next_cursor=next_cursor,
-        total_count=total_count
+        total_count=total_count,
+        total_estimated=not exact
     )
 
 
@@ -372,16 +322,14 @@ async def get_available_cleaners_for_job(
     - Match the job's region
     - Don't have time conflicts
     """
-    from app.services.cleaner_assignment import get_region_from_city, has_time_conflict
+    from app.services.cleaner_assignment import get_address_region, has_time_conflict
 
     job = db.query(Booking).filter(Booking.id == job_id).first()
     if not job:
         raise NotFoundException(f"Job {job_id} not found")
 
     # Get job region
-    region = None
-    if job.address and job.address.city:
-        region = get_region_from_city(job.address.city)
+    region = get_address_region(job.address)
 
     # Get duration
     service = job.service
@@ -477,12 +425,14 @@ async def assign_cleaner_to_job(
             f"Employee {employee.full_name} is currently busy with another job"
         )
 
-    # Check for time conflicts
+    # Check for time conflicts while holding the cleaner's allocation lock
     from app.services.cleaner_assignment import has_time_conflict
+    from app.services.allocation_locks import lock_cleaners
     service = job.service
     duration_hours = float(service.base_duration_hours or 2.5) if service else 2.5
 
-    if has_time_conflict(employee, job.scheduled_date, duration_hours, db):
+    lock_cleaners(db, [employee.id])
+    if has_time_conflict(employee.id, job.scheduled_date, duration_hours, db, job.id):
         raise BadRequestException(
             f"Employee {employee.full_name} has a scheduling conflict at this time"
         )
@@ -510,6 +460,8 @@ async def assign_cleaner_to_job(
     await event_publisher.publish(EventType.JOB_ASSIGNED, {
         "job_id": job.id,
         "booking_number": job.booking_number,
+        "status": job.status.value,
+        "previous_status": previous_status.value,
         "cleaner_id": str(employee.id),
         "cleaner_name": employee.full_name,
         "employee_id": employee.employee_id,
@@ -520,6 +472,13 @@ async def assign_cleaner_to_job(
     # Update cache
     await cache_service.set(f"job:{job.id}:status", job.status.value, ttl=3600)
 
+    # Manually assigned cleaners also move to the back of the allocation queue
+    from app.services.allocation_engine import touch_cleaner_queue
+    await touch_cleaner_queue(employee.region_code, employee.id, now)
+
+    from app.services.slot_capacity import invalidate_capacity_index
+    await invalidate_capacity_index(job.scheduled_date)
+
     return {
         "message": "Cleaner assigned successfully",
         "job_id": job.id,
@@ -589,6 +548,7 @@ async def unassign_cleaner_from_job(
         "job_id": job.id,
         "booking_number": job.booking_number,
         "status": job.status.value,
+        "previous_status": BookingStatus.ASSIGNED.value,
         "cleaner_id": None,
         "cleaner_name": None,
         "customer_id": job.customer_id,
@@ -659,7 +619,8 @@ async def get_allocation_metrics(
     - Total allocations
     - Success/failure counts
     - Success rate percentage
-    - Average allocation time
+    - Average and p50/p95/p99 allocation time
+    - Candidates evaluated and fallback tier used
     - Breakdown by region
     """
     from app.services.allocation_engine import AllocationEngine
@@ -697,6 +658,110 @@ async def get_queue_status(
     }
 
 
+@router.post("/allocation/batch")
+async def run_batch_allocation(
+    horizon_hours: float = Query(24, gt=0, le=168, description="Assign bookings starting within this many hours"),
+    region_code: Optional[str] = Query(None, description="Only bookings in this region (DXB, AUH, etc.)"),
+    dry_run: bool = Query(False, description="Solve and report without saving assignments"),
+    current_user: User = Depends(get_current_admin_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Assign every unassigned booking in the horizon with the batch allocator.
+
+    Solves one global min-cost matching over queue/distance/rating scores
+    and commits all assignments in a single transaction.
+    """
+    from app.services.batch_allocator import run_batch_allocation as run_batch
+
+    result = await run_batch(db, horizon_hours, region_code, dry_run)
+    return result.to_dict()
+
+
+@router.get("/allocation/jobs")
+async def get_allocation_job_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get allocation queue depth.
+
+    Returns unfinished job counts by status (queued/running/dead) and
+    queued jobs by region.
+    """
+    from app.tasks.allocation_queue import allocation_queue
+
+    return allocation_queue.get_stats()
+
+
+@router.post("/allocation/jobs/{job_id}/retry")
+async def retry_allocation_job(
+    job_id: int,
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Put a dead-lettered allocation job back on the queue with fresh attempts.
+    """
+    from app.tasks.allocation_queue import allocation_queue
+    from app.tasks.allocation_worker import allocation_workers
+
+    if not allocation_queue.requeue(job_id):
+        raise NotFoundException("Dead-lettered allocation job not found")
+
+    allocation_workers.notify()
+    return {"message": "Allocation job re-queued", "job_id": job_id}
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get cache backend, size, hit rate, evictions and expirations.
+    """
+    return await cache_service.get_stats()
+
+
+@router.get("/loop/lag")
+async def get_loop_lag(
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get event loop lag percentiles over all workers for a day.
+
+    The "worker" section is the worker serving this request, including its
+    recent block reports (stacks) when LOOP_MONITOR_DEBUG is on.
+    """
+    return await get_loop_lag_metrics(date)
+
+
+@router.get("/db/query-stats")
+async def get_query_stats(
+    date: Optional[str] = Query(None, description="Date in YYYY-MM-DD format"),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get per-route query counts and DB time for a day, over all workers.
+
+    "recent_suspects" lists this worker's latest requests that repeated a
+    statement more than QUERY_REPEAT_THRESHOLD times (likely N+1s).
+    """
+    return await get_query_metrics(date)
+
+
+@router.get("/db/replicas")
+async def get_replica_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """
+    Get read replica lag and usability as seen by this worker.
+
+    "worker_reads" counts this worker's read-only requests served by a
+    replica, fallen back to the primary, or forced to it (X-Read-Primary).
+    """
+    return read_replicas.status()
+
+
 @router.get("/allocation/regions")
 async def get_available_regions(
     current_user: User = Depends(get_current_admin_user),
@@ -2,18 +2,25 @@
 Availability API - Real-time slot availability and expert matching
 """
 from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, or_
 from datetime import datetime, date, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 
-from app.database import get_db
+from app.database import get_async_db, run_db
 from app.models.booking import Booking, BookingStatus, TimeSlot
 from app.models.employee import Employee
+from app.services.read_replicas import get_read_db
+from app.services.slot_capacity import (
+    get_capacity_index, ACTIVE_BOOKING_STATUSES, MAX_BOOKINGS_PER_SLOT
+)
 
 router = APIRouter(prefix="/availability", tags=["availability"])
 
+MAX_RANGE_DAYS = 31
+
 
 # Response schemas
 class TimeSlotResponse(BaseModel):
@@ -31,6 +38,12 @@ class AvailabilityResponse(BaseModel):
     busy_message: Optional[str] = None
 
 
+class AvailabilityRangeResponse(BaseModel):
+    start_date: str
+    end_date: str
+    days: List[AvailabilityResponse]
+
+
 class ExpertAvailabilityResponse(BaseModel):
     expert_id: str
     name: str
@@ -104,6 +117,62 @@ def get_booked_slots(db: Session, check_date: date) -> List[str]:
     return unavailable
 
 
+def get_booked_slots_range(db: Session, start_date: date, end_date: date) -> Dict[date, List[str]]:
+    """
+    Get heavily booked slots for every day in a date range.
+
+    One aggregate query counts active bookings per start time across the
+    whole range; counts are then folded into (day, "HH:MM") buckets.
+    """
+    start_of_range = datetime.combine(start_date, datetime.min.time())
+    end_of_range = datetime.combine(end_date, datetime.max.time())
+
+    rows = db.query(
+        Booking.scheduled_date,
+        func.count(Booking.id)
+    ).filter(
+        and_(
+            Booking.scheduled_date >= start_of_range,
+            Booking.scheduled_date <= end_of_range,
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+        )
+    ).group_by(Booking.scheduled_date).all()
+
+    # Count bookings per day and time slot
+    slot_counts: Dict[date, Dict[str, int]] = {}
+    for scheduled, count in rows:
+        day_counts = slot_counts.setdefault(scheduled.date(), {})
+        slot_time = scheduled.strftime("%H:%M")
+        day_counts[slot_time] = day_counts.get(slot_time, 0) + count
+
+    return {
+        day: [slot for slot, count in counts.items() if count >= MAX_BOOKINGS_PER_SLOT]
+        for day, counts in slot_counts.items()
+    }
+
+
+def get_past_slots(check_date: date, buffer_minutes: int = 60) -> List[str]:
+    """Slots on check_date that start before now plus the booking buffer."""
+    buffer_time = datetime.now() + timedelta(minutes=buffer_minutes)
+    past = []
+    for slot in generate_time_slots():
+        slot_time = datetime.combine(check_date, datetime.min.time()).replace(
+            hour=slot["hour"], minute=slot["minute"]
+        )
+        if slot_time <= buffer_time:
+            past.append(slot["value"])
+    return past
+
+
+def get_busy_message(expert_count: int) -> Optional[str]:
+    """Banner text for low expert availability."""
+    if expert_count == 0:
+        return "All experts are currently busy. Please try a different time."
+    elif expert_count <= 2:
+        return "Limited availability. Book soon to secure your slot!"
+    return None
+
+
 def get_available_expert_count(db: Session, check_date: date, check_time: Optional[str] = None) -> int:
     """Get count of available experts/cleaners for a date/time."""
     # Query active employees
@@ -149,10 +218,10 @@ def get_available_expert_count(db: Session, check_date: date, check_time: Option
 
 # API Endpoints
 @router.get("/slots", response_model=AvailabilityResponse)
-def get_available_slots(
+async def get_available_slots(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     duration: int = Query(60, description="Duration in minutes"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get available time slots for a specific date.
@@ -169,57 +238,104 @@ def get_available_slots(
         raise HTTPException(status_code=400, detail="Cannot check availability for past dates")
 
     # Get unavailable slots
-    unavailable_slots = get_booked_slots(db, check_date)
+    unavailable_slots = await run_db(db, get_booked_slots, check_date)
 
-    # For today, also mark past times as unavailable
+    # For today, also mark past times as unavailable (1 hour buffer)
     if check_date == today:
-        now = datetime.now()
-        buffer_time = now + timedelta(minutes=60)  # 1 hour buffer
-
-        all_slots = generate_time_slots()
-        for slot in all_slots:
-            slot_time = datetime.combine(check_date, datetime.min.time()).replace(
-                hour=slot["hour"], minute=slot["minute"]
-            )
-            if slot_time <= buffer_time and slot["value"] not in unavailable_slots:
-                unavailable_slots.append(slot["value"])
+        for slot_value in get_past_slots(check_date):
+            if slot_value not in unavailable_slots:
+                unavailable_slots.append(slot_value)
 
     # Get available expert count
-    expert_count = get_available_expert_count(db, check_date)
-
-    # Generate busy message if needed
-    busy_message = None
-    if expert_count == 0:
-        busy_message = "All experts are currently busy. Please try a different time."
-    elif expert_count <= 2:
-        busy_message = "Limited availability. Book soon to secure your slot!"
+    expert_count = await run_db(db, get_available_expert_count, check_date)
 
     return AvailabilityResponse(
         date=date,
         unavailable_slots=unavailable_slots,
         available_experts=expert_count,
-        busy_message=busy_message
+        busy_message=get_busy_message(expert_count)
     )
 
 
+@router.get("/range", response_model=AvailabilityRangeResponse)
+async def get_available_slots_range(
+    start_date: str = Query(..., description="First date in YYYY-MM-DD format"),
+    end_date: str = Query(..., description="Last date in YYYY-MM-DD format (inclusive)"),
+    duration: int = Query(60, description="Duration in minutes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get available time slots for every date in a range (up to 31 days).
+    Same per-day payload as /slots, for week and month pickers, using a
+    fixed number of queries regardless of range length.
+    """
+    try:
+        first = datetime.strptime(start_date, "%Y-%m-%d").date()
+        last = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if last < first:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+
+    day_count = (last - first).days + 1
+    if day_count > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+
+    # Don't allow booking in the past
+    today = datetime.now().date()
+    if first < today:
+        raise HTTPException(status_code=400, detail="Cannot check availability for past dates")
+
+    booked_by_day = await run_db(db, get_booked_slots_range, first, last)
+
+    # Expert count does not depend on the day when no time is given
+    expert_count = await run_db(db, get_available_expert_count, first)
+    busy_message = get_busy_message(expert_count)
+
+    days = []
+    for offset in range(day_count):
+        check_date = first + timedelta(days=offset)
+        unavailable_slots = list(booked_by_day.get(check_date, []))
+
+        if check_date == today:
+            for slot_value in get_past_slots(check_date):
+                if slot_value not in unavailable_slots:
+                    unavailable_slots.append(slot_value)
+
+        days.append(AvailabilityResponse(
+            date=check_date.isoformat(),
+            unavailable_slots=unavailable_slots,
+            available_experts=expert_count,
+            busy_message=busy_message
+        ))
+
+    return AvailabilityRangeResponse(start_date=start_date, end_date=end_date, days=days)
+
+
 @router.get("/slots/detailed")
-def get_detailed_slots(
+async def get_detailed_slots(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
-    db: Session = Depends(get_db)
+    region: Optional[str] = Query(None, description="Region code to restrict bookings and experts to"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get detailed time slot information including availability per slot.
+
+    Served from the per-date slot capacity index, so the whole day costs
+    two queries on a cache miss and none on a hit.
     """
     try:
         check_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
+    all_slots = generate_time_slots()
+    capacity = await get_capacity_index(db, check_date, [slot["value"] for slot in all_slots], region)
+
     # Get unavailable slots
-    unavailable_slots = get_booked_slots(db, check_date)
+    unavailable_slots = set(capacity.unavailable_slots())
 
-    # Generate all slots with availability
-    all_slots = generate_time_slots()
     today = datetime.now().date()
     now = datetime.now()
     buffer_time = now + timedelta(minutes=60)
@@ -236,7 +352,7 @@ def get_detailed_slots(
             if slot_time <= buffer_time:
                 is_available = False
 
-        expert_count = get_available_expert_count(db, check_date, slot["value"]) if is_available else 0
+        expert_count = capacity.expert_count(slot["value"]) if is_available else 0
 
         detailed_slots.append(TimeSlotResponse(
             value=slot["value"],
@@ -256,7 +372,7 @@ def get_detailed_slots(
 def get_available_experts(
     date: str = Query(..., description="Date in YYYY-MM-DD format"),
     time: str = Query(..., description="Time in HH:MM format"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Get list of available experts for a specific date and time.
@@ -345,7 +461,7 @@ def get_available_experts(
 
 @router.get("/check")
 def check_instant_availability(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
     Quick check if instant booking is available right now.
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only
+from sqlalchemy import func, select
 from typing import List, Optional
 from decimal import Decimal
-from datetime import datetime, timezone, timedelta
-from app.database import get_db
-from app.api.deps import get_current_user, get_admin_user, get_staff_user
+from datetime import date, datetime, timezone, timedelta
+from app.config import settings
+from app.database import get_db, get_async_db, run_db, SessionLocal
+from app.api.deps import get_current_user, get_current_user_async, get_admin_user, get_staff_user
 from app.core.security import generate_booking_number, generate_subscription_number
 from app.core.exceptions import (
     NotFoundException, ForbiddenException, BadRequestException,
@@ -14,7 +16,7 @@ from app.core.exceptions import (
 from app.models import (
     Booking, BookingStatus, BookingStatusHistory, PaymentStatus, BookingType,
     Service, AddOn, Address, User, Payment, booking_add_ons,
-    UserRole, UserStatus, Subscription, SubscriptionStatus, SubscriptionVisit, SubscriptionPlan,
+    UserStatus, Subscription, SubscriptionStatus, SubscriptionVisit,
     TransactionType, Review, Employee
 )
 from app.api.wallet import get_or_create_wallet, create_transaction
@@ -25,10 +27,19 @@ from app.schemas import (
     AvailabilityRequest, AvailabilityResponse, AvailableSlot
 )
 from app.services.events import event_publisher, EventType
-from app.services.cache import cache_service
 from app.services.discount_service import DiscountService, DiscountValidationError
 from app.services.pricing_engine import PricingEngine
-from app.services.cleaner_assignment import get_region_from_city
+from app.services.cleaner_assignment import get_address_region
+from app.services.slot_capacity import invalidate_capacity_index
+from app.services.catalog import get_catalog
+from app.services.pagination import paginate, count_total, set_page_headers
+from app.services.read_replicas import get_read_db
+from app.services.rollups import (
+    get_booking_stats as get_booking_rollup_stats,
+    get_daily_booking_stats as get_daily_rollup_stats
+)
+from app.tasks.allocation_queue import allocation_queue
+from app.tasks.allocation_worker import allocation_workers
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
@@ -172,6 +183,78 @@ def _booking_to_response(booking: Booking) -> BookingResponse:
     )
 
 
+def _booking_list_options(include_add_ons: bool = False) -> list:
+    """
+    Loader options for booking list pages.
+
+    Only the columns the list DTO needs are loaded. Many-to-one rows are
+    joined into the page query; the assigned employee and add-ons are
+    loaded with one IN query each, so a page costs a constant number of
+    queries whatever its size.
+    """
+    options = [
+        load_only(
+            Booking.id, Booking.booking_number, Booking.customer_id, Booking.cleaner_id,
+            Booking.assigned_employee_id, Booking.service_id, Booking.address_id,
+            Booking.scheduled_date, Booking.status, Booking.payment_status,
+            Booking.total_price, Booking.created_at
+        ),
+        joinedload(Booking.customer).load_only(User.first_name, User.last_name, User.email),
+        joinedload(Booking.service).load_only(Service.name),
+        joinedload(Booking.address).load_only(Address.street_address, Address.apartment, Address.city),
+        joinedload(Booking.cleaner).load_only(User.first_name, User.last_name, User.phone),  # Legacy
+        joinedload(Booking.review).load_only(Review.id),
+        selectinload(Booking.assigned_employee).load_only(Employee.full_name, Employee.phone_number),
+    ]
+    if include_add_ons:
+        options.append(selectinload(Booking.add_ons).load_only(AddOn.name))
+    return options
+
+
+def _booking_to_list_response(booking: Booking, include_add_ons: bool = False) -> BookingListResponse:
+    """Convert a booking loaded with _booking_list_options to a list item."""
+    scheduled_dt = booking.scheduled_date
+    date_str = scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else ''
+    time_str = scheduled_dt.strftime('%I:%M %p') if scheduled_dt else ''
+    
+    # Cleaner info (new Employee system first, fallback to legacy User)
+    cleaner_name = None
+    cleaner_phone = None
+    
+    if booking.assigned_employee_id:
+        if booking.assigned_employee:
+            cleaner_name = booking.assigned_employee.full_name
+            cleaner_phone = booking.assigned_employee.phone_number
+    elif booking.cleaner:
+        cleaner_name = f"{booking.cleaner.first_name} {booking.cleaner.last_name}"
+        cleaner_phone = booking.cleaner.phone
+    
+    # Address string
+    address_str = booking.address.street_address
+    if booking.address.apartment:
+        address_str = f"{booking.address.apartment}, {address_str}"
+    
+    return BookingListResponse(
+        id=booking.id,
+        booking_number=booking.booking_number,
+        customer_name=f"{booking.customer.first_name} {booking.customer.last_name}",
+        customer_email=booking.customer.email,
+        service_name=booking.service.name,
+        address=address_str,
+        city=booking.address.city,
+        scheduled_date=date_str,
+        scheduled_time=time_str,
+        status=booking.status.value if hasattr(booking.status, 'value') else str(booking.status),
+        payment_status=booking.payment_status.value if hasattr(booking.payment_status, 'value') else str(booking.payment_status),
+        total_price=booking.total_price,
+        created_at=booking.created_at,
+        cleaner_name=cleaner_name,
+        cleaner_phone=cleaner_phone,
+        has_review=booking.review is not None,
+        add_ons=[addon.name for addon in booking.add_ons] if include_add_ons else []
+    )
+
+
 def _process_cancellation_refund(booking: Booking, db: Session) -> None:
     """Process wallet refund for cancelled booking if paid by wallet."""
     from app.models.wallet import WalletTransaction
@@ -274,8 +357,8 @@ async def get_pricing_preview(
     bathrooms: int = Query(1, description="Number of bathrooms"),
     add_on_ids: Optional[str] = Query(None, description="Comma-separated add-on IDs"),
     discount_code: Optional[str] = Query(None, description="Discount code to apply"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get a complete pricing preview including dynamic pricing.
@@ -290,18 +373,16 @@ async def get_pricing_preview(
     Use this before creating a booking to show transparent pricing.
     """
     # Validate service
-    service = db.query(Service).filter(
-        Service.id == service_id,
-        Service.is_active == True
-    ).first()
+    catalog = await get_catalog(db)
+    service = catalog.get_service(service_id)
     if not service:
         raise NotFoundException("Service not found")
 
     # Validate address
-    address = db.query(Address).filter(
+    address = await db.scalar(select(Address).where(
         Address.id == address_id,
         Address.user_id == current_user.id
-    ).first()
+    ))
     if not address:
         raise NotFoundException("Address not found")
 
@@ -314,7 +395,7 @@ async def get_pricing_preview(
             raise BadRequestException("Invalid add_on_ids format")
 
     # Get region for dynamic pricing
-    region_code = get_region_from_city(address.city) if address.city else "DXB"
+    region_code = get_address_region(address) or "DXB"
 
     # Get pricing preview from engine
     pricing_engine = PricingEngine(db)
@@ -330,14 +411,13 @@ async def get_pricing_preview(
 
     # Apply discount if provided
     if discount_code:
-        discount_service = DiscountService(db)
         try:
-            _, discount_amount = discount_service.validate_code(
+            _, discount_amount = await db.run_sync(lambda session: DiscountService(session).validate_code(
                 code=discount_code,
                 user_id=current_user.id,
                 service_id=service_id,
                 subtotal=Decimal(str(preview["totals"]["subtotal_after_dynamic"]))
-            )
+            ))
             # Recalculate with discount
             subtotal_after_dynamic = Decimal(str(preview["totals"]["subtotal_after_dynamic"]))
             tax_rate = Decimal("0.05")
@@ -373,15 +453,13 @@ async def get_pricing_preview(
 @router.post("/", response_model=BookingResponse)
 async def create_booking(
     data: BookingCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new booking."""
     # Validate service
-    service = db.query(Service).filter(
-        Service.id == data.service_id,
-        Service.is_active == True
-    ).first()
+    catalog = await get_catalog(db)
+    service = catalog.get_service(data.service_id)
     if not service:
         raise NotFoundException("Service not found")
     
@@ -389,10 +467,10 @@ async def create_booking(
     address = None
     if data.address_id:
         # Validate provided address ID
-        address = db.query(Address).filter(
+        address = await db.scalar(select(Address).where(
             Address.id == data.address_id,
             Address.user_id == current_user.id
-        ).first()
+        ))
         if not address:
             raise NotFoundException("Address not found")
     elif data.address_details:
@@ -414,22 +492,25 @@ async def create_booking(
             is_default=data.address_details.is_default or False
         )
         db.add(address)
-        db.flush() # Get ID
+        await db.flush() # Get ID
         
         # If this is the user's first address, make it default
-        if db.query(Address).filter(Address.user_id == current_user.id).count() == 1:
+        address_count = await db.scalar(
+            select(func.count(Address.id)).where(Address.user_id == current_user.id)
+        )
+        if address_count == 1:
             address.is_default = True
             
         data.address_id = address.id
     else:
         # Fallback to default address
-        address = db.query(Address).filter(
+        address = await db.scalar(select(Address).where(
             Address.user_id == current_user.id,
             Address.is_default == True
-        ).first()
+        ).limit(1))
         if not address:
             # Try to find *any* address
-            address = db.query(Address).filter(Address.user_id == current_user.id).first()
+            address = await db.scalar(select(Address).where(Address.user_id == current_user.id).limit(1))
             
         if not address:
             raise BadRequestException("Address is required. Please add an address or select one.")
@@ -472,12 +553,12 @@ async def create_booking(
     # Check for overlapping bookings [truncated for brevity, assumes identical context]
     # (Checking overlap is same)
     
-    overlapping_booking = db.query(Booking).filter(
+    overlapping_booking = await db.scalar(select(Booking).where(
         Booking.customer_id == current_user.id,
         Booking.status.notin_([BookingStatus.CANCELLED, BookingStatus.REFUNDED, BookingStatus.NO_SHOW]),
         Booking.scheduled_date < booking_end_time,
         (Booking.scheduled_date + timedelta(hours=duration_hours)) > data.scheduled_date
-    ).first()
+    ).limit(1))
 
     if overlapping_booking:
          raise BadRequestException(
@@ -487,10 +568,7 @@ async def create_booking(
     # Get Add-ons
     add_ons = []
     if data.add_on_ids:
-        add_ons = db.query(AddOn).filter(
-            AddOn.id.in_(data.add_on_ids),
-            AddOn.is_active == True
-        ).all()
+        add_ons = catalog.active_add_ons(data.add_on_ids)
     
     # Initialize discount variables
     discount_amount = Decimal("0")
@@ -590,12 +668,13 @@ async def create_booking(
     # --- Apply Discount ---
     if data.discount_code:
         try:
-            discount_service = DiscountService(db)
-            validated_discount, calculated_discount = discount_service.validate_code(
-                code=data.discount_code,
-                user_id=current_user.id,
-                service_id=service.id,
-                subtotal=adjusted_subtotal
+            validated_discount, calculated_discount = await db.run_sync(
+                lambda session: DiscountService(session).validate_code(
+                    code=data.discount_code,
+                    user_id=current_user.id,
+                    service_id=service.id,
+                    subtotal=adjusted_subtotal
+                )
             )
             discount_amount = calculated_discount
         except DiscountValidationError:
@@ -624,12 +703,9 @@ async def create_booking(
     
     # CASE 1: Purchasing a NEW subscription
     if data.new_subscription_plan_id:
-        plan = db.query(SubscriptionPlan).filter(
-            SubscriptionPlan.id == data.new_subscription_plan_id,
-            SubscriptionPlan.is_active == True
-        ).first()
+        plan = catalog.get_plan(data.new_subscription_plan_id)
         
-        if not plan:
+        if not plan or not plan.is_active:
             raise NotFoundException("Subscription plan not found")
             
         # Create new subscription
@@ -652,7 +728,7 @@ async def create_booking(
             started_at=now
         )
         db.add(used_subscription)
-        db.flush()  # Get ID
+        await db.flush()  # Get ID
         
         # NOTE: In a real flow, we'd handle payment here or mark as PENDING_ACTIVATION.
         # For this MVP, we treat it as active and potentially billed later/invoice.
@@ -660,11 +736,11 @@ async def create_booking(
     # CASE 2: Using an EXISTING subscription
     elif data.use_subscription:
         # Find active subscription with remaining visits
-        subscription = db.query(Subscription).filter(
+        subscription = await db.scalar(select(Subscription).where(
             Subscription.user_id == current_user.id,
             Subscription.status == SubscriptionStatus.ACTIVE,
             Subscription.visits_remaining > 0
-        ).first()
+        ).limit(1))
 
         if not subscription:
             raise BadRequestException("No active subscription with remaining visits available")
@@ -702,7 +778,7 @@ async def create_booking(
     wallet = None
 
     if data.payment_method == 'wallet' and total_price_val > 0:
-        wallet = get_or_create_wallet(db, current_user.id)
+        wallet = await run_db(db, get_or_create_wallet, current_user.id)
         if wallet.balance < total_price_val:
             raise BadRequestException(f"Insufficient wallet balance. Available: AED {wallet.balance}")
         
@@ -744,11 +820,11 @@ async def create_booking(
     )
     
     db.add(booking)
-    db.flush()  # Get booking ID
+    await db.flush()  # Get booking ID
     
     # Add add-ons to booking
     for addon in add_ons:
-        db.execute(
+        await db.execute(
             booking_add_ons.insert().values(
                 booking_id=booking.id,
                 add_on_id=addon.id,
@@ -768,8 +844,7 @@ async def create_booking(
 
     # Increment discount code usage if applicable
     if validated_discount:
-        discount_service = DiscountService(db)
-        discount_service.apply_code(validated_discount)
+        await db.run_sync(lambda session: DiscountService(session).apply_code(validated_discount))
 
     # Deduct visit from subscription if used
     if used_subscription:
@@ -788,10 +863,19 @@ async def create_booking(
         )
         db.add(visit)
 
+    # Queue allocation in the same transaction as the booking; a worker
+    # assigns the cleaner and pushes JOB_ASSIGNED over the websocket.
+    # A queue outside the session is only told once the booking is committed
+    duration_hours = float(service.base_duration_hours or 2.5)
+    queue_region = get_address_region(address)
+    if settings.ALLOCATION_QUEUE_ENABLED and allocation_queue.transactional:
+        await run_db(db, allocation_queue.enqueue, booking.id, queue_region, duration_hours)
+
     # Process wallet transaction if applicable (Commits the session)
     if wallet_transaction_needed and wallet:
-        create_transaction(
-            db=db,
+        await run_db(
+            db,
+            create_transaction,
             wallet=wallet,
             type=TransactionType.DEBIT,
             amount=total_price_val,
@@ -800,20 +884,32 @@ async def create_booking(
             reference_id=str(booking.id)
         )
     else:
-        db.commit()
+        await db.commit()
 
-    # Auto-assign a cleaner using enhanced allocation engine (weighted scoring + fallback)
-    from app.services.allocation_engine import enhanced_auto_assign
-    assigned_cleaner = await enhanced_auto_assign(booking, db, duration_hours=float(service.base_duration_hours or 2.5))
+    assigned_cleaner = None
+    if settings.ALLOCATION_QUEUE_ENABLED:
+        if not allocation_queue.transactional:
+            await run_db(db, allocation_queue.enqueue, booking.id, queue_region, duration_hours)
+        allocation_workers.notify()
+    else:
+        # Inline auto-assign using enhanced allocation engine (weighted scoring + fallback)
+        # (the allocation engine works on a synchronous session)
+        from app.services.allocation_engine import enhanced_auto_assign
+        with SessionLocal() as sync_db:
+            assigned_cleaner = await enhanced_auto_assign(
+                sync_db.get(Booking, booking.id), sync_db, duration_hours=duration_hours
+            )
+            if assigned_cleaner:
+                sync_db.refresh(assigned_cleaner)
 
-    # Reload with relationships
-    booking = db.query(Booking).options(
+    # Reload with relationships (and any assignment made since the commit)
+    booking = await db.scalar(select(Booking).options(
         joinedload(Booking.customer),
         joinedload(Booking.cleaner),
         joinedload(Booking.service),
         joinedload(Booking.address),
-        joinedload(Booking.add_ons)
-    ).filter(Booking.id == booking.id).first()
+        selectinload(Booking.add_ons)
+    ).where(Booking.id == booking.id).execution_options(populate_existing=True))
 
     # Publish booking created event
     await event_publisher.publish(EventType.JOB_CREATED, {
@@ -843,77 +939,43 @@ async def create_booking(
             "auto_assigned": True
         })
 
-    # Update dashboard stats cache
-    await cache_service.update_dashboard_stat("pending_jobs", 1)
+    await invalidate_capacity_index(booking.scheduled_date)
 
     return _booking_to_response(booking)
 
 
 @router.get("/", response_model=List[BookingListResponse])
 async def list_my_bookings(
+    response: Response,
     status: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    exact_count: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get current user's bookings."""
+    """
+    Get current user's bookings, newest first.
+    
+    Pagination is returned in headers: X-Next-Cursor, X-Total-Count and
+    X-Total-Estimated (the total is cached unless exact_count is set).
+    Reads the primary, not a replica: customers load this right after
+    booking.
+    """
     query = db.query(Booking).filter(Booking.customer_id == current_user.id)
     
     if status:
         query = query.filter(Booking.status == status)
     
-    bookings = query.options(
-        joinedload(Booking.service),
-        joinedload(Booking.address),
-        joinedload(Booking.cleaner),  # Legacy User-based cleaner
-        joinedload(Booking.review)    # Check if reviewed
-    ).order_by(Booking.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for booking in bookings:
-        scheduled_dt = booking.scheduled_date
-        date_str = scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else ''
-        time_str = scheduled_dt.strftime('%I:%M %p') if scheduled_dt else ''
-        
-        # Get cleaner info (check new Employee system first, fallback to legacy User)
-        cleaner_name = None
-        cleaner_phone = None
-        
-        if booking.assigned_employee_id:
-            employee = db.query(Employee).filter(Employee.id == booking.assigned_employee_id).first()
-            if employee:
-                cleaner_name = employee.full_name
-                cleaner_phone = employee.phone_number
-        elif booking.cleaner:
-            cleaner_name = f"{booking.cleaner.first_name} {booking.cleaner.last_name}"
-            cleaner_phone = booking.cleaner.phone
-        
-        # Address string
-        address_str = booking.address.street_address
-        if booking.address.apartment:
-            address_str = f"{booking.address.apartment}, {address_str}"
-        
-        result.append(BookingListResponse(
-            id=booking.id,
-            booking_number=booking.booking_number,
-            customer_name=f"{booking.customer.first_name} {booking.customer.last_name}",
-            customer_email=booking.customer.email,
-            service_name=booking.service.name,
-            address=address_str,
-            city=booking.address.city,
-            scheduled_date=date_str,
-            scheduled_time=time_str,
-            status=booking.status.value if hasattr(booking.status, 'value') else str(booking.status),
-            payment_status=booking.payment_status.value if hasattr(booking.payment_status, 'value') else str(booking.payment_status),
-            total_price=booking.total_price,
-            created_at=booking.created_at,
-            cleaner_name=cleaner_name,
-            cleaner_phone=cleaner_phone,
-            has_review=booking.review is not None
-        ))
+    total, exact = await count_total(db, query, "my_bookings", exact=exact_count)
+    bookings, next_cursor = paginate(
+        query.options(*_booking_list_options()), Booking.created_at, Booking.id,
+        cursor=cursor, limit=limit, offset=skip
+    )
+    set_page_headers(response, next_cursor, total, exact)
     
-    return result
+    return [_booking_to_list_response(booking) for booking in bookings]
 
 
 @router.get("/{booking_id}", response_model=BookingResponse)
@@ -999,6 +1061,7 @@ async def cancel_booking(
         "cancellation_reason": data.reason,
         "cancelled_by_id": current_user.id
     })
+    await invalidate_capacity_index(booking.scheduled_date)
 
     return {"message": "Booking cancelled successfully"}
 
@@ -1054,6 +1117,7 @@ async def reschedule_booking(
         "new_date": data.new_date.isoformat(),
         "reason": data.reason
     })
+    await invalidate_capacity_index(old_date, data.new_date)
 
     return {"message": "Booking rescheduled successfully", "new_date": data.new_date}
 
@@ -1062,18 +1126,26 @@ async def reschedule_booking(
 
 @router.get("/admin/all", response_model=List[BookingListResponse])
 async def list_all_bookings(
+    response: Response,
     status: Optional[str] = Query(None),
     payment_status: Optional[str] = Query(None),
     from_date: Optional[datetime] = Query(None),
     to_date: Optional[datetime] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    exact_count: bool = Query(False),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Admin: List all bookings with filters."""
+    """
+    Admin: List all bookings with filters, newest first.
+    
+    Pagination is returned in headers, as for list_my_bookings.
+    """
     query = db.query(Booking)
+    filtered = any([status, payment_status, from_date, to_date, search])
     
     if status:
         query = query.filter(Booking.status == status)
@@ -1091,60 +1163,17 @@ async def list_all_bookings(
             (User.last_name.ilike(f"%{search}%"))
         )
     
-    bookings = query.options(
-        joinedload(Booking.customer),
-        joinedload(Booking.service),
-        joinedload(Booking.address),
-        joinedload(Booking.cleaner),
-        joinedload(Booking.review),
-    joinedload(Booking.add_ons)
-    ).order_by(Booking.created_at.desc()).offset(skip).limit(limit).all()
-    
-    result = []
-    for booking in bookings:
-        scheduled_dt = booking.scheduled_date
-        date_str = scheduled_dt.strftime('%Y-%m-%d') if scheduled_dt else ''
-        time_str = scheduled_dt.strftime('%I:%M %p') if scheduled_dt else ''
-        
-        # Get cleaner info
-        cleaner_name = None
-        cleaner_phone = None
-        
-        if booking.assigned_employee_id:
-            employee = db.query(Employee).filter(Employee.id == booking.assigned_employee_id).first()
-            if employee:
-                cleaner_name = employee.full_name
-                cleaner_phone = employee.phone_number
-        elif booking.cleaner:
-            cleaner_name = f"{booking.cleaner.first_name} {booking.cleaner.last_name}"
-            cleaner_phone = booking.cleaner.phone
-        
-        # Address string
-        address_str = booking.address.street_address
-        if booking.address.apartment:
-            address_str = f"{booking.address.apartment}, {address_str}"
-        
-        result.append(BookingListResponse(
-            id=booking.id,
-            booking_number=booking.booking_number,
-            customer_name=f"{booking.customer.first_name} {booking.customer.last_name}",
-            customer_email=booking.customer.email,
-            service_name=booking.service.name,
-            address=address_str,
-            city=booking.address.city,
-            scheduled_date=date_str,
-            scheduled_time=time_str,
-            status=booking.status.value if hasattr(booking.status, 'value') else str(booking.status),
-            payment_status=booking.payment_status.value if hasattr(booking.payment_status, 'value') else str(booking.payment_status),
-            total_price=booking.total_price,
-            created_at=booking.created_at,
-            cleaner_name=cleaner_name,
-            cleaner_phone=cleaner_phone,
-            has_review=booking.review is not None,
-            add_ons=[addon.name for addon in booking.add_ons]
-        ))
+    total, exact = await count_total(
+        db, query, "admin_bookings", exact=exact_count,
+        table=None if filtered else Booking.__table__
+    )
+    bookings, next_cursor = paginate(
+        query.options(*_booking_list_options(include_add_ons=True)), Booking.created_at, Booking.id,
+        cursor=cursor, limit=limit, offset=skip
+    )
+    set_page_headers(response, next_cursor, total, exact)
     
-    return result
+    return [_booking_to_list_response(booking, include_add_ons=True) for booking in bookings]
 
 
 @router.put("/admin/{booking_id}/status")
@@ -1198,8 +1227,11 @@ async def update_booking_status(
             "previous_status": old_status.value,
             "customer_id": booking.customer_id,
             "cleaner_id": booking.cleaner_id,
+            "total_price": float(booking.total_price) if booking.total_price else 0,
+            "completed_at": booking.actual_end_time.isoformat() if booking.actual_end_time else None,
             "reason": data.reason
         })
+    await invalidate_capacity_index(booking.scheduled_date)
 
     return {"message": f"Booking status updated to {data.status.value}"}
 
@@ -1230,23 +1262,25 @@ async def get_booking_stats(
     admin: User = Depends(get_admin_user),
     db: Session = Depends(get_db)
 ):
-    """Admin: Get booking statistics."""
-    total_bookings = db.query(Booking).count()
-    pending_bookings = db.query(Booking).filter(Booking.status == BookingStatus.PENDING).count()
-    confirmed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.CONFIRMED).count()
-    completed_bookings = db.query(Booking).filter(Booking.status == BookingStatus.COMPLETED).count()
-    
-    total_revenue = db.query(func.sum(Booking.total_price)).filter(
-        Booking.payment_status == PaymentStatus.PAID
-    ).scalar() or 0
-    
-    total_customers = db.query(User).filter(User.role == UserRole.CUSTOMER).count()
-    
-    return {
-        "total_bookings": total_bookings,
-        "pending_bookings": pending_bookings,
-        "confirmed_bookings": confirmed_bookings,
-        "completed_bookings": completed_bookings,
-        "total_customers": total_customers,
-        "total_revenue": float(total_revenue)
-    }
+    """
+    Admin: Get booking statistics.
+
+    Read from the daily booking rollups, so the cost grows with the number
+    of days rather than bookings. Figures lag by at most one rollup refresh.
+    """
+    return get_booking_rollup_stats(db)
+
+
+@router.get("/admin/stats/daily")
+async def get_daily_booking_stats(
+    from_date: Optional[date] = Query(None),
+    to_date: Optional[date] = Query(None),
+    admin: User = Depends(get_admin_user),
+    db: Session = Depends(get_db)
+):
+    """Admin: Bookings and paid revenue per day and region (default: last 30 days)."""
+    to_date = to_date or datetime.now(timezone.utc).date()
+    from_date = from_date or to_date - timedelta(days=29)
+    if from_date > to_date:
+        raise BadRequestException("from_date must not be after to_date")
+    return get_daily_rollup_stats(db, from_date, to_date)
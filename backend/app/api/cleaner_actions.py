@@ -9,12 +9,13 @@ Endpoints for cleaners to manage their job lifecycle:
 - Report failure
 """
 from fastapi import APIRouter, Depends, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from pydantic import BaseModel
 
-from app.database import get_db
-from app.api.deps import get_current_user
+from app.database import get_async_db
+from app.api.deps import get_current_user_async
 from app.models import User, Booking, BookingStatus, CleanerProfile, CleanerStatus
 from app.services.job_state_machine import (
     JobStateMachine,
@@ -76,6 +77,23 @@ def validate_cleaner_role(user: User) -> None:
         raise ForbiddenException("Only cleaners can perform this action")
 
 
+async def get_own_job(db: AsyncSession, job_id: int, user: User) -> Booking:
+    """Load a job, ensuring the user is its assigned cleaner (or an admin)."""
+    job = await db.get(Booking, job_id)
+    if not job:
+        raise NotFoundException(f"Job {job_id} not found")
+
+    if job.cleaner_id != user.id and user.role.value != "admin":
+        raise ForbiddenException("You are not assigned to this job")
+    return job
+
+
+async def get_cleaner_profile(db: AsyncSession, user_id: int) -> Optional[CleanerProfile]:
+    return await db.scalar(
+        select(CleanerProfile).where(CleanerProfile.user_id == user_id).limit(1)
+    )
+
+
 def format_job_response(job: Booking, message: str) -> JobResponse:
     """Format a job into a response."""
     return JobResponse(
@@ -98,8 +116,8 @@ async def start_job(
     job_id: int,
     data: StartJobRequest,
     x_idempotency_key: Optional[str] = Header(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Start a job (ASSIGNED → IN_PROGRESS).
@@ -111,25 +129,19 @@ async def start_job(
     validate_cleaner_role(current_user)
     
     # Verify this cleaner is assigned to the job
-    job = db.query(Booking).filter(Booking.id == job_id).first()
-    if not job:
-        raise NotFoundException(f"Job {job_id} not found")
-    
-    if job.cleaner_id != current_user.id and current_user.role.value != "admin":
-        raise ForbiddenException("You are not assigned to this job")
+    job = await get_own_job(db, job_id, current_user)
     
     # Idempotency check: if already in progress, return success
     if job.status == BookingStatus.IN_PROGRESS:
         return format_job_response(job, "Job is already in progress")
     
     try:
-        state_machine = JobStateMachine(db)
-        updated_job = state_machine.start_job(
+        updated_job = await db.run_sync(lambda session: JobStateMachine(session).start_job(
             job_id=job_id,
             cleaner=current_user,
             expected_version=data.expected_version,
             idempotency_key=x_idempotency_key
-        )
+        ))
         return format_job_response(updated_job, "Job started successfully")
         
     except InvalidTransitionError as e:
@@ -142,8 +154,8 @@ async def start_job(
 async def pause_job(
     job_id: int,
     data: PauseJobRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Pause a job (IN_PROGRESS → PAUSED).
@@ -154,24 +166,18 @@ async def pause_job(
     validate_cleaner_role(current_user)
     
     # Verify this cleaner is assigned to the job
-    job = db.query(Booking).filter(Booking.id == job_id).first()
-    if not job:
-        raise NotFoundException(f"Job {job_id} not found")
-    
-    if job.cleaner_id != current_user.id and current_user.role.value != "admin":
-        raise ForbiddenException("You are not assigned to this job")
+    job = await get_own_job(db, job_id, current_user)
     
     # Idempotency: if already paused, return success
     if job.status == BookingStatus.PAUSED:
         return format_job_response(job, "Job is already paused")
     
     try:
-        state_machine = JobStateMachine(db)
-        updated_job = state_machine.pause_job(
+        updated_job = await db.run_sync(lambda session: JobStateMachine(session).pause_job(
             job_id=job_id,
             cleaner=current_user,
             reason=data.reason
-        )
+        ))
         return format_job_response(updated_job, "Job paused successfully")
         
     except InvalidTransitionError as e:
@@ -181,8 +187,8 @@ async def pause_job(
 @router.post("/jobs/{job_id}/resume", response_model=JobResponse)
 async def resume_job(
     job_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Resume a paused job (PAUSED → IN_PROGRESS).
@@ -193,23 +199,17 @@ async def resume_job(
     validate_cleaner_role(current_user)
     
     # Verify this cleaner is assigned to the job
-    job = db.query(Booking).filter(Booking.id == job_id).first()
-    if not job:
-        raise NotFoundException(f"Job {job_id} not found")
-    
-    if job.cleaner_id != current_user.id and current_user.role.value != "admin":
-        raise ForbiddenException("You are not assigned to this job")
+    job = await get_own_job(db, job_id, current_user)
     
     # Idempotency: if already in progress, return success
     if job.status == BookingStatus.IN_PROGRESS:
         return format_job_response(job, "Job is already in progress")
     
     try:
-        state_machine = JobStateMachine(db)
-        updated_job = state_machine.resume_job(
+        updated_job = await db.run_sync(lambda session: JobStateMachine(session).resume_job(
             job_id=job_id,
             cleaner=current_user
-        )
+        ))
         return format_job_response(updated_job, "Job resumed successfully")
         
     except InvalidTransitionError as e:
@@ -221,8 +221,8 @@ async def complete_job(
     job_id: int,
     data: CompleteJobRequest,
     x_idempotency_key: Optional[str] = Header(None),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Complete a job (IN_PROGRESS → COMPLETED).
@@ -234,12 +234,7 @@ async def complete_job(
     validate_cleaner_role(current_user)
     
     # Verify this cleaner is assigned to the job
-    job = db.query(Booking).filter(Booking.id == job_id).first()
-    if not job:
-        raise NotFoundException(f"Job {job_id} not found")
-    
-    if job.cleaner_id != current_user.id and current_user.role.value != "admin":
-        raise ForbiddenException("You are not assigned to this job")
+    job = await get_own_job(db, job_id, current_user)
     
     # Idempotency: if already completed, return success
     if job.status == BookingStatus.COMPLETED:
@@ -250,13 +245,12 @@ async def complete_job(
         job.cleaner_notes = data.notes
     
     try:
-        state_machine = JobStateMachine(db)
-        updated_job = state_machine.complete_job(
+        updated_job = await db.run_sync(lambda session: JobStateMachine(session).complete_job(
             job_id=job_id,
             cleaner=current_user,
             expected_version=data.expected_version,
             idempotency_key=x_idempotency_key
-        )
+        ))
         return format_job_response(updated_job, "Job completed successfully")
         
     except InvalidTransitionError as e:
@@ -269,8 +263,8 @@ async def complete_job(
 async def fail_job(
     job_id: int,
     data: FailJobRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Report a job failure (IN_PROGRESS → FAILED).
@@ -281,24 +275,18 @@ async def fail_job(
     """
     validate_cleaner_role(current_user)
     
-    job = db.query(Booking).filter(Booking.id == job_id).first()
-    if not job:
-        raise NotFoundException(f"Job {job_id} not found")
-    
-    if job.cleaner_id != current_user.id and current_user.role.value != "admin":
-        raise ForbiddenException("You are not assigned to this job")
+    job = await get_own_job(db, job_id, current_user)
     
     # Idempotency: if already failed, return success
     if job.status == BookingStatus.FAILED:
         return format_job_response(job, "Job is already marked as failed")
     
     try:
-        state_machine = JobStateMachine(db)
-        updated_job = state_machine.fail_job(
+        updated_job = await db.run_sync(lambda session: JobStateMachine(session).fail_job(
             job_id=job_id,
             actor=current_user,
             reason=data.reason
-        )
+        ))
         return format_job_response(updated_job, "Job marked as failed")
         
     except InvalidTransitionError as e:
@@ -309,8 +297,8 @@ async def fail_job(
 
 @router.get("/me/status")
 async def get_my_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current cleaner's status and active job."""
     validate_cleaner_role(current_user)
@@ -318,9 +306,7 @@ async def get_my_status(
     # Try cache first for status
     cached_status = await cache_service.get_cleaner_status(current_user.id)
 
-    profile = db.query(CleanerProfile).filter(
-        CleanerProfile.user_id == current_user.id
-    ).first()
+    profile = await get_cleaner_profile(db, current_user.id)
 
     # Use cached status if available, otherwise from DB
     status = cached_status or (profile.status.value if profile else "offline")
@@ -330,14 +316,14 @@ async def get_my_status(
         await cache_service.set_cleaner_status(current_user.id, profile.status.value)
 
     # Get active job if any
-    active_job = db.query(Booking).filter(
+    active_job = await db.scalar(select(Booking).where(
         Booking.cleaner_id == current_user.id,
         Booking.status.in_([
             BookingStatus.ASSIGNED,
             BookingStatus.IN_PROGRESS,
             BookingStatus.PAUSED
         ])
-    ).first()
+    ).limit(1))
 
     return {
         "cleaner_id": current_user.id,
@@ -357,15 +343,13 @@ async def get_my_status(
 
 @router.post("/me/go-online")
 async def go_online(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set cleaner status to available."""
     validate_cleaner_role(current_user)
 
-    profile = db.query(CleanerProfile).filter(
-        CleanerProfile.user_id == current_user.id
-    ).first()
+    profile = await get_cleaner_profile(db, current_user.id)
 
     old_status = profile.status.value if profile else "offline"
 
@@ -379,7 +363,7 @@ async def go_online(
     else:
         profile.status = CleanerStatus.AVAILABLE
 
-    db.commit()
+    await db.commit()
 
     # Update cache
     await cache_service.set_cleaner_status(current_user.id, "available")
@@ -397,33 +381,31 @@ async def go_online(
 
 @router.post("/me/go-offline")
 async def go_offline(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Set cleaner status to offline."""
     validate_cleaner_role(current_user)
 
     # Check if cleaner has active jobs
-    active_job = db.query(Booking).filter(
+    active_job = await db.scalar(select(Booking).where(
         Booking.cleaner_id == current_user.id,
         Booking.status.in_([
             BookingStatus.IN_PROGRESS,
             BookingStatus.PAUSED
         ])
-    ).first()
+    ).limit(1))
 
     if active_job:
         raise BadRequestException("Cannot go offline while a job is in progress")
 
-    profile = db.query(CleanerProfile).filter(
-        CleanerProfile.user_id == current_user.id
-    ).first()
+    profile = await get_cleaner_profile(db, current_user.id)
 
     old_status = profile.status.value if profile else "offline"
 
     if profile:
         profile.status = CleanerStatus.OFFLINE
-        db.commit()
+        await db.commit()
 
     # Update cache
     await cache_service.set_cleaner_status(current_user.id, "offline")
@@ -442,26 +424,26 @@ async def go_offline(
 @router.get("/me/jobs")
 async def get_my_jobs(
     status: Optional[str] = None,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get cleaner's assigned jobs."""
     validate_cleaner_role(current_user)
     
-    query = db.query(Booking).filter(Booking.cleaner_id == current_user.id)
+    query = select(Booking).where(Booking.cleaner_id == current_user.id)
     
     if status:
-        query = query.filter(Booking.status == status)
+        query = query.where(Booking.status == status)
     else:
         # Default: show active and recent jobs
-        query = query.filter(Booking.status.in_([
+        query = query.where(Booking.status.in_([
             BookingStatus.ASSIGNED,
             BookingStatus.IN_PROGRESS,
             BookingStatus.PAUSED,
             BookingStatus.COMPLETED
         ]))
     
-    jobs = query.order_by(Booking.scheduled_date.desc()).limit(20).all()
+    jobs = (await db.scalars(query.order_by(Booking.scheduled_date.desc()).limit(20))).all()
     
     return {
         "jobs": [
@@ -7,12 +7,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from datetime import datetime, date, time
 from typing import Optional, List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from app.database import get_db
 from app.api.deps import require_employee
 from app.models.employee import Employee, EmployeeCleanerStatus
 from app.models.booking import Booking, BookingStatus
+from app.services.cleaner_location import update_cleaner_location
 
 router = APIRouter(prefix="/cleaner", tags=["Cleaner Dashboard"])
 
@@ -21,6 +22,10 @@ router = APIRouter(prefix="/cleaner", tags=["Cleaner Dashboard"])
 class StatusUpdate(BaseModel):
     status: str
 
+class LocationUpdate(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
 class JobSummary(BaseModel):
     id: int
     booking_number: str
@@ -74,6 +79,16 @@ async def update_cleaner_status(
     return {"status": current_employee.cleaner_status.value}
 
 
+@router.put("/location")
+async def update_location(
+    update: LocationUpdate,
+    current_employee: Employee = Depends(require_employee)
+):
+    """Report the cleaner's current GPS position (used for allocation distance)."""
+    await update_cleaner_location(current_employee.id, update.latitude, update.longitude)
+    return {"status": "ok"}
+
+
 @router.get("/jobs/today")
 async def get_today_jobs(
     current_employee: Employee = Depends(require_employee),
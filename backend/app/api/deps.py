@@ -1,7 +1,8 @@
 from fastapi import Depends, Header
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.core.security import decode_token
 from app.core.exceptions import UnauthorizedException, ForbiddenException
 from app.models import User, UserRole, UserStatus
@@ -9,11 +10,8 @@ from app.models.employee import Employee, EmployeeAccountStatus
 import uuid
 
 
-async def get_current_user(
-    authorization: Optional[str] = Header(None),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user (customer/admin) from JWT token."""
+def _user_id_from_authorization(authorization: Optional[str]) -> int:
+    """Validate a customer/admin access token and return its user ID."""
     if not authorization or not authorization.startswith("Bearer "):
         raise UnauthorizedException("Missing or invalid authorization header")
     
@@ -32,12 +30,12 @@ async def get_current_user(
         raise UnauthorizedException("Use employee endpoints for employee tokens")
         
     try:
-        user_id = int(payload.get("sub"))
+        return int(payload.get("sub"))
     except (ValueError, TypeError):
         raise UnauthorizedException("Invalid user ID in token")
-        
-    user = db.query(User).filter(User.id == user_id).first()
-    
+
+
+def _check_active_user(user: Optional[User]) -> User:
     if not user:
         raise UnauthorizedException("User not found")
     
@@ -47,6 +45,31 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user (customer/admin) from JWT token."""
+    user_id = _user_id_from_authorization(authorization)
+    user = db.query(User).filter(User.id == user_id).first()
+    return _check_active_user(user)
+
+
+async def get_current_user_async(
+    authorization: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """
+    Get current authenticated user for routes on the async session.
+
+    The user is loaded through the request's AsyncSession (shared with the
+    route's own get_async_db dependency).
+    """
+    user_id = _user_id_from_authorization(authorization)
+    user = await db.get(User, user_id)
+    return _check_active_user(user)
+
+
 async def get_current_employee(
     authorization: Optional[str] = Header(None),
     db: Session = Depends(get_db)
@@ -106,6 +129,15 @@ async def get_admin_user(
     return current_user
 
 
+async def get_admin_user_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    """Require admin role (async session)."""
+    if current_user.role != UserRole.ADMIN:
+        raise ForbiddenException("Admin access required")
+    return current_user
+
+
 async def get_cleaner_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
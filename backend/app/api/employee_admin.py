@@ -31,6 +31,8 @@ from app.api.deps import require_admin
 from app.core.security import hash_password
 from fastapi import BackgroundTasks
 from app.services.cleaner_assignment import assign_backlog_to_cleaner
+from app.services.pagination import paginate, count_total
+from app.services.read_replicas import get_read_db
 
 router = APIRouter(prefix="/admin/employees", tags=["Employee Management"])
 
@@ -117,6 +119,8 @@ class EmployeeListResponse(BaseModel):
     page: int
     total_pages: int
     limit: int
+    total_estimated: bool = False  # Cached or estimated total unless exact_count was requested
+    next_cursor: Optional[str] = None
 
 
 def employee_to_response(emp: Employee) -> EmployeeResponse:
@@ -243,15 +247,21 @@ async def list_employees(
     region_code: Optional[str] = Query(None, description="Filter by region"),
     status: Optional[str] = Query(None, description="Filter by account status"),
     search: Optional[str] = Query(None, description="Search by name or phone"),
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: int = Query(1, ge=1, description="Ignored when a cursor is given"),
     limit: int = Query(25, ge=1, le=100),
+    exact_count: bool = Query(False),
     current_admin: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """
-    List all employees with pagination and filters.
+    List all employees with pagination and filters, newest first.
+    
+    Follow next_cursor for further pages; page numbers still work but cost
+    an OFFSET scan.
     """
     query = db.query(Employee)
+    filtered = any([region_code, status, search])
     
     # Apply filters
     if region_code:
@@ -274,12 +284,17 @@ async def list_employees(
             )
         )
     
-    # Get total count
-    total = query.count()
+    # Get total count (cached or estimated unless exact_count)
+    total, exact = await count_total(
+        db, query, "admin_employees", exact=exact_count,
+        table=None if filtered else Employee.__table__
+    )
     
     # Apply pagination
-    offset = (page - 1) * limit
-    employees = query.order_by(Employee.created_at.desc()).offset(offset).limit(limit).all()
+    employees, next_cursor = paginate(
+        query, Employee.created_at, Employee.id,
+        cursor=cursor, limit=limit, offset=(page - 1) * limit
+    )
     
     # Calculate total pages
     total_pages = (total + limit - 1) // limit
@@ -289,7 +304,9 @@ async def list_employees(
         total=total,
         page=page,
         total_pages=total_pages,
-        limit=limit
+        limit=limit,
+        total_estimated=not exact,
+        next_cursor=next_cursor
     )
 
 
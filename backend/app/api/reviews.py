@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime, timezone
 from app.database import get_db
 from app.api.deps import get_current_user, get_admin_user
 from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
 from app.models import Review, Booking, User, BookingStatus
+from app.services.pagination import paginate, count_total, set_page_headers
+from app.services.read_replicas import get_read_db
+from app.services.review_summary import apply_review_change, get_review_summary
 from app.schemas import (
     ReviewCreate, ReviewUpdate, ReviewResponse, ReviewResponseAdd, ReviewStats
 )
@@ -54,6 +56,9 @@ async def create_review(
     )
     
     db.add(review)
+    db.flush()
+    if review.is_published:
+        apply_review_change(db, review, booking.service_id, 1)
     db.commit()
     db.refresh(review)
     
@@ -79,13 +84,21 @@ async def create_review(
 
 @router.get("/", response_model=List[ReviewResponse])
 async def list_reviews(
+    response: Response,
     service_id: Optional[int] = Query(None),
     min_rating: Optional[int] = Query(None, ge=1, le=5),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    exact_count: bool = Query(False),
+    db: Session = Depends(get_read_db)
 ):
-    """Get public reviews."""
+    """
+    Get public reviews, newest first.
+    
+    Pagination is returned in headers: X-Next-Cursor, X-Total-Count and
+    X-Total-Estimated (the total is cached unless exact_count is set).
+    """
     query = db.query(Review).filter(Review.is_published == True)
     
     if service_id:
@@ -94,11 +107,16 @@ async def list_reviews(
     if min_rating:
         query = query.filter(Review.overall_rating >= min_rating)
     
-    reviews = query.order_by(Review.created_at.desc()).offset(skip).limit(limit).all()
+    total, exact = await count_total(db, query, "reviews", exact=exact_count)
+    reviews, next_cursor = paginate(
+        query.options(joinedload(Review.customer).load_only(User.first_name, User.last_name)),
+        Review.created_at, Review.id, cursor=cursor, limit=limit, offset=skip
+    )
+    set_page_headers(response, next_cursor, total, exact)
     
     result = []
     for review in reviews:
-        customer = db.query(User).filter(User.id == review.customer_id).first()
+        customer = review.customer
         result.append(ReviewResponse(
             id=review.id,
             booking_id=review.booking_id,
@@ -126,65 +144,13 @@ async def get_review_stats(
     service_id: Optional[int] = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Get aggregate review statistics."""
-    query = db.query(Review).filter(Review.is_published == True)
+    """
+    Get aggregate review statistics, for one service or all.
     
-    if service_id:
-        query = query.join(Booking).filter(Booking.service_id == service_id)
-    
-    total = query.count()
-    
-    if total == 0:
-        return ReviewStats(
-            total_reviews=0,
-            average_rating=0.0,
-            rating_distribution={1: 0, 2: 0, 3: 0, 4: 0, 5: 0},
-            average_cleanliness=None,
-            average_punctuality=None,
-            average_communication=None,
-            average_value=None
-        )
-    
-    # Average ratings
-    avg_overall = db.query(func.avg(Review.overall_rating)).filter(
-        Review.is_published == True
-    ).scalar() or 0
-    
-    avg_cleanliness = db.query(func.avg(Review.cleanliness_rating)).filter(
-        Review.is_published == True,
-        Review.cleanliness_rating.isnot(None)
-    ).scalar()
-    
-    avg_punctuality = db.query(func.avg(Review.punctuality_rating)).filter(
-        Review.is_published == True,
-        Review.punctuality_rating.isnot(None)
-    ).scalar()
-    
-    avg_communication = db.query(func.avg(Review.communication_rating)).filter(
-        Review.is_published == True,
-        Review.communication_rating.isnot(None)
-    ).scalar()
-    
-    avg_value = db.query(func.avg(Review.value_rating)).filter(
-        Review.is_published == True,
-        Review.value_rating.isnot(None)
-    ).scalar()
-    
-    # Rating distribution
-    distribution = {}
-    for rating in range(1, 6):
-        count = query.filter(Review.overall_rating == rating).count()
-        distribution[rating] = count
-    
-    return ReviewStats(
-        total_reviews=total,
-        average_rating=round(float(avg_overall), 1),
-        rating_distribution=distribution,
-        average_cleanliness=round(float(avg_cleanliness), 1) if avg_cleanliness else None,
-        average_punctuality=round(float(avg_punctuality), 1) if avg_punctuality else None,
-        average_communication=round(float(avg_communication), 1) if avg_communication else None,
-        average_value=round(float(avg_value), 1) if avg_value else None
-    )
+    Read from the per-service review summaries, which are updated as
+    reviews are created, published and unpublished.
+    """
+    return ReviewStats(**get_review_summary(db, service_id))
 
 
 # ============ Admin: Review Management ============
@@ -224,7 +190,11 @@ async def toggle_review_publish(
     if not review:
         raise NotFoundException("Review not found")
     
-    review.is_published = publish
+    if review.is_published != publish:
+        review.is_published = publish
+        db.flush()
+        service_id = db.query(Booking.service_id).filter(Booking.id == review.booking_id).scalar()
+        apply_review_change(db, review, service_id, 1 if publish else -1)
     db.commit()
     
     return {"message": f"Review {'published' if publish else 'unpublished'}"}
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from decimal import Decimal
@@ -7,6 +7,7 @@ from app.database import get_db
 from app.api.deps import get_current_user_optional, get_admin_user
 from app.core.exceptions import NotFoundException
 from app.models import ServiceCategory, Service, AddOn, User, DiscountCode
+from app.services.catalog import get_catalog, bump_catalog_version, not_modified
 from app.schemas import (
     ServiceCategoryCreate, ServiceCategoryUpdate, ServiceCategoryResponse,
     ServiceCreate, ServiceUpdate, ServiceResponse, ServiceListResponse,
@@ -20,40 +21,38 @@ router = APIRouter(prefix="/services", tags=["Services"])
 
 
 # ============ Public: Service Discovery ============
+# Served from the in-memory catalog snapshot, with ETag/304 revalidation
 
 @router.get("/categories", response_model=List[ServiceCategoryResponse])
 async def list_categories(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get all active service categories."""
-    categories = db.query(ServiceCategory).filter(
-        ServiceCategory.is_active == True
-    ).order_by(ServiceCategory.display_order).all()
-    return categories
+    catalog = await get_catalog(db)
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
+    return catalog.active_categories()
 
 
 @router.get("/", response_model=List[ServiceListResponse])
 async def list_services(
+    request: Request,
+    response: Response,
     category: Optional[str] = Query(None, description="Filter by category slug"),
     featured: Optional[bool] = Query(None, description="Filter featured services"),
     db: Session = Depends(get_db)
 ):
     """Get all active services with optional filters."""
-    query = db.query(Service).filter(Service.is_active == True)
-    
-    if category:
-        query = query.join(ServiceCategory).filter(
-            ServiceCategory.slug == category
-        )
-    
-    if featured is not None:
-        query = query.filter(Service.is_featured == featured)
-    
-    services = query.order_by(Service.display_order).all()
+    catalog = await get_catalog(db)
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
     
     result = []
-    for service in services:
-        category_name = service.category.name if service.category else None
+    for service in catalog.active_services(category_slug=category, featured=featured):
         result.append(ServiceListResponse(
             id=service.id,
             name=service.name,
@@ -62,7 +61,7 @@ async def list_services(
             icon=service.icon,
             base_price=service.base_price,
             base_duration_hours=service.base_duration_hours,
-            category_name=category_name,
+            category_name=service.category_name,
             is_featured=service.is_featured
         ))
     
@@ -72,25 +71,26 @@ async def list_services(
 @router.get("/{service_id}", response_model=ServiceResponse)
 async def get_service(
     service_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get service details by ID."""
-    service = db.query(Service).filter(
-        Service.id == service_id,
-        Service.is_active == True
-    ).first()
+    catalog = await get_catalog(db)
+    service = catalog.get_service(service_id)
     
     if not service:
         raise NotFoundException("Service not found")
     
-    # Parse features from JSON
-    features = None
-    if service.features:
-        try:
-            features = json.loads(service.features)
-        except (json.JSONDecodeError, ValueError, TypeError):
-            features = []
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
     
+    return _service_response(service)
+
+
+def _service_response(service) -> ServiceResponse:
+    """Build the detail response from a catalog service."""
     return ServiceResponse(
         id=service.id,
         name=service.name,
@@ -109,7 +109,7 @@ async def get_service(
         is_featured=service.is_featured,
         display_order=service.display_order,
         category_id=service.category_id,
-        features=features,
+        features=service.features_list,
         created_at=service.created_at,
         updated_at=service.updated_at
     )
@@ -119,13 +119,16 @@ async def get_service(
 
 @router.get("/add-ons/", response_model=List[AddOnResponse])
 async def list_add_ons(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get all active add-ons."""
-    add_ons = db.query(AddOn).filter(
-        AddOn.is_active == True
-    ).order_by(AddOn.display_order).all()
-    return add_ons
+    catalog = await get_catalog(db)
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
+    return catalog.active_add_ons()
 
 
 # ============ Price Calculation ============
@@ -136,7 +139,8 @@ async def calculate_price(
     db: Session = Depends(get_db)
 ):
     """Calculate total price for a service configuration."""
-    service = db.query(Service).filter(Service.id == data.service_id).first()
+    catalog = await get_catalog(db)
+    service = catalog.get_service(data.service_id, active_only=False)
     if not service:
         raise NotFoundException("Service not found")
     
@@ -149,11 +153,7 @@ async def calculate_price(
     # Add-ons
     add_ons_total = Decimal("0")
     if data.add_on_ids:
-        add_ons = db.query(AddOn).filter(
-            AddOn.id.in_(data.add_on_ids),
-            AddOn.is_active == True
-        ).all()
-        for addon in add_ons:
+        for addon in catalog.active_add_ons(data.add_on_ids):
             add_ons_total += Decimal(str(addon.price))
     
     subtotal = base_price + size_adjustment + bedroom_adjustment + bathroom_adjustment + add_ons_total
@@ -270,6 +270,7 @@ async def create_category(
     db.add(category)
     db.commit()
     db.refresh(category)
+    await bump_catalog_version()
     return category
 
 
@@ -294,6 +295,7 @@ async def update_category(
     
     db.commit()
     db.refresh(category)
+    await bump_catalog_version()
     return category
 
 
@@ -313,9 +315,9 @@ async def create_service(
     service = Service(**service_data)
     db.add(service)
     db.commit()
-    db.refresh(service)
+    await bump_catalog_version()
     
-    return await get_service(service.id, db)
+    return _service_response((await get_catalog(db)).get_service(service.id, active_only=False))
 
 
 @router.put("/{service_id}", response_model=ServiceResponse)
@@ -341,9 +343,9 @@ async def update_service(
         setattr(service, field, value)
     
     db.commit()
-    db.refresh(service)
+    await bump_catalog_version()
     
-    return await get_service(service.id, db)
+    return _service_response((await get_catalog(db)).get_service(service.id, active_only=False))
 
 
 @router.delete("/{service_id}")
@@ -360,6 +362,7 @@ async def delete_service(
     
     service.is_active = False
     db.commit()
+    await bump_catalog_version()
     
     return {"message": "Service deactivated"}
 
@@ -376,6 +379,7 @@ async def create_add_on(
     db.add(addon)
     db.commit()
     db.refresh(addon)
+    await bump_catalog_version()
     return addon
 
 
@@ -398,4 +402,5 @@ async def update_add_on(
     
     db.commit()
     db.refresh(addon)
+    await bump_catalog_version()
     return addon
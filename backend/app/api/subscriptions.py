@@ -8,7 +8,7 @@ Handles:
 - Visit management
 - Admin operations
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import datetime, timezone, timedelta
@@ -36,6 +36,9 @@ from app.schemas.subscription import (
 )
 from app.services.subscription_service import SubscriptionService
 from app.services.calendar_service import CalendarService
+from app.services.catalog import get_catalog, bump_catalog_version, not_modified
+from app.services.pagination import paginate, count_total
+from app.services.read_replicas import get_read_db
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
@@ -112,28 +115,38 @@ def _subscription_to_summary(subscription: Subscription) -> SubscriptionSummary:
 
 @router.get("/plans", response_model=List[SubscriptionPlanResponse])
 async def list_subscription_plans(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     List all active subscription plans.
 
-    Public endpoint - no authentication required.
+    Public endpoint - no authentication required. Served from the catalog
+    snapshot with ETag/304 revalidation.
     """
-    service = SubscriptionService(db)
-    plans = service.get_active_plans()
-    return [SubscriptionPlanResponse.model_validate(p) for p in plans]
+    catalog = await get_catalog(db)
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
+    return [SubscriptionPlanResponse.model_validate(p) for p in catalog.active_plans()]
 
 
 @router.get("/plans/{plan_id}", response_model=SubscriptionPlanResponse)
 async def get_subscription_plan(
     plan_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """Get a specific subscription plan."""
-    service = SubscriptionService(db)
-    plan = service.get_plan_by_id(plan_id)
+    catalog = await get_catalog(db)
+    plan = catalog.get_plan(plan_id)
     if not plan:
         raise HTTPException(status_code=404, detail="Plan not found")
+    cached = not_modified(request, response, catalog)
+    if cached:
+        return cached
     return SubscriptionPlanResponse.model_validate(plan)
 
 
@@ -932,25 +945,32 @@ async def get_subscription_stats(
 @router.get("/admin/all", response_model=SubscriptionListResponse)
 async def list_all_subscriptions(
     status: Optional[SubscriptionStatus] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    exact_count: bool = Query(False),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """List all subscriptions (admin only)."""
+    """List all subscriptions (admin only), newest first."""
     query = db.query(Subscription)
 
     if status:
         query = query.filter(Subscription.status == status)
 
-    total = query.count()
-    subscriptions = query.order_by(
-        Subscription.created_at.desc()
-    ).offset(skip).limit(limit).all()
+    total, exact = await count_total(
+        db, query, "admin_subscriptions", exact=exact_count,
+        table=None if status else Subscription.__table__
+    )
+    subscriptions, next_cursor = paginate(
+        query.options(joinedload(Subscription.plan)), Subscription.created_at, Subscription.id, cursor=cursor, limit=limit, offset=skip
+    )
 
     return SubscriptionListResponse(
         subscriptions=[_subscription_to_summary(s) for s in subscriptions],
-        total=total
+        total=total,
+        total_estimated=not exact,
+        next_cursor=next_cursor
     )
 
 
@@ -1009,6 +1029,7 @@ async def create_subscription_plan(
     db.add(plan)
     db.commit()
     db.refresh(plan)
+    await bump_catalog_version()
     return SubscriptionPlanResponse.model_validate(plan)
 
 
@@ -1030,6 +1051,7 @@ async def update_subscription_plan(
 
     db.commit()
     db.refresh(plan)
+    await bump_catalog_version()
     return SubscriptionPlanResponse.model_validate(plan)
 
 
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
@@ -6,6 +6,8 @@ from app.database import get_db
 from app.api.deps import get_current_user, get_admin_user
 from app.core.exceptions import NotFoundException, ForbiddenException, BadRequestException
 from app.models import User, Address, Booking, UserRole, UserStatus
+from app.services.pagination import paginate, count_total, set_page_headers
+from app.services.read_replicas import get_read_db
 from app.schemas import (
     UserResponse, UserUpdate, UserListResponse,
     AddressCreate, AddressUpdate, AddressResponse
@@ -250,13 +252,21 @@ async def set_default_address(
 
 @router.get("/admin/customers")
 async def list_customers(
+    response: Response,
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    exact_count: bool = Query(False),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Admin: List all customers with booking counts."""
+    """
+    Admin: List all customers with booking counts, newest first.
+    
+    Pagination is returned in headers: X-Next-Cursor, X-Total-Count and
+    X-Total-Estimated (the total is cached unless exact_count is set).
+    """
     query = db.query(User).filter(User.role == UserRole.CUSTOMER)
     
     if search:
@@ -267,14 +277,21 @@ async def list_customers(
             (User.last_name.ilike(search_term))
         )
     
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    total, exact = await count_total(db, query, "admin_customers", exact=exact_count)
+    users, next_cursor = paginate(query, User.created_at, User.id, cursor=cursor, limit=limit, offset=skip)
+    set_page_headers(response, next_cursor, total, exact)
+    
+    # Booking counts for the whole page in one grouped query
+    user_ids = [user.id for user in users]
+    booking_counts = dict(
+        db.query(Booking.customer_id, func.count(Booking.id)).filter(
+            Booking.customer_id.in_(user_ids)
+        ).group_by(Booking.customer_id).all()
+    ) if user_ids else {}
     
-    # Get booking counts and format response
     result = []
     for user in users:
-        booking_count = db.query(Booking).filter(
-            Booking.customer_id == user.id
-        ).count()
+        booking_count = booking_counts.get(user.id, 0)
         
         result.append({
             "id": user.id,
@@ -289,15 +306,23 @@ async def list_customers(
 
 @router.get("/", response_model=List[UserListResponse])
 async def list_users(
+    response: Response,
     role: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
     search: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
+    exact_count: bool = Query(False),
     admin: User = Depends(get_admin_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    """Admin: List all users with filters."""
+    """
+    Admin: List all users with filters, newest first.
+    
+    Pagination is returned in headers: X-Next-Cursor, X-Total-Count and
+    X-Total-Estimated (the total is cached unless exact_count is set).
+    """
     query = db.query(User)
 
     if role:
@@ -320,14 +345,21 @@ async def list_users(
             (User.last_name.ilike(search_term))
         )
     
-    users = query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
+    total, exact = await count_total(db, query, "admin_users", exact=exact_count)
+    users, next_cursor = paginate(query, User.created_at, User.id, cursor=cursor, limit=limit, offset=skip)
+    set_page_headers(response, next_cursor, total, exact)
+    
+    # Booking counts for the whole page in one grouped query
+    user_ids = [user.id for user in users]
+    booking_counts = dict(
+        db.query(Booking.customer_id, func.count(Booking.id)).filter(
+            Booking.customer_id.in_(user_ids)
+        ).group_by(Booking.customer_id).all()
+    ) if user_ids else {}
     
-    # Get booking counts
     result = []
     for user in users:
-        booking_count = db.query(Booking).filter(
-            Booking.customer_id == user.id
-        ).count()
+        booking_count = booking_counts.get(user.id, 0)
         
         user_data = UserListResponse(
             id=user.id,
@@ -3,8 +3,7 @@ Wallet API - Balance, transactions, and top-up
 """
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Optional
 from decimal import Decimal
 from pydantic import BaseModel, Field
@@ -16,6 +15,7 @@ from app.models.user import User
 from app.models.wallet import (
     Wallet, WalletTransaction, TransactionType, TransactionStatus
 )
+from app.services.rollups import get_wallet_totals
 
 router = APIRouter(prefix="/wallet", tags=["wallet"])
 
@@ -334,25 +334,10 @@ def get_wallet_summary(
         .order_by(WalletTransaction.created_at.desc())\
         .limit(5).all()
 
-    # Get monthly stats
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-
-    monthly_credits = db.query(func.sum(WalletTransaction.amount))\
-        .filter(
-            WalletTransaction.wallet_id == wallet.id,
-            WalletTransaction.type.in_([
-                TransactionType.CREDIT, TransactionType.CASHBACK,
-                TransactionType.REFERRAL, TransactionType.TOPUP
-            ]),
-            WalletTransaction.created_at >= thirty_days_ago
-        ).scalar() or 0
-
-    monthly_debits = db.query(func.sum(WalletTransaction.amount))\
-        .filter(
-            WalletTransaction.wallet_id == wallet.id,
-            WalletTransaction.type == TransactionType.DEBIT,
-            WalletTransaction.created_at >= thirty_days_ago
-        ).scalar() or 0
+    # Get monthly stats (daily rollups, plus today's transactions)
+    monthly = get_wallet_totals(db, wallet.id, days=30)
+    monthly_credits = monthly["credits"]
+    monthly_debits = monthly["debits"]
 
     return {
         "balance": float(wallet.balance),
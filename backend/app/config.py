@@ -14,6 +14,10 @@ class Settings(BaseSettings):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
     DB_POOL_SIZE: int = 5
     DB_MAX_OVERFLOW: int = 10
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")  # Defaults to DATABASE_URL with the async driver
+    DATABASE_REPLICA_URLS: str = os.getenv("DATABASE_REPLICA_URLS", "")  # Comma-separated read replicas; empty = primary only
+    REPLICA_MAX_LAG_SECONDS: float = 5.0    # Replicas further behind than this are skipped
+    REPLICA_LAG_CHECK_SECONDS: float = 2.0  # How often each worker re-probes a replica's lag
 
     # JWT - require from environment, no insecure default
     JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "")
@@ -36,6 +40,30 @@ class Settings(BaseSettings):
 
     # Redis (for caching and rate limiting)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    MEMORY_CACHE_MAX_ENTRIES: int = 10000  # In-memory fallback cache size (LRU beyond this)
+    MEMORY_CACHE_SWEEP_SECONDS: int = 30   # Expired-key sweep interval for the fallback cache
+    NEAR_CACHE_ENABLED: bool = True        # Per-process L1 in front of Redis for hot keys
+    NEAR_CACHE_MAX_ENTRIES: int = 2000
+    DASHBOARD_RECONCILE_SECONDS: int = 60  # Recount dashboard counters from the DB this often
+    ROLLUP_REFRESH_SECONDS: int = 300      # Refresh the daily rollup tables this often
+
+    # Allocation queue
+    ALLOCATION_QUEUE_ENABLED: bool = True  # False allocates inline in the booking request
+    ALLOCATION_QUEUE_BACKEND: str = "database"  # "database" (allocation_jobs table) or "memory"
+    ALLOCATION_WORKERS: int = 2
+    ALLOCATION_MAX_ATTEMPTS: int = 5
+    ALLOCATION_RETRY_BASE_SECONDS: int = 30
+    ALLOCATION_RETRY_MAX_SECONDS: int = 900
+
+    # Event loop monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.25  # How often the lag sampler wakes up
+    LOOP_MONITOR_DEBUG: bool = False         # Capture the stack of whatever blocks the loop (watchdog thread)
+    LOOP_BLOCK_THRESHOLD_MS: int = 100       # Blocks longer than this are reported in debug mode
+
+    # Query instrumentation
+    QUERY_STATS_ENABLED: bool = True         # Per-request query counts (X-DB-* headers in DEBUG, metrics always)
+    QUERY_REPEAT_THRESHOLD: int = 5          # A statement run more often than this in one request is an N+1 suspect
 
     # CORS - default to localhost for security, configure via environment
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS", "http://localhost:3000")
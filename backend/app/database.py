@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
@@ -17,6 +19,40 @@ engine = create_engine(
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_database_url(url: str) -> str:
+    """DATABASE_URL with its async driver (asyncpg for PostgreSQL, aiosqlite for SQLite)."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+        # asyncpg takes "ssl" rather than libpq's "sslmode"
+        if "sslmode" in parsed.query:
+            parsed = parsed.update_query_dict({"ssl": parsed.query["sslmode"]})
+            parsed = parsed.difference_update_query(["sslmode"])
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine for async routes: queries are awaited instead of blocking
+# the event loop. Same database, separate connection pool.
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=True,
+    echo=settings.DEBUG
+)
+
+# Objects stay loaded after commit; refreshing them would need an await
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
@@ -30,6 +66,26 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for async FastAPI routes to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_db(db, fn, *args, **kwargs):
+    """
+    Call fn(session, *args, **kwargs) with a synchronous Session.
+
+    With an AsyncSession, fn runs through run_sync: its queries (and lazy
+    loads) are awaited on the async connection, so existing synchronous
+    query code can be shared by sync and async callers without blocking
+    the event loop. With a Session, fn is simply called.
+    """
+    if isinstance(db, AsyncSession):
+        return await db.run_sync(fn, *args, **kwargs)
+    return fn(db, *args, **kwargs)
+
+
 @contextmanager
 def get_db_context():
     """Context manager for non-route database operations."""
@@ -1 +1,3 @@
 from app.middleware.rate_limiter import RateLimiter, RateLimitMiddleware, rate_limiter
+from app.middleware.loop_monitor import LoopMonitorMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
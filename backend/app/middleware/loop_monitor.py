@@ -0,0 +1,25 @@
+"""
+Loop Monitor Middleware
+
+Labels each request with "METHOD /path" so event loop blocks found by the
+loop lag monitor (debug mode) are reported against the endpoint.
+"""
+from app.services.loop_monitor import operation_label
+
+
+class LoopMonitorMiddleware:
+    """
+    Pure ASGI middleware (no extra task per request, unlike BaseHTTPMiddleware).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        label = f"{scope.get('method', 'WS')} {scope['path']}"
+        with operation_label(label):
+            await self.app(scope, receive, send)
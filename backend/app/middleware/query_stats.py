@@ -0,0 +1,53 @@
+"""
+Query Stats Middleware
+
+Records the SQL statements each request runs (see app.services.query_stats).
+In DEBUG, adds response headers:
+- X-DB-Query-Count: statements executed
+- X-DB-Time-Ms: time spent in the database
+- X-DB-Repeated: N+1 suspects as "<fingerprint>x<count>", most repeated first
+"""
+import logging
+
+from app.config import settings
+from app.services.query_stats import track_queries, fingerprint_id, query_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware, so the stats context covers the whole request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            async def send_with_stats(message):
+                if message["type"] == "http.response.start" and settings.DEBUG:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-query-count", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.time_ms:.1f}".encode()))
+                    repeated = stats.repeated()
+                    if repeated:
+                        value = ",".join(f"{fingerprint_id(fp)}x{n}" for fp, n in repeated[:5])
+                        headers.append((b"x-db-repeated", value.encode()))
+                    message["headers"] = headers
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        # Route template (e.g. /api/bookings/{booking_id}) set by FastAPI's router
+        route = getattr(scope.get("route"), "path", None) or "unmatched"
+        route = f"{scope['method']} {route}"
+
+        if settings.DEBUG and stats.repeated():
+            logger.warning(f"Possible N+1 in {route}: {stats.describe()}")
+
+        await query_metrics.record_request(route, stats)
@@ -0,0 +1,70 @@
+"""
+Add composite and partial indexes for the hot booking queries
+
+- ix_bookings_employee_schedule_active: cleaner conflict checks and busy
+  intervals (assigned_employee_id + scheduled_date, live statuses only)
+- ix_bookings_sla_open: SLA monitor (status + sla_deadline, assigned and
+  in-progress jobs only)
+- ix_bookings_unpaid_created: payment timeout (created_at, unpaid pending
+  bookings only)
+- ix_bookings_customer_created: customer booking list (customer_id +
+  created_at)
+
+The index definitions live on the Booking model, so the partial-index
+predicates render the status enum exactly as queries do. On PostgreSQL the
+indexes are built CONCURRENTLY so bookings stay writable meanwhile.
+
+Run with: python -m app.migrations.add_booking_hot_path_indexes
+Verify with: python check_booking_indexes.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from app.database import engine
+from app.models import Booking
+
+HOT_PATH_INDEXES = [
+    "ix_bookings_employee_schedule_active",
+    "ix_bookings_sla_open",
+    "ix_bookings_unpaid_created",
+    "ix_bookings_customer_created",
+]
+
+
+def run_migration():
+    """Execute the migration."""
+    print("Starting booking hot path index migration...")
+    indexes = {index.name: index for index in Booking.__table__.indexes}
+
+    for name in HOT_PATH_INDEXES:
+        index = indexes[name]
+        try:
+            if engine.dialect.name == "postgresql":
+                ddl = str(CreateIndex(index, if_not_exists=True).compile(
+                    dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+                )).replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                # CONCURRENTLY cannot run inside a transaction block
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.execute(text(ddl))
+            else:
+                index.create(bind=engine, checkfirst=True)
+            print(f"✅ {name}")
+        except Exception as e:
+            # A failed concurrent build leaves an INVALID index; drop it and rerun
+            print(f"⚠️ Error creating {name}: {e}")
+
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE bookings"))
+        print("✅ Analyzed bookings")
+    except Exception as e:
+        print(f"⚠️ Could not analyze bookings: {e}")
+
+    print("Migration complete")
+
+
+if __name__ == "__main__":
+    run_migration()
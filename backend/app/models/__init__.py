@@ -2,7 +2,7 @@ from app.models.user import User, Address, RefreshToken, UserRole, UserStatus
 from app.models.service import ServiceCategory, Service, AddOn, booking_add_ons
 from app.models.booking import Booking, BookingStatus, BookingStatusHistory, TimeSlot, PaymentStatus, BookingType
 from app.models.payment import Payment, Refund, Invoice, DiscountCode, PaymentMethod, RefundStatus, ProcessedWebhookEvent
-from app.models.review import Review, ContactMessage, AuditLog, Notification
+from app.models.review import Review, ReviewSummary, ContactMessage, AuditLog, Notification
 from app.models.cleaner import CleanerProfile, CleanerStatus
 from app.models.employee import (
     Employee, OTPRequest, EmployeeRefreshToken, EmployeeIDSequence,
@@ -17,6 +17,8 @@ from app.models.wallet import (
     Wallet, WalletTransaction, Referral, ReferralCode, Promotion, PromotionUsage,
     TransactionType, TransactionStatus, ReferralStatus
 )
+from app.models.allocation import AllocationJob, AllocationJobStatus
+from app.models.rollup import BookingDailyRollup, CustomerDailyRollup, WalletDailyRollup
 
 __all__ = [
     # User
@@ -33,7 +35,7 @@ __all__ = [
     # Payment
     "Payment", "Refund", "Invoice", "DiscountCode", "PaymentMethod", "RefundStatus", "ProcessedWebhookEvent",
     # Review & Misc
-    "Review", "ContactMessage", "AuditLog", "Notification",
+    "Review", "ReviewSummary", "ContactMessage", "AuditLog", "Notification",
     # Subscription
     "SubscriptionPlan", "Subscription", "SubscriptionVisit",
     "SubscriptionBilling", "SubscriptionPlanChange",
@@ -41,6 +43,10 @@ __all__ = [
     # Wallet & Referral
     "Wallet", "WalletTransaction", "Referral", "ReferralCode", "Promotion", "PromotionUsage",
     "TransactionType", "TransactionStatus", "ReferralStatus",
+    # Allocation
+    "AllocationJob", "AllocationJobStatus",
+    # Rollups
+    "BookingDailyRollup", "CustomerDailyRollup", "WalletDailyRollup",
 ]
 
 
@@ -0,0 +1,52 @@
+"""
+Allocation Job Model
+
+Durable queue of bookings waiting for cleaner allocation. Rows are
+claimed by allocation workers with FOR UPDATE SKIP LOCKED, retried with
+backoff on failure and dead-lettered after too many attempts.
+"""
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Numeric, Index, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+import enum
+
+from app.database import Base
+
+
+class AllocationJobStatus(str, enum.Enum):
+    """Allocation job lifecycle."""
+    QUEUED = "queued"      # Waiting to be picked up (or waiting for its retry time)
+    RUNNING = "running"    # Claimed by a worker
+    DONE = "done"          # Booking assigned, or no longer needs a cleaner
+    DEAD = "dead"          # Gave up after max_attempts, needs manual assignment
+
+
+class AllocationJob(Base):
+    __tablename__ = "allocation_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
+    region_code = Column(String(10), nullable=False)
+    duration_hours = Column(Numeric(4, 2), nullable=False, default=2.5)
+
+    status = Column(SQLEnum(AllocationJobStatus), default=AllocationJobStatus.QUEUED, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    max_attempts = Column(Integer, default=5, nullable=False)
+    available_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)  # Next run time
+
+    # Worker lease
+    locked_by = Column(String(100), nullable=True)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+
+    # Outcome
+    assigned_employee_id = Column(UUID(as_uuid=True), ForeignKey("employees.id"), nullable=True)
+    last_error = Column(Text, nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Claim query: ready jobs per region, oldest first
+        Index("ix_allocation_jobs_claim", "status", "region_code", "available_at"),
+    )
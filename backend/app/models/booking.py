@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric, Text, ForeignKey, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric, Text, ForeignKey, Enum as SQLEnum, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -117,6 +117,32 @@ class Booking(Base):
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Composite/partial indexes for the hot access patterns. Existing databases
+    # get them from app/migrations/add_booking_hot_path_indexes.py;
+    # check_booking_indexes.py verifies the queries use them.
+    __table_args__ = (
+        # Cleaner conflict checks / busy intervals: one cleaner's live bookings by time
+        Index(
+            "ix_bookings_employee_schedule_active", assigned_employee_id, scheduled_date,
+            postgresql_where=status.notin_([BookingStatus.CANCELLED, BookingStatus.NO_SHOW]),
+            sqlite_where=status.notin_([BookingStatus.CANCELLED, BookingStatus.NO_SHOW])
+        ),
+        # SLA monitor: assigned / in-progress jobs by deadline
+        Index(
+            "ix_bookings_sla_open", status, sla_deadline,
+            postgresql_where=status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS]),
+            sqlite_where=status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS])
+        ),
+        # Payment timeout: unpaid pending bookings by age
+        Index(
+            "ix_bookings_unpaid_created", created_at,
+            postgresql_where=(status == BookingStatus.PENDING) & (payment_status == PaymentStatus.PENDING),
+            sqlite_where=(status == BookingStatus.PENDING) & (payment_status == PaymentStatus.PENDING)
+        ),
+        # Customer booking list, newest first
+        Index("ix_bookings_customer_created", customer_id, created_at),
+    )
     
     # Relationships
     customer = relationship("User", back_populates="bookings", foreign_keys=[customer_id])
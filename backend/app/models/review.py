@@ -50,6 +50,38 @@ class Review(Base):
     customer = relationship("User", back_populates="reviews", foreign_keys=[customer_id])
 
 
+class ReviewSummary(Base):
+    """
+    Published-review aggregate per service, kept up to date incrementally
+    (app/services/review_summary.py) so review stats read one row instead
+    of scanning reviews. Only sums and counts are stored, so services add
+    up to the all-services totals.
+    """
+    __tablename__ = "review_summaries"
+    
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True)
+    
+    review_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)  # Sum of overall_rating
+    rating_1 = Column(Integer, nullable=False, default=0)    # Reviews per overall rating
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+    
+    # Aspect ratings are optional: sum and number of reviews that gave one
+    cleanliness_sum = Column(Integer, nullable=False, default=0)
+    cleanliness_count = Column(Integer, nullable=False, default=0)
+    punctuality_sum = Column(Integer, nullable=False, default=0)
+    punctuality_count = Column(Integer, nullable=False, default=0)
+    communication_sum = Column(Integer, nullable=False, default=0)
+    communication_count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Integer, nullable=False, default=0)
+    value_count = Column(Integer, nullable=False, default=0)
+    
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
 class ContactMessage(Base):
     __tablename__ = "contact_messages"
     
@@ -0,0 +1,75 @@
+"""
+Daily Rollup Models
+
+Per-day aggregates maintained by the rollup job (app/services/rollups.py)
+so admin statistics read a few rows per day instead of scanning bookings,
+subscriptions and wallet transactions.
+
+- BookingDailyRollup: bookings created per day by region, service, status
+  and payment status, with their revenue
+- CustomerDailyRollup: one row per day; new customers and subscription
+  flows (new/cancelled), plus an end-of-day snapshot of active and paused
+  subscriptions and MRR
+- WalletDailyRollup: credits and debits per wallet per day (closed days only)
+"""
+from sqlalchemy import Column, Integer, String, Date, DateTime, Numeric, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.database import Base
+
+
+class BookingDailyRollup(Base):
+    __tablename__ = "booking_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)  # UTC date the bookings were created
+    region_code = Column(String(10), nullable=False, default="")  # "" = region unknown
+    service_id = Column(Integer, nullable=False)
+    status = Column(String(30), nullable=False)  # Current status of the bookings
+    payment_status = Column(String(30), nullable=False)
+
+    bookings = Column(Integer, nullable=False, default=0)
+    revenue = Column(Numeric(14, 2), nullable=False, default=0)  # Sum of total_price
+
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("day", "region_code", "service_id", "status", "payment_status",
+                         name="uq_booking_daily_rollup"),
+    )
+
+
+class CustomerDailyRollup(Base):
+    __tablename__ = "customer_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+
+    # Flows: things that happened on this day
+    new_customers = Column(Integer, nullable=False, default=0)
+    subscriptions_new = Column(Integer, nullable=False, default=0)
+    subscriptions_cancelled = Column(Integer, nullable=False, default=0)
+
+    # Snapshot at the end of the day (backfilled days: reconstructed from
+    # created/cancelled dates, paused unknown)
+    subscriptions_active = Column(Integer, nullable=False, default=0)
+    subscriptions_paused = Column(Integer, nullable=False, default=0)
+    mrr = Column(Numeric(14, 2), nullable=False, default=0)
+    visits_used = Column(Integer, nullable=False, default=0)  # Across active subscriptions
+
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class WalletDailyRollup(Base):
+    __tablename__ = "wallet_daily_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    wallet_id = Column(Integer, ForeignKey("wallets.id", ondelete="CASCADE"), nullable=False)
+
+    credits = Column(Numeric(14, 2), nullable=False, default=0)  # Credit, cashback, referral, top-up
+    debits = Column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("wallet_id", "day", name="uq_wallet_daily_rollup"),
+        Index("ix_wallet_daily_rollups_day", "day"),
+    )
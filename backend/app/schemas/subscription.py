@@ -249,6 +249,8 @@ class SubscriptionSummary(BaseModel):
 class SubscriptionListResponse(BaseModel):
     subscriptions: List[SubscriptionSummary]
     total: int
+    total_estimated: bool = False  # Cached or estimated total unless exact_count was requested
+    next_cursor: Optional[str] = None
 
 
 # ============ Calendar & Visit Scheduling ============
@@ -3,10 +3,10 @@ Enhanced Allocation Engine
 
 Real-time cleaner allocation with:
 1. Redis-based queue management (with in-memory fallback)
-2. Haversine distance calculation
+2. Vectorised Haversine distance and scoring (live cleaner coordinates when reported)
 3. Rating-based scoring
 4. Configurable timeout with fallback
-5. Allocation metrics tracking
+5. Allocation metrics tracking (atomic counters and latency histograms)
 
 Scoring Formula:
     Score = (queue_weight × queue_score) +
@@ -19,23 +19,37 @@ import asyncio
 import logging
 import math
 from datetime import datetime, timezone, timedelta
-from decimal import Decimal
 from typing import Optional, List, Dict, Tuple, Any
 from dataclasses import dataclass
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, and_
 
-from app.models.employee import Employee, EmployeeAccountStatus, EmployeeCleanerStatus
+from app.models.employee import Employee, EmployeeAccountStatus
 from app.models.booking import Booking, BookingStatus
-from app.models import Address
 from app.services.cache import cache_service
 from app.services.cleaner_assignment import (
-    get_region_from_city, has_time_conflict, CITY_REGION_MAP
+    get_address_region, has_time_conflict,
+    get_cleaner_busy_intervals, intervals_overlap
+)
+from app.services.cleaner_location import get_cleaner_locations
+from app.services.allocation_locks import (
+    lock_unassigned_booking, try_lock_cleaner, claim_pending_bookings
+)
+from app.services.spatial_index import spatial_index
+from app.services.scoring_kernel import score_candidates, MISSING_QUEUE_POSITION
+from app.services import allocation_metrics
+from app.services.allocation_metrics import (
+    TIER_SAME_REGION, TIER_NEARBY, TIER_ADJACENT_REGION, TIER_ANY_REGION
 )
 
 logger = logging.getLogger(__name__)
 
 
+class BookingClaimedError(Exception):
+    """Booking was assigned or is being allocated by another worker."""
+    pass
+
+
 @dataclass
 class AllocationConfig:
     """Configuration for allocation algorithm."""
@@ -53,6 +67,7 @@ class AllocationConfig:
     status_ttl_seconds: int = 300  # 5 minutes
 
     # Fallback settings
+    nearby_radius_km: float = 15.0  # Cleaners reported this close are tried before adjacent regions
     expand_to_adjacent_regions: bool = True
     fallback_to_any_region: bool = True
 
@@ -78,6 +93,8 @@ class AllocationResult:
     allocation_time_ms: float = 0
     fallback_used: bool = False
     region_expanded: bool = False
+    booking_claimed: bool = False  # Another worker assigned or holds the booking
+    fallback_tier: Optional[str] = None  # Tier the candidates came from (allocation_metrics.TIER_*)
     failure_reason: Optional[str] = None
 
 
@@ -116,7 +133,6 @@ class AllocationEngine:
         # Redis key prefixes
         self._queue_key = "cleaner:queue:{region}"
         self._status_key = "cleaner:status:{cleaner_id}"
-        self._metrics_key = "allocation:metrics:{date}"
 
     async def allocate_cleaner(
         self,
@@ -157,8 +173,21 @@ class AllocationEngine:
 
         region_expanded = False
         fallback_used = False
+        tier = TIER_SAME_REGION
+
+        # If no candidates, try cleaners currently near the booking (any region)
+        if not candidates and booking_coords and self.config.nearby_radius_km > 0:
+            candidates = await self._get_nearby_candidates(
+                booking_coords=booking_coords,
+                scheduled_date=booking.scheduled_date,
+                duration_hours=duration_hours,
+                exclude_booking_id=booking.id
+            )
+            if candidates:
+                region_expanded = True
+                tier = TIER_NEARBY
 
-        # If no candidates, try adjacent regions
+        # If still no candidates, try adjacent regions
         if not candidates and self.config.expand_to_adjacent_regions:
             adjacent = ADJACENT_REGIONS.get(region_code, [])
             for adj_region in adjacent:
@@ -172,6 +201,7 @@ class AllocationEngine:
                 candidates.extend(adj_candidates)
             if candidates:
                 region_expanded = True
+                tier = TIER_ADJACENT_REGION
 
         # Final fallback: any region
         if not candidates and self.config.fallback_to_any_region:
@@ -183,10 +213,11 @@ class AllocationEngine:
             )
             if candidates:
                 fallback_used = True
+                tier = TIER_ANY_REGION
 
         if not candidates:
             elapsed = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
-            await self._record_allocation_failure(region_code)
+            await self._record_allocation_failure(region_code, elapsed, 0)
             return AllocationResult(
                 success=False,
                 candidates_evaluated=0,
@@ -205,7 +236,7 @@ class AllocationEngine:
             candidates_tried += 1
             try:
                 assigned = await asyncio.wait_for(
-                    self._attempt_assignment(candidate.employee, booking),
+                    self._attempt_assignment(candidate.employee, booking, duration_hours),
                     timeout=self.config.assignment_timeout_seconds
                 )
                 if assigned:
@@ -215,13 +246,22 @@ class AllocationEngine:
                     f"Assignment timeout for cleaner {candidate.employee.id}, trying next"
                 )
                 continue
+            except BookingClaimedError:
+                # Another worker owns this booking, nothing left to do here
+                return AllocationResult(
+                    success=False,
+                    candidates_evaluated=candidates_tried,
+                    allocation_time_ms=(datetime.now(timezone.utc) - start_time).total_seconds() * 1000,
+                    booking_claimed=True,
+                    failure_reason="Booking is assigned or being allocated by another worker"
+                )
 
         elapsed = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
 
         if assigned:
             # Update queue position (move to back)
             await self._update_queue_after_assignment(assigned, region_code)
-            await self._record_allocation_success(region_code, elapsed)
+            await self._record_allocation_success(region_code, elapsed, candidates_tried, tier)
 
             return AllocationResult(
                 success=True,
@@ -229,31 +269,33 @@ class AllocationEngine:
                 candidates_evaluated=candidates_tried,
                 allocation_time_ms=elapsed,
                 fallback_used=fallback_used,
-                region_expanded=region_expanded
+                region_expanded=region_expanded,
+                fallback_tier=tier
             )
 
-        await self._record_allocation_failure(region_code)
+        await self._record_allocation_failure(region_code, elapsed, candidates_tried)
         return AllocationResult(
             success=False,
             candidates_evaluated=candidates_tried,
             allocation_time_ms=elapsed,
             fallback_used=fallback_used,
             region_expanded=region_expanded,
+            fallback_tier=tier,
             failure_reason="All candidates rejected or timed out"
         )
 
     def _get_booking_region(self, booking: Booking) -> Optional[str]:
         """Extract region code from booking address."""
-        if not booking.address or not booking.address.city:
-            return None
-        return get_region_from_city(booking.address.city)
+        return get_address_region(booking.address)
 
     def _get_booking_coordinates(self, booking: Booking) -> Optional[Tuple[float, float]]:
         """Get coordinates for the booking address."""
         # First try address coordinates if stored
         if booking.address:
-            # For now, use region center as fallback
-            region = get_region_from_city(booking.address.city) if booking.address.city else None
+            if booking.address.latitude is not None and booking.address.longitude is not None:
+                return (float(booking.address.latitude), float(booking.address.longitude))
+            # Otherwise use region center as fallback
+            region = get_address_region(booking.address)
             if region and region in REGION_COORDINATES:
                 return REGION_COORDINATES[region]
         return None
@@ -275,29 +317,50 @@ class AllocationEngine:
             Employee.region_code == region_code
         ).all()
 
-        candidates = []
+        available = self._filter_available(
+            cleaners,
+            scheduled_date,
+            duration_hours,
+            exclude_booking_id,
+            cleaner_ids=[cleaner.id for cleaner in cleaners]
+        )
+        if not available:
+            return []
+
         queue_positions = await self._get_queue_positions(region_code)
+        cleaner_coords = await get_cleaner_locations(cleaner.id for cleaner in available)
 
-        for cleaner in cleaners:
-            # Check time conflicts
-            if has_time_conflict(
-                cleaner.id,
-                scheduled_date,
-                duration_hours,
-                self.db,
-                exclude_booking_id
-            ):
-                continue
+        return self._score_candidates(available, queue_positions, booking_coords, cleaner_coords)
 
-            # Calculate scores
-            candidate = self._calculate_candidate_scores(
-                cleaner,
-                queue_positions,
-                booking_coords
-            )
-            candidates.append(candidate)
+    async def _get_nearby_candidates(
+        self,
+        booking_coords: Tuple[float, float],
+        scheduled_date: datetime,
+        duration_hours: float,
+        exclude_booking_id: Optional[int] = None
+    ) -> List[CleanerCandidate]:
+        """Get candidates whose live position is within nearby_radius_km of the booking."""
+        await spatial_index.sync_cleaners()
+        nearby = spatial_index.cleaners_within(
+            booking_coords[0], booking_coords[1], self.config.nearby_radius_km
+        )
+        if not nearby:
+            return []
 
-        return candidates
+        nearby_ids = [employee_id for employee_id, _ in nearby]
+        cleaners = self.db.query(Employee).filter(
+            Employee.account_status == EmployeeAccountStatus.ACTIVE,
+            Employee.id.in_(nearby_ids)
+        ).all()
+
+        available = self._filter_available(
+            cleaners,
+            scheduled_date,
+            duration_hours,
+            exclude_booking_id,
+            cleaner_ids=[cleaner.id for cleaner in cleaners]
+        )
+        return await self._score_by_region(available, booking_coords)
 
     async def _get_all_available_candidates(
         self,
@@ -311,184 +374,242 @@ class AllocationEngine:
             Employee.account_status == EmployeeAccountStatus.ACTIVE
         ).all()
 
-        candidates = []
+        # Every active cleaner is a candidate, so skip the IN (...) list
+        available = self._filter_available(
+            cleaners,
+            scheduled_date,
+            duration_hours,
+            exclude_booking_id
+        )
 
-        for cleaner in cleaners:
-            if has_time_conflict(
-                cleaner.id,
-                scheduled_date,
-                duration_hours,
-                self.db,
-                exclude_booking_id
-            ):
-                continue
+        return await self._score_by_region(available, booking_coords)
+
+    async def _score_by_region(
+        self,
+        available: List[Employee],
+        booking_coords: Optional[Tuple[float, float]]
+    ) -> List[CleanerCandidate]:
+        """Score cleaners from several regions, each against its own queue."""
+        if not available:
+            return []
 
-            # Get queue positions for cleaner's region
-            queue_positions = await self._get_queue_positions(cleaner.region_code)
-            candidate = self._calculate_candidate_scores(
-                cleaner,
-                queue_positions,
-                booking_coords
+        # Queue scores are relative to each region's queue, so score per region
+        by_region: Dict[str, List[Employee]] = {}
+        for cleaner in available:
+            by_region.setdefault(cleaner.region_code, []).append(cleaner)
+
+        cleaner_coords = await get_cleaner_locations(cleaner.id for cleaner in available)
+        queue_positions = await self._get_queue_positions_many(list(by_region))
+
+        candidates = []
+        for region, region_cleaners in by_region.items():
+            candidates.extend(
+                self._score_candidates(region_cleaners, queue_positions[region], booking_coords, cleaner_coords)
             )
-            candidates.append(candidate)
 
         return candidates
 
-    def _calculate_candidate_scores(
+    def _filter_available(
         self,
-        cleaner: Employee,
-        queue_positions: Dict[str, int],
-        booking_coords: Optional[Tuple[float, float]]
-    ) -> CleanerCandidate:
-        """Calculate all scoring components for a candidate."""
-        # Queue score (lower position = higher score)
-        queue_pos = queue_positions.get(str(cleaner.id), 999)
-        max_pos = max(queue_positions.values()) if queue_positions else 1
-        queue_score = 1.0 - (queue_pos / (max_pos + 1)) if max_pos > 0 else 0.5
-
-        # Distance score
-        distance_km = None
-        distance_score = 0.5  # Default middle score if no coords
-
-        if booking_coords and cleaner.region_code in REGION_COORDINATES:
-            cleaner_coords = REGION_COORDINATES[cleaner.region_code]
-            distance_km = self._haversine_distance(booking_coords, cleaner_coords)
-            # Normalize: 0km = 1.0 score, 50km+ = 0.0 score
-            distance_score = max(0, 1.0 - (distance_km / 50.0))
-
-        # Rating score (0-5 normalized to 0-1)
-        rating = float(cleaner.rating or 4.0)  # Default to 4.0 if no rating
-        rating_score = rating / 5.0
-
-        # Calculate total weighted score
-        total_score = (
-            self.config.queue_weight * queue_score +
-            self.config.distance_weight * distance_score +
-            self.config.rating_weight * rating_score
-        )
+        cleaners: List[Employee],
+        scheduled_date: datetime,
+        duration_hours: float,
+        exclude_booking_id: Optional[int] = None,
+        cleaner_ids: Optional[List[Any]] = None
+    ) -> List[Employee]:
+        """
+        Drop cleaners with a time conflict using a single availability snapshot.
 
-        return CleanerCandidate(
-            employee=cleaner,
-            queue_score=queue_score,
-            distance_score=distance_score,
-            rating_score=rating_score,
-            total_score=total_score,
-            distance_km=distance_km,
-            queue_position=queue_pos
+        All overlapping bookings for the slot are loaded in one windowed query
+        and checked in memory, instead of one has_time_conflict query per cleaner.
+        """
+        if not cleaners:
+            return []
+
+        slot_start = scheduled_date
+        slot_end = scheduled_date + timedelta(hours=duration_hours)
+
+        busy_intervals = get_cleaner_busy_intervals(
+            slot_start,
+            slot_end,
+            self.db,
+            cleaner_ids=cleaner_ids,
+            exclude_booking_id=exclude_booking_id
         )
 
-    def _haversine_distance(
+        return [
+            cleaner for cleaner in cleaners
+            if not intervals_overlap(busy_intervals.get(cleaner.id, []), slot_start, slot_end)
+        ]
+
+    def _score_candidates(
         self,
-        coord1: Tuple[float, float],
-        coord2: Tuple[float, float]
-    ) -> float:
+        cleaners: List[Employee],
+        queue_positions: Dict[str, int],
+        booking_coords: Optional[Tuple[float, float]],
+        cleaner_coords: Optional[Dict[str, Tuple[float, float]]] = None
+    ) -> List[CleanerCandidate]:
         """
-        Calculate distance between two coordinates using Haversine formula.
-
-        Args:
-            coord1: (latitude, longitude) of first point
-            coord2: (latitude, longitude) of second point
+        Calculate all scoring components for a batch of candidates.
 
-        Returns:
-            Distance in kilometers
+        Cleaner positions come from live coordinates when reported, otherwise
+        the centre of their region. Scoring runs in one vectorised pass.
         """
-        R = 6371  # Earth's radius in kilometers
+        if not cleaners:
+            return []
 
-        lat1, lon1 = math.radians(coord1[0]), math.radians(coord1[1])
-        lat2, lon2 = math.radians(coord2[0]), math.radians(coord2[1])
+        cleaner_coords = cleaner_coords or {}
+        nan = float("nan")
 
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        latitudes, longitudes, positions, ratings = [], [], [], []
+        for cleaner in cleaners:
+            cleaner_id = str(cleaner.id)
+            coords = cleaner_coords.get(cleaner_id) or REGION_COORDINATES.get(cleaner.region_code)
+            latitudes.append(coords[0] if coords else nan)
+            longitudes.append(coords[1] if coords else nan)
+            positions.append(queue_positions.get(cleaner_id, MISSING_QUEUE_POSITION))
+            ratings.append(float(cleaner.rating) if cleaner.rating else nan)
+
+        scores = score_candidates(
+            latitudes,
+            longitudes,
+            positions,
+            ratings,
+            booking_coords,
+            max_queue_position=max(queue_positions.values()) if queue_positions else 1,
+            queue_weight=self.config.queue_weight,
+            distance_weight=self.config.distance_weight,
+            rating_weight=self.config.rating_weight
+        )
 
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
+        candidates = []
+        for i, cleaner in enumerate(cleaners):
+            distance_km = float(scores.distance_km[i])
+            candidates.append(CleanerCandidate(
+                employee=cleaner,
+                queue_score=float(scores.queue_score[i]),
+                distance_score=float(scores.distance_score[i]),
+                rating_score=float(scores.rating_score[i]),
+                total_score=float(scores.total_score[i]),
+                distance_km=None if math.isnan(distance_km) else distance_km,
+                queue_position=positions[i]
+            ))
 
-        return R * c
+        return candidates
 
     async def _get_queue_positions(self, region_code: str) -> Dict[str, int]:
         """
         Get queue positions for all cleaners in a region.
-        Uses Redis sorted set if available, otherwise in-memory calculation.
+
+        The queue is a sorted set per region scored by each cleaner's last
+        completion or assignment time (oldest first = front of queue). It is
+        built once from the database and then updated in place.
         """
-        cache_key = self._queue_key.format(region=region_code)
+        return (await self._get_queue_positions_many([region_code]))[region_code]
+
+    async def _get_queue_positions_many(self, region_codes: List[str]) -> Dict[str, Dict[str, int]]:
+        """Queue positions for several regions, read in one cache round trip."""
+        cache_keys = [self._queue_key.format(region=region) for region in region_codes]
 
-        # Try Redis first
         try:
-            cached = await cache_service.get(cache_key)
-            if cached:
-                import json
-                return json.loads(cached)
+            queues = await cache_service.zrange_many(cache_keys, withscores=True)
         except Exception:
-            pass
+            # Missing cache or a stale non-sorted-set value under one of the keys
+            queues = [None] * len(region_codes)
+
+        positions = {}
+        for region_code, cache_key, entries in zip(region_codes, cache_keys, queues):
+            if not entries:
+                # One rebuild per region at a time; concurrent allocations
+                # (in any worker) wait for it instead of repeating the query
+                async def reread(cache_key=cache_key):
+                    try:
+                        return await cache_service.client.zrange(cache_key, 0, -1, withscores=True) or None
+                    except Exception:
+                        return None
+
+                entries = await cache_service.single_flight(
+                    cache_key, lambda region_code=region_code: self._rebuild_queue(region_code), reread
+                )
 
-        # Fallback: calculate from recent job completions
-        return await self._calculate_queue_positions(region_code)
+            positions[region_code] = {str(member): pos + 1 for pos, (member, _) in enumerate(entries)}
 
-    async def _calculate_queue_positions(self, region_code: str) -> Dict[str, int]:
+        return positions
+
+    async def _rebuild_queue(self, region_code: str) -> List[Tuple[str, float]]:
         """
-        Calculate queue positions based on last job completion time.
+        Rebuild a region's queue from each cleaner's last completed job.
         Cleaners who completed jobs earlier are at the front of the queue.
         """
-        from sqlalchemy import desc
-
-        # Get last completion time for each cleaner in region
-        cleaners = self.db.query(Employee).filter(
+        last_completed = self.db.query(
+            Employee.id,
+            func.max(Booking.actual_end_time)
+        ).outerjoin(
+            Booking,
+            and_(
+                Booking.assigned_employee_id == Employee.id,
+                Booking.status == BookingStatus.COMPLETED
+            )
+        ).filter(
             Employee.account_status == EmployeeAccountStatus.ACTIVE,
             Employee.region_code == region_code
-        ).all()
-
-        cleaner_times = []
-        for cleaner in cleaners:
-            # Get most recent completed job
-            last_job = self.db.query(Booking).filter(
-                Booking.assigned_employee_id == cleaner.id,
-                Booking.status == BookingStatus.COMPLETED,
-                Booking.actual_end_time != None
-            ).order_by(desc(Booking.actual_end_time)).first()
-
-            if last_job and last_job.actual_end_time:
-                cleaner_times.append((str(cleaner.id), last_job.actual_end_time))
-            else:
-                # No recent jobs = front of queue
-                cleaner_times.append((str(cleaner.id), datetime.min.replace(tzinfo=timezone.utc)))
+        ).group_by(Employee.id).all()
 
-        # Sort by completion time (oldest first = front of queue)
-        cleaner_times.sort(key=lambda x: x[1])
-
-        # Assign positions (1-indexed)
-        positions = {cid: pos + 1 for pos, (cid, _) in enumerate(cleaner_times)}
+        # No recent jobs = front of queue
+        scores = {
+            str(employee_id): last_end.timestamp() if last_end else 0.0
+            for employee_id, last_end in last_completed
+        }
+        entries = sorted(scores.items(), key=lambda item: (item[1], item[0]))
 
-        # Cache the result
-        try:
-            import json
-            await cache_service.set(
-                self._queue_key.format(region=region_code),
-                json.dumps(positions),
-                ttl=self.config.queue_ttl_seconds
-            )
-        except Exception:
-            pass
+        if scores:
+            cache_key = self._queue_key.format(region=region_code)
+            try:
+                async with cache_service.pipeline(transaction=True) as pipe:
+                    pipe.delete(cache_key)
+                    pipe.zadd(cache_key, scores)
+                    pipe.expire(cache_key, self.config.queue_ttl_seconds)
+            except Exception:
+                pass
 
-        return positions
+        return entries
 
     async def _attempt_assignment(
         self,
         cleaner: Employee,
-        booking: Booking
+        booking: Booking,
+        duration_hours: float = 2.5
     ) -> Optional[Employee]:
         """
         Attempt to assign a cleaner to a booking.
         Returns the cleaner if successful, None otherwise.
+
+        The booking row is locked (FOR UPDATE SKIP LOCKED) and the cleaner's
+        advisory lock is held while their schedule is re-checked and the
+        assignment committed, so concurrent workers cannot double-book.
+
+        Raises:
+            BookingClaimedError: The booking was assigned or locked by another worker
         """
         try:
-            # Double-check availability (race condition protection)
+            if not lock_unassigned_booking(self.db, booking.id):
+                self.db.rollback()
+                raise BookingClaimedError(f"Booking {booking.id} is already claimed")
+
+            if not try_lock_cleaner(self.db, cleaner.id):
+                # Another worker is assigning this cleaner right now
+                self.db.rollback()
+                return None
+
+            # Double-check availability under the cleaner lock
             if has_time_conflict(
                 cleaner.id,
                 booking.scheduled_date,
-                2.5,  # TODO: Get from booking
+                duration_hours,
                 self.db,
                 booking.id
             ):
+                self.db.rollback()
                 return None
 
             # Assign
@@ -507,6 +628,8 @@ class AllocationEngine:
 
             return cleaner
 
+        except BookingClaimedError:
+            raise
         except Exception as e:
             logger.error(f"Assignment failed: {e}")
             self.db.rollback()
@@ -518,54 +641,30 @@ class AllocationEngine:
         region_code: str
     ):
         """Move cleaner to back of queue after assignment."""
-        # Invalidate cache to force recalculation
-        try:
-            cache_key = self._queue_key.format(region=region_code)
-            await cache_service.delete(cache_key)
-        except Exception:
-            pass
+        await touch_cleaner_queue(cleaner.region_code or region_code, cleaner.id)
 
-    async def _record_allocation_success(self, region_code: str, time_ms: float):
+    async def _record_allocation_success(
+        self,
+        region_code: str,
+        time_ms: float,
+        candidates_evaluated: int,
+        fallback_tier: str
+    ):
         """Record successful allocation metrics."""
-        await self._record_metric(region_code, "success", time_ms)
+        await allocation_metrics.record_allocation(
+            region_code, True, time_ms, candidates_evaluated, fallback_tier
+        )
 
-    async def _record_allocation_failure(self, region_code: str):
+    async def _record_allocation_failure(
+        self,
+        region_code: str,
+        time_ms: float,
+        candidates_evaluated: int
+    ):
         """Record failed allocation metrics."""
-        await self._record_metric(region_code, "failure", 0)
-
-    async def _record_metric(self, region_code: str, result: str, time_ms: float):
-        """Record allocation metric to cache."""
-        try:
-            date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-            cache_key = f"allocation:metrics:{region_code}:{date_str}"
-
-            # Get existing metrics
-            existing = await cache_service.get(cache_key)
-            if existing:
-                import json
-                metrics = json.loads(existing)
-            else:
-                metrics = {
-                    "total_allocations": 0,
-                    "successful": 0,
-                    "failed": 0,
-                    "total_time_ms": 0,
-                    "avg_time_ms": 0
-                }
-
-            metrics["total_allocations"] += 1
-            if result == "success":
-                metrics["successful"] += 1
-                metrics["total_time_ms"] += time_ms
-                metrics["avg_time_ms"] = metrics["total_time_ms"] / metrics["successful"]
-            else:
-                metrics["failed"] += 1
-
-            import json
-            await cache_service.set(cache_key, json.dumps(metrics), ttl=86400)
-
-        except Exception as e:
-            logger.debug(f"Could not record metric: {e}")
+        await allocation_metrics.record_allocation(
+            region_code, False, time_ms, candidates_evaluated
+        )
 
     async def get_allocation_metrics(
         self,
@@ -582,48 +681,15 @@ class AllocationEngine:
                 "failed": int,
                 "success_rate": float,
                 "avg_time_ms": float,
+                "latency_ms": {"p50", "p95", "p99"},
+                "latency_histogram": {bucket upper bound ms: count},
+                "candidates_evaluated": int,
+                "fallback_tiers": {tier: successful allocations},
                 "by_region": {region: metrics}
             }
         """
-        date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
-
-        all_metrics = {
-            "date": date_str,
-            "total_allocations": 0,
-            "successful": 0,
-            "failed": 0,
-            "success_rate": 0.0,
-            "avg_time_ms": 0.0,
-            "by_region": {}
-        }
-
         regions = [region_code] if region_code else list(REGION_COORDINATES.keys())
-
-        total_time = 0
-        for region in regions:
-            try:
-                cache_key = f"allocation:metrics:{region}:{date_str}"
-                cached = await cache_service.get(cache_key)
-                if cached:
-                    import json
-                    metrics = json.loads(cached)
-                    all_metrics["by_region"][region] = metrics
-                    all_metrics["total_allocations"] += metrics.get("total_allocations", 0)
-                    all_metrics["successful"] += metrics.get("successful", 0)
-                    all_metrics["failed"] += metrics.get("failed", 0)
-                    total_time += metrics.get("total_time_ms", 0)
-            except Exception:
-                pass
-
-        if all_metrics["total_allocations"] > 0:
-            all_metrics["success_rate"] = (
-                all_metrics["successful"] / all_metrics["total_allocations"] * 100
-            )
-
-        if all_metrics["successful"] > 0:
-            all_metrics["avg_time_ms"] = total_time / all_metrics["successful"]
-
-        return all_metrics
+        return await allocation_metrics.get_allocation_metrics(regions, date_str)
 
     async def get_queue_status(self, region_code: str) -> List[Dict[str, Any]]:
         """
@@ -666,6 +732,31 @@ class AllocationEngine:
         return queue_status
 
 
+async def touch_cleaner_queue(
+    region_code: str,
+    cleaner_id: Any,
+    timestamp: Optional[datetime] = None
+) -> None:
+    """
+    Move a cleaner to the back of their region's queue.
+
+    Call after an assignment or job completion. Only updates a queue that
+    is already built; a missing queue is rebuilt from the database on the
+    next read, which already reflects the completion.
+    """
+    if not region_code:
+        return
+
+    cache_key = f"cleaner:queue:{region_code}"
+    score = (timestamp or datetime.now(timezone.utc)).timestamp()
+
+    try:
+        if await cache_service.exists(cache_key):
+            await cache_service.zadd(cache_key, {str(cleaner_id): score})
+    except Exception as e:
+        logger.debug(f"Could not update queue for {region_code}: {e}")
+
+
 # Convenience function for backwards compatibility
 async def enhanced_auto_assign(
     booking: Booking,
@@ -682,6 +773,53 @@ async def enhanced_auto_assign(
     if result.success:
         return result.assigned_employee
 
+    if result.booking_claimed:
+        # Already handled by another worker, do not race it with the fallback
+        return None
+
     # Fallback to basic assignment
     from app.services.cleaner_assignment import auto_assign_cleaner
     return auto_assign_cleaner(booking, db, duration_hours)
+
+
+async def drain_pending_bookings(
+    db: Session,
+    max_bookings: Optional[int] = None,
+    config: Optional[AllocationConfig] = None
+) -> Dict[str, int]:
+    """
+    Allocate unassigned bookings one at a time until none are left.
+
+    Safe to run from several workers or processes at once: each booking is
+    claimed with FOR UPDATE SKIP LOCKED, so workers skip rows another worker
+    holds, and assignments take the cleaner's advisory lock.
+
+    Returns:
+        Counts of processed, assigned and failed bookings
+    """
+    engine = AllocationEngine(db, config)
+    attempted = set()
+    stats = {"processed": 0, "assigned": 0, "failed": 0}
+
+    while max_bookings is None or stats["processed"] < max_bookings:
+        claimed = claim_pending_bookings(db, limit=1, exclude_ids=attempted)
+        if not claimed:
+            db.rollback()
+            break
+
+        booking = claimed[0]
+        attempted.add(booking.id)
+        stats["processed"] += 1
+
+        service = booking.service
+        duration_hours = float(service.base_duration_hours or 2.5) if service else 2.5
+        result = await engine.allocate_cleaner(booking, duration_hours)
+
+        if result.success:
+            stats["assigned"] += 1
+        else:
+            stats["failed"] += 1
+            # Release the booking row for other workers
+            db.rollback()
+
+    return stats
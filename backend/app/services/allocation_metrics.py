@@ -0,0 +1,134 @@
+"""
+Allocation Metrics
+
+Per-region, per-day allocation counters kept in one cache hash
+(allocation:counters:{region}:{date}). Every field is updated with an
+atomic HINCRBY, so concurrent workers never lose updates, and reading a
+day's metrics is one HGETALL per region.
+
+Fields:
+- total_allocations, successful, failed
+- time_ms_total: sum of successful allocation times (for the average)
+- candidates_evaluated: candidates tried, over all attempts
+- tier:<tier>: successful allocations by fallback tier
+- lat:<bound>: successful allocation times in fixed latency buckets,
+  from which p50/p95/p99 are estimated
+"""
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from app.services.cache import cache_service
+from app.services.histograms import OVERFLOW_BUCKET, histogram_percentile, latency_bucket
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "allocation:counters:{region}:{date}"
+METRICS_TTL_SECONDS = 7 * 86400
+
+# Fallback tiers, in the order the allocation engine tries them
+TIER_SAME_REGION = "same_region"
+TIER_NEARBY = "nearby"
+TIER_ADJACENT_REGION = "adjacent_region"
+TIER_ANY_REGION = "any_region"
+FALLBACK_TIERS = [TIER_SAME_REGION, TIER_NEARBY, TIER_ADJACENT_REGION, TIER_ANY_REGION]
+
+# Upper bounds (ms) of the latency buckets; the last bucket is open-ended
+LATENCY_BUCKETS_MS = [10, 25, 50, 75, 100, 150, 250, 400, 600, 1000, 1500, 2500, 5000]
+
+
+async def record_allocation(
+    region_code: str,
+    success: bool,
+    time_ms: float,
+    candidates_evaluated: int = 0,
+    fallback_tier: Optional[str] = None
+) -> None:
+    """Record one allocation attempt."""
+    date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    increments = {
+        "total_allocations": 1,
+        "candidates_evaluated": candidates_evaluated,
+    }
+    if success:
+        increments["successful"] = 1
+        increments["time_ms_total"] = int(round(time_ms))
+        increments[f"lat:{latency_bucket(time_ms, LATENCY_BUCKETS_MS)}"] = 1
+        increments[f"tier:{fallback_tier or TIER_SAME_REGION}"] = 1
+    else:
+        increments["failed"] = 1
+
+    try:
+        await cache_service.hincrby_many(
+            METRICS_KEY.format(region=region_code, date=date_str),
+            increments,
+            ttl=METRICS_TTL_SECONDS
+        )
+    except Exception as e:
+        logger.debug(f"Could not record allocation metric: {e}")
+
+
+def _summarize(raw: Dict[str, str]) -> Dict[str, Any]:
+    """Turn a metrics hash into the dashboard shape."""
+    values = {field: int(value) for field, value in raw.items()}
+    total = values.get("total_allocations", 0)
+    successful = values.get("successful", 0)
+    histogram = {
+        field[len("lat:"):]: count for field, count in values.items() if field.startswith("lat:")
+    }
+
+    return {
+        "total_allocations": total,
+        "successful": successful,
+        "failed": values.get("failed", 0),
+        "success_rate": successful / total * 100 if total else 0.0,
+        "total_time_ms": values.get("time_ms_total", 0),
+        "avg_time_ms": values.get("time_ms_total", 0) / successful if successful else 0.0,
+        "latency_ms": {
+            "p50": histogram_percentile(histogram, 50, LATENCY_BUCKETS_MS),
+            "p95": histogram_percentile(histogram, 95, LATENCY_BUCKETS_MS),
+            "p99": histogram_percentile(histogram, 99, LATENCY_BUCKETS_MS),
+        },
+        "latency_histogram": {
+            str(bound): histogram.get(str(bound), 0)
+            for bound in LATENCY_BUCKETS_MS + [OVERFLOW_BUCKET]
+        },
+        "candidates_evaluated": values.get("candidates_evaluated", 0),
+        "avg_candidates_evaluated": values.get("candidates_evaluated", 0) / total if total else 0.0,
+        "fallback_tiers": {tier: values.get(f"tier:{tier}", 0) for tier in FALLBACK_TIERS},
+    }
+
+
+async def get_allocation_metrics(
+    regions: Iterable[str],
+    date_str: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get a day's allocation metrics per region and in total.
+
+    Reads one hash per region (a single pipelined round trip on Redis).
+    """
+    date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    regions = list(regions)
+
+    try:
+        hashes = await cache_service.hgetall_many(
+            [METRICS_KEY.format(region=region, date=date_str) for region in regions]
+        )
+    except Exception as e:
+        logger.debug(f"Could not read allocation metrics: {e}")
+        hashes = [{} for _ in regions]
+
+    combined: Dict[str, int] = {}
+    by_region = {}
+    for region, raw in zip(regions, hashes):
+        if not raw:
+            continue
+        by_region[region] = _summarize(raw)
+        for field, value in raw.items():
+            combined[field] = combined.get(field, 0) + int(value)
+
+    metrics = _summarize({field: str(value) for field, value in combined.items()})
+    metrics["date"] = date_str
+    metrics["by_region"] = by_region
+    return metrics
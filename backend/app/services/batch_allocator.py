@@ -0,0 +1,470 @@
+"""
+Batch Allocation
+
+Assigns every unassigned booking in a time horizon at once, instead of
+one booking (enhanced_auto_assign) or one cleaner (assign_backlog_to_cleaner)
+at a time.
+
+1. Bulk load: pending bookings, active cleaners, busy intervals, queue
+   positions and live cleaner positions (a fixed number of queries)
+2. Feasibility: region match (own or adjacent region) and no time conflict
+3. Cost: 1 - allocation score (same queue/distance/rating weights as
+   AllocationEngine), solved as a min-cost assignment (Hungarian algorithm)
+4. Commit: every assignment in a single transaction
+
+Concurrency: bookings are claimed with FOR UPDATE SKIP LOCKED for the
+whole run, and before writing, the chosen cleaners' advisory locks are
+taken and their schedules re-checked, so parallel sweeps, the admin
+endpoint and single-booking allocation never double-book a cleaner.
+
+A cleaner takes at most one booking per matching round. Rounds repeat on
+the bookings left over, with busy intervals and queue positions updated,
+so a cleaner can still pick up several non-overlapping jobs.
+"""
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.booking import Booking
+from app.models.employee import Employee, EmployeeAccountStatus
+from app.services.allocation_engine import (
+    AllocationEngine, AllocationConfig, ADJACENT_REGIONS, REGION_COORDINATES,
+    touch_cleaner_queue
+)
+from app.services.cleaner_assignment import (
+    address_region_filter, get_address_region, get_cleaner_busy_intervals, intervals_overlap
+)
+from app.services.allocation_locks import claim_pending_bookings, lock_cleaners
+from app.services.cleaner_location import get_cleaner_locations
+from app.services.events import event_publisher, EventType
+from app.services.scoring_kernel import score_candidates, MISSING_QUEUE_POSITION
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HORIZON_HOURS = 24
+DEFAULT_DURATION_HOURS = 2.5
+
+# Matching costs: a real pair costs 1 - score (0..1), leaving a booking
+# unassigned costs more, and an infeasible pair can never win.
+UNASSIGNED_COST = 2.0
+INFEASIBLE_COST = 1e6
+
+
+def solve_assignment(cost: np.ndarray) -> List[int]:
+    """
+    Min-cost assignment of rows to distinct columns (Hungarian algorithm).
+
+    Args:
+        cost: (n, m) cost matrix with n <= m
+
+    Returns:
+        Column index assigned to each row
+    """
+    n, m = cost.shape
+    if n == 0:
+        return []
+    if n > m:
+        raise ValueError("solve_assignment needs at least as many columns as rows")
+
+    # Potentials and matching are 1-indexed; column 0 is the virtual start
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)     # p[j] = row matched to column j
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            improve = free & (reduced < minv[1:])
+            minv[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+
+            candidates = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+
+            j0 = j1
+            if p[j0] == 0:
+                break
+
+        # Augment along the alternating path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+
+    assignment = [-1] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            assignment[p[j] - 1] = j - 1
+    return assignment
+
+
+@dataclass
+class BatchAssignment:
+    """One booking-to-cleaner assignment chosen by the solver."""
+    booking: Booking
+    employee: Employee
+    score: float
+    summary: Dict[str, Any] = field(init=False)
+
+    def __post_init__(self):
+        # Snapshot for reporting, readable after commit expires the ORM objects
+        self.summary = {
+            "booking_id": self.booking.id,
+            "booking_number": self.booking.booking_number,
+            "cleaner_id": str(self.employee.id),
+            "cleaner_name": self.employee.full_name,
+            "score": round(self.score, 4)
+        }
+
+
+@dataclass
+class BatchAllocationResult:
+    """Result of a batch allocation run."""
+    bookings_considered: int = 0
+    cleaners_considered: int = 0
+    assignments: List[BatchAssignment] = field(default_factory=list)
+    unassigned_booking_ids: List[int] = field(default_factory=list)
+    rounds: int = 0
+    committed: bool = False
+    elapsed_ms: float = 0
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "bookings_considered": self.bookings_considered,
+            "cleaners_considered": self.cleaners_considered,
+            "assigned": len(self.assignments),
+            "unassigned": len(self.unassigned_booking_ids),
+            "unassigned_booking_ids": self.unassigned_booking_ids,
+            "rounds": self.rounds,
+            "committed": self.committed,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+            "error": self.error,
+            "assignments": [a.summary for a in self.assignments]
+        }
+
+
+class BatchAllocator:
+    """Global min-cost allocation of a booking backlog."""
+
+    def __init__(self, db: Session, config: Optional[AllocationConfig] = None):
+        self.db = db
+        self.config = config or AllocationConfig()
+        self._engine = AllocationEngine(db, self.config)
+
+    async def run(
+        self,
+        horizon_hours: float = DEFAULT_HORIZON_HOURS,
+        region_code: Optional[str] = None,
+        dry_run: bool = False
+    ) -> BatchAllocationResult:
+        """
+        Assign all unassigned bookings starting within the horizon.
+
+        Args:
+            horizon_hours: Only bookings starting in [now, now + horizon] are considered
+            region_code: Restrict to bookings in one region (cleaners may still be adjacent)
+            dry_run: Solve and report without writing assignments
+        """
+        started = datetime.now(timezone.utc)
+        result = BatchAllocationResult()
+
+        bookings = self._load_bookings(started, started + timedelta(hours=horizon_hours), region_code)
+        booking_regions = {b.id: get_address_region(b.address) for b in bookings}
+        if region_code:
+            bookings = [b for b in bookings if booking_regions[b.id] == region_code]
+        result.bookings_considered = len(bookings)
+
+        if not bookings:
+            self.db.rollback()
+            result.elapsed_ms = (datetime.now(timezone.utc) - started).total_seconds() * 1000
+            return result
+
+        cleaners = self.db.query(Employee).filter(
+            Employee.account_status == EmployeeAccountStatus.ACTIVE
+        ).all()
+        result.cleaners_considered = len(cleaners)
+
+        intervals = {b.id: self._booking_interval(b) for b in bookings}
+        window_start = min(start for start, _ in intervals.values())
+        window_end = max(end for _, end in intervals.values())
+        busy = get_cleaner_busy_intervals(window_start, window_end, self.db)
+
+        queue_positions = await self._engine._get_queue_positions_many(
+            list({c.region_code for c in cleaners})
+        )
+        live_coords = await get_cleaner_locations(c.id for c in cleaners)
+
+        pending = list(bookings)
+        while pending and cleaners:
+            result.rounds += 1
+            matched = self._match_round(
+                pending, cleaners, booking_regions, intervals, busy, queue_positions, live_coords
+            )
+            if not matched:
+                break
+
+            matched_ids = set()
+            for assignment in matched:
+                booking, cleaner = assignment.booking, assignment.employee
+                busy.setdefault(cleaner.id, []).append(intervals[booking.id])
+                # Assigned cleaners move to the back of their queue for the next round
+                region_queue = queue_positions.setdefault(cleaner.region_code, {})
+                region_queue[str(cleaner.id)] = max(region_queue.values(), default=0) + 1
+                matched_ids.add(booking.id)
+
+            result.assignments.extend(matched)
+            pending = [b for b in pending if b.id not in matched_ids]
+
+        result.unassigned_booking_ids = [b.id for b in pending]
+
+        if result.assignments and not dry_run:
+            kept = self._lock_and_recheck(result.assignments, intervals)
+            kept_ids = {id(a) for a in kept}
+            dropped = [a for a in result.assignments if id(a) not in kept_ids]
+            result.assignments = kept
+            result.unassigned_booking_ids.extend(a.booking.id for a in dropped)
+
+            # Capture what the follow-up work needs before commit expires the objects
+            events = [self._event_payload(a) for a in kept]
+            cleaners = {(a.employee.region_code, a.employee.id) for a in kept}
+            dates = {a.booking.scheduled_date.date() for a in kept}
+
+            result.committed = self._commit(kept, started)
+            if not result.committed:
+                result.error = "Commit failed, no assignments were saved"
+            elif kept:
+                await self._after_commit(events, cleaners, dates, started)
+        else:
+            # Nothing to write, release the claimed booking rows
+            self.db.rollback()
+
+        result.elapsed_ms = (datetime.now(timezone.utc) - started).total_seconds() * 1000
+        logger.info(
+            f"Batch allocation: {len(result.assignments)}/{result.bookings_considered} bookings "
+            f"assigned in {result.rounds} rounds ({result.elapsed_ms:.0f}ms)"
+        )
+        return result
+
+    def _load_bookings(self, start: datetime, end: datetime, region_code: Optional[str] = None) -> List[Booking]:
+        """
+        Claim unassigned bookings in the horizon, with address and service
+        loaded. For one region only bookings whose address may be in it are
+        locked, so sweeps for other regions can claim theirs.
+        """
+        return claim_pending_bookings(
+            self.db,
+            start=start,
+            end=end,
+            options=(selectinload(Booking.address), selectinload(Booking.service)),
+            filters=[Booking.address.has(address_region_filter(region_code))] if region_code else ()
+        )
+
+    def _booking_interval(self, booking: Booking) -> Tuple[datetime, datetime]:
+        service = booking.service
+        duration = float(service.base_duration_hours or DEFAULT_DURATION_HOURS) if service else DEFAULT_DURATION_HOURS
+        return booking.scheduled_date, booking.scheduled_date + timedelta(hours=duration)
+
+    def _allowed_regions(self, booking_region: Optional[str]) -> Optional[set]:
+        """Cleaner regions allowed for a booking (None = any region)."""
+        if not booking_region:
+            return None
+        allowed = {booking_region}
+        if self.config.expand_to_adjacent_regions:
+            allowed.update(ADJACENT_REGIONS.get(booking_region, []))
+        return allowed
+
+    def _match_round(
+        self,
+        bookings: List[Booking],
+        cleaners: List[Employee],
+        booking_regions: Dict[int, Optional[str]],
+        intervals: Dict[int, Tuple[datetime, datetime]],
+        busy: Dict[Any, List[Tuple[datetime, datetime]]],
+        queue_positions: Dict[str, Dict[str, int]],
+        live_coords: Dict[str, Tuple[float, float]]
+    ) -> List[BatchAssignment]:
+        """Solve one round: each cleaner takes at most one booking."""
+        nan = float("nan")
+
+        # Cleaner arrays grouped by region (queue scores are per region)
+        groups: Dict[str, Dict[str, list]] = {}
+        for index, cleaner in enumerate(cleaners):
+            coords = live_coords.get(str(cleaner.id)) or REGION_COORDINATES.get(cleaner.region_code)
+            group = groups.setdefault(cleaner.region_code, {
+                "index": [], "lat": [], "lon": [], "queue": [], "rating": []
+            })
+            group["index"].append(index)
+            group["lat"].append(coords[0] if coords else nan)
+            group["lon"].append(coords[1] if coords else nan)
+            group["queue"].append(
+                queue_positions.get(cleaner.region_code, {}).get(str(cleaner.id), MISSING_QUEUE_POSITION)
+            )
+            group["rating"].append(float(cleaner.rating) if cleaner.rating else nan)
+
+        cost = np.full((len(bookings), len(cleaners)), INFEASIBLE_COST)
+        scores = np.zeros((len(bookings), len(cleaners)))
+
+        for row, booking in enumerate(bookings):
+            allowed = self._allowed_regions(booking_regions[booking.id])
+            booking_coords = self._engine._get_booking_coordinates(booking)
+            start, end = intervals[booking.id]
+
+            for region, group in groups.items():
+                if allowed is not None and region not in allowed:
+                    continue
+                region_queue = queue_positions.get(region, {})
+                group_scores = score_candidates(
+                    group["lat"],
+                    group["lon"],
+                    group["queue"],
+                    group["rating"],
+                    booking_coords,
+                    max_queue_position=max(region_queue.values()) if region_queue else 1,
+                    queue_weight=self.config.queue_weight,
+                    distance_weight=self.config.distance_weight,
+                    rating_weight=self.config.rating_weight
+                ).total_score
+
+                for offset, index in enumerate(group["index"]):
+                    if intervals_overlap(busy.get(cleaners[index].id, []), start, end):
+                        continue
+                    scores[row, index] = group_scores[offset]
+                    cost[row, index] = 1.0 - group_scores[offset]
+
+        # Drop cleaners that are infeasible for every booking, then add one
+        # "leave unassigned" column per booking
+        useful = np.nonzero((cost < INFEASIBLE_COST).any(axis=0))[0]
+        if useful.size == 0:
+            return []
+        dummy = np.full((len(bookings), len(bookings)), INFEASIBLE_COST)
+        np.fill_diagonal(dummy, UNASSIGNED_COST)
+        matrix = np.hstack([cost[:, useful], dummy])
+
+        matched = []
+        for row, column in enumerate(solve_assignment(matrix)):
+            if column < 0 or column >= useful.size:
+                continue
+            index = useful[column]
+            if cost[row, index] >= INFEASIBLE_COST:
+                continue
+            matched.append(BatchAssignment(
+                booking=bookings[row],
+                employee=cleaners[index],
+                score=float(scores[row, index])
+            ))
+        return matched
+
+    def _lock_and_recheck(
+        self,
+        assignments: List[BatchAssignment],
+        intervals: Dict[int, Tuple[datetime, datetime]]
+    ) -> List[BatchAssignment]:
+        """
+        Lock the chosen cleaners and drop assignments that now conflict.
+
+        Other workers may have assigned these cleaners since the bulk load;
+        their commits are visible once the advisory locks are held.
+        """
+        cleaner_ids = {a.employee.id for a in assignments}
+        lock_cleaners(self.db, cleaner_ids)
+
+        window_start = min(intervals[a.booking.id][0] for a in assignments)
+        window_end = max(intervals[a.booking.id][1] for a in assignments)
+        busy = get_cleaner_busy_intervals(
+            window_start, window_end, self.db, cleaner_ids=list(cleaner_ids)
+        )
+
+        kept = []
+        for assignment in assignments:
+            start, end = intervals[assignment.booking.id]
+            cleaner_busy = busy.setdefault(assignment.employee.id, [])
+            if intervals_overlap(cleaner_busy, start, end):
+                logger.info(
+                    f"Batch allocation: dropping booking {assignment.booking.id}, "
+                    f"cleaner {assignment.employee.id} was assigned concurrently"
+                )
+                continue
+            cleaner_busy.append((start, end))
+            kept.append(assignment)
+        return kept
+
+    def _commit(self, assignments: List[BatchAssignment], now: datetime) -> bool:
+        """Write every assignment in one transaction."""
+        try:
+            for assignment in assignments:
+                booking = assignment.booking
+                booking.assigned_employee_id = assignment.employee.id
+                booking.assigned_at = now
+                # SLA deadline (scheduled time + 10 min buffer), as in AllocationEngine
+                booking.sla_deadline = booking.scheduled_date + timedelta(minutes=10)
+            self.db.commit()
+            return True
+        except Exception as e:
+            logger.error(f"Batch allocation commit failed: {e}")
+            self.db.rollback()
+            return False
+
+    def _event_payload(self, assignment: BatchAssignment) -> Dict[str, Any]:
+        booking, cleaner = assignment.booking, assignment.employee
+        return {
+            "job_id": booking.id,
+            "booking_number": booking.booking_number,
+            "status": booking.status.value,
+            "customer_id": booking.customer_id,
+            "cleaner_id": str(cleaner.id),
+            "cleaner_name": cleaner.full_name,
+            "employee_id": cleaner.employee_id,
+            "scheduled_date": booking.scheduled_date.isoformat(),
+            "auto_assigned": True,
+            "batch_assigned": True
+        }
+
+    async def _after_commit(
+        self,
+        events: List[Dict[str, Any]],
+        cleaners: set,
+        dates: set,
+        now: datetime
+    ) -> None:
+        """Events, queue updates and cache invalidation for committed assignments."""
+        from app.services.slot_capacity import invalidate_capacity_index
+
+        for payload in events:
+            await event_publisher.publish(EventType.JOB_ASSIGNED, payload)
+
+        for region_code, cleaner_id in cleaners:
+            await touch_cleaner_queue(region_code, cleaner_id, now)
+
+        await invalidate_capacity_index(*dates)
+
+
+async def run_batch_allocation(
+    db: Session,
+    horizon_hours: float = DEFAULT_HORIZON_HOURS,
+    region_code: Optional[str] = None,
+    dry_run: bool = False
+) -> BatchAllocationResult:
+    """Run the batch allocator once (admin endpoint and background sweep)."""
+    allocator = BatchAllocator(db)
+    return await allocator.run(horizon_hours, region_code, dry_run)
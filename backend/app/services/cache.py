@@ -5,11 +5,16 @@ Provides caching abstraction with optional Redis backend.
 Falls back to in-memory cache if Redis is not available.
 """
 import asyncio
-from datetime import datetime, timezone
-from typing import Dict, Any, Optional, List
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional, List, Tuple, AsyncIterator
 import json
 import logging
 
+from app.config import settings
+
 logger = logging.getLogger(__name__)
 
 # Try to import Redis, fall back to in-memory if not available
@@ -22,67 +27,209 @@ except ImportError:
 
 
 class InMemoryCache:
-    """Simple in-memory cache for development/fallback."""
+    """
+    Bounded in-memory cache for development/fallback.
     
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    - At most max_entries keys (a hash or sorted set counts as one key);
+      the least recently used key is evicted to make room
+    - TTLs apply to every data type, are checked on access, and are
+      purged in the background by the expiry sweeper
+    - Hit, miss, eviction and expiry counters (get_stats)
+    """
+    
+    DEFAULT_MAX_ENTRIES = 10000
+    DEFAULT_SWEEP_INTERVAL_SECONDS = 30
+    
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        sweep_interval_seconds: float = DEFAULT_SWEEP_INTERVAL_SECONDS
+    ):
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
         self._expiry: Dict[str, float] = {}
+        self.max_entries = max_entries
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self._sweeper: Optional[asyncio.Task] = None
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+    
+    # ============ Internals ============
+    
+    def _purge_if_expired(self, key: str) -> bool:
+        """Drop a key whose TTL has passed. Returns True if it was dropped."""
+        expires_at = self._expiry.get(key)
+        if expires_at is not None and time.monotonic() > expires_at:
+            self._cache.pop(key, None)
+            del self._expiry[key]
+            self._expirations += 1
+            return True
+        return False
+    
+    def _lookup(self, key: str, default: Any = None) -> Any:
+        """Read a key, counting the hit or miss and marking it recently used."""
+        self._purge_if_expired(key)
+        if key not in self._cache:
+            self._misses += 1
+            return default
+        self._hits += 1
+        self._cache.move_to_end(key)
+        return self._cache[key]
+    
+    def _store(self, key: str, value: Any) -> None:
+        """Write a key, evicting least recently used keys over the budget."""
+        self._cache[key] = value
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            evicted, _ = self._cache.popitem(last=False)
+            self._expiry.pop(evicted, None)
+            self._evictions += 1
+    
+    def _container(self, name: str) -> Dict[str, Any]:
+        """Get a hash or sorted set for writing, creating it if needed."""
+        self._purge_if_expired(name)
+        container = self._cache.get(name)
+        if not isinstance(container, dict):
+            container = {}
+        self._store(name, container)
+        return container
+    
+    # ============ Expiry Sweeper ============
+    
+    def purge_expired(self) -> int:
+        """Drop every expired key. Returns the number dropped."""
+        now = time.monotonic()
+        expired = [key for key, expires_at in self._expiry.items() if now > expires_at]
+        for key in expired:
+            self._cache.pop(key, None)
+            del self._expiry[key]
+        self._expirations += len(expired)
+        return len(expired)
+    
+    def start_sweeper(self) -> None:
+        """Start the background expiry sweeper (needs a running event loop)."""
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._run_sweeper())
+    
+    async def stop_sweeper(self) -> None:
+        """Stop the background expiry sweeper."""
+        if self._sweeper:
+            self._sweeper.cancel()
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+            self._sweeper = None
+    
+    async def _run_sweeper(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval_seconds)
+            try:
+                purged = self.purge_expired()
+                if purged:
+                    logger.debug(f"Cache sweeper purged {purged} expired keys")
+            except Exception as e:
+                logger.error(f"Cache sweeper error: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Size, hit rate, eviction and expiry counters."""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._cache),
+            "max_entries": self.max_entries,
+            "keys_with_ttl": len(self._expiry),
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups * 100, 2) if lookups else 0.0,
+            "evictions": self._evictions,
+            "expirations": self._expirations,
+        }
+    
+    # ============ Basic Operations ============
     
     async def get(self, key: str) -> Optional[str]:
         """Get a value from cache."""
-        if key in self._cache:
-            if key in self._expiry:
-                if datetime.now(timezone.utc).timestamp() > self._expiry[key]:
-                    del self._cache[key]
-                    del self._expiry[key]
-                    return None
-            return self._cache[key]
-        return None
+        return self._lookup(key)
     
     async def set(self, key: str, value: str, ttl: int = None) -> None:
-        """Set a value in cache."""
-        self._cache[key] = value
+        """Set a value in cache (clears any previous TTL, like Redis SET)."""
+        self._store(key, value)
         if ttl:
-            self._expiry[key] = datetime.now(timezone.utc).timestamp() + ttl
+            self._expiry[key] = time.monotonic() + ttl
+        else:
+            self._expiry.pop(key, None)
+    
+    async def set_nx(self, key: str, value: str, ttl: int = None) -> bool:
+        """Set a value only if the key does not exist. Returns True if set."""
+        self._purge_if_expired(key)
+        if key in self._cache:
+            return False
+        await self.set(key, value, ttl)
+        return True
+    
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get several values."""
+        return [self._lookup(key) for key in keys]
+    
+    async def incr(self, key: str, amount: int = 1) -> int:
+        """Increment an integer value, keeping its TTL."""
+        new_value = int(self._lookup(key) or 0) + amount
+        self._store(key, str(new_value))
+        return new_value
     
     async def delete(self, key: str) -> None:
         """Delete a value from cache."""
         self._cache.pop(key, None)
         self._expiry.pop(key, None)
     
+    async def exists(self, key: str) -> int:
+        """Check whether a key exists."""
+        self._purge_if_expired(key)
+        return 1 if key in self._cache else 0
+    
+    async def expire(self, key: str, ttl: int) -> None:
+        """Set a TTL on an existing key."""
+        if key in self._cache:
+            self._expiry[key] = time.monotonic() + ttl
+    
+    # ============ Hashes ============
+    
     async def hget(self, name: str, key: str) -> Optional[str]:
         """Get a hash field."""
-        hash_data = self._cache.get(name, {})
-        return hash_data.get(key)
+        return self._lookup(name, {}).get(key)
     
-    async def hset(self, name: str, key: str, value: str) -> None:
-        """Set a hash field."""
-        if name not in self._cache:
-            self._cache[name] = {}
-        self._cache[name][key] = value
+    async def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Optional[str] = None,
+        mapping: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Set a hash field, or several fields from mapping."""
+        container = self._container(name)
+        if key is not None:
+            container[key] = value
+        if mapping:
+            container.update(mapping)
     
     async def hgetall(self, name: str) -> Dict[str, str]:
         """Get all hash fields."""
-        return self._cache.get(name, {})
+        return dict(self._lookup(name, {}))
     
     async def hincrby(self, name: str, key: str, amount: int = 1) -> int:
         """Increment a hash field."""
-        if name not in self._cache:
-            self._cache[name] = {}
-        current = int(self._cache[name].get(key, 0))
-        new_value = current + amount
-        self._cache[name][key] = str(new_value)
+        container = self._container(name)
+        new_value = int(container.get(key, 0)) + amount
+        container[key] = str(new_value)
         return new_value
     
+    # ============ Sorted Sets ============
+    
     async def zadd(self, name: str, mapping: Dict[str, float]) -> None:
         """Add to sorted set."""
-        if name not in self._cache:
-            self._cache[name] = {}
-        self._cache[name].update(mapping)
+        self._container(name).update(mapping)
     
     async def zrange(self, name: str, start: int, end: int, withscores: bool = False) -> List:
         """Get sorted set range."""
-        data = self._cache.get(name, {})
+        data = self._lookup(name, {})
         sorted_items = sorted(data.items(), key=lambda x: x[1])
         if end == -1:
             end = len(sorted_items)
@@ -92,6 +239,167 @@ class InMemoryCache:
         return [item[0] for item in items]
 
 
+class NearCache:
+    """
+    Process-local L1 cache in front of Redis for hot, rarely changing keys.
+    
+    Entries are grouped by Redis key so that one invalidation drops every
+    cached read of that key (GET, HGET field, HGETALL, ZRANGE slice).
+    Entries live for a short TTL and at most max_entries keys are kept (LRU).
+    """
+    
+    def __init__(self, max_entries: int = 2000):
+        self._entries: "OrderedDict[str, Dict[Any, Any]]" = OrderedDict()
+        self.max_entries = max_entries
+        # Bumped on every invalidation; a read that started before an
+        # invalidation does not store its (possibly stale) result
+        self.epoch = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+    
+    def get(self, name: str, variant: Any) -> Tuple[bool, Any]:
+        """Returns (found, value) for one read of a key."""
+        reads = self._entries.get(name)
+        entry = reads.get(variant) if reads else None
+        if entry is None or time.monotonic() > entry[0]:
+            self._misses += 1
+            return False, None
+        self._hits += 1
+        self._entries.move_to_end(name)
+        return True, entry[1]
+    
+    def put(self, name: str, variant: Any, value: Any, ttl: float, epoch: int) -> None:
+        """Store a read result unless the key was invalidated since epoch."""
+        if epoch != self.epoch:
+            return
+        reads = self._entries.get(name)
+        if reads is None:
+            reads = self._entries[name] = {}
+        reads[variant] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+    
+    def invalidate(self, name: str) -> None:
+        """Drop every cached read of a key."""
+        self.epoch += 1
+        if self._entries.pop(name, None) is not None:
+            self._invalidations += 1
+    
+    def clear(self) -> None:
+        """Drop everything (e.g. after missing invalidation messages)."""
+        self.epoch += 1
+        self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": round(self._hits / lookups * 100, 2) if lookups else 0.0,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+        }
+
+
+class CachePipeline:
+    """
+    Cache commands queued for one round trip (see CacheService.pipeline()).
+    
+    Command methods return the pipeline so they can be chained; execute()
+    returns one result per queued command, in order. Reads are sent to the
+    backend directly (no near cache); keys written are invalidated in the
+    near cache of every worker once the pipeline has run.
+    """
+    
+    def __init__(self, service: "CacheService", transaction: bool = False):
+        self._service = service
+        self._transaction = transaction
+        self._commands: List[Tuple[str, tuple, Dict[str, Any]]] = []
+        self._written: set = set()
+        self.results: List[Any] = []
+    
+    def __len__(self) -> int:
+        return len(self._commands)
+    
+    def _queue(self, command: str, *args, write: bool = False, **kwargs) -> "CachePipeline":
+        self._commands.append((command, args, kwargs))
+        if write:
+            self._written.add(args[0])
+        return self
+    
+    def get(self, key: str) -> "CachePipeline":
+        return self._queue("get", key)
+    
+    def set(self, key: str, value: str, ttl: int = None) -> "CachePipeline":
+        return self._queue("set", key, value, ttl, write=True)
+    
+    def delete(self, key: str) -> "CachePipeline":
+        return self._queue("delete", key, write=True)
+    
+    def expire(self, key: str, ttl: int) -> "CachePipeline":
+        return self._queue("expire", key, ttl)
+    
+    def incr(self, key: str, amount: int = 1) -> "CachePipeline":
+        return self._queue("incr", key, amount, write=True)
+    
+    def hget(self, name: str, key: str) -> "CachePipeline":
+        return self._queue("hget", name, key)
+    
+    def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Optional[str] = None,
+        mapping: Optional[Dict[str, str]] = None
+    ) -> "CachePipeline":
+        return self._queue("hset", name, key, value, mapping=mapping, write=True)
+    
+    def hgetall(self, name: str) -> "CachePipeline":
+        return self._queue("hgetall", name)
+    
+    def hincrby(self, name: str, key: str, amount: int = 1) -> "CachePipeline":
+        return self._queue("hincrby", name, key, amount, write=True)
+    
+    def zadd(self, name: str, mapping: Dict[str, float]) -> "CachePipeline":
+        return self._queue("zadd", name, mapping, write=True)
+    
+    def zrange(self, name: str, start: int = 0, end: int = -1, withscores: bool = False) -> "CachePipeline":
+        return self._queue("zrange", name, start, end, withscores=withscores)
+    
+    async def execute(self) -> List[Any]:
+        """Run the queued commands and return their results."""
+        if not self._commands:
+            return []
+        
+        service = self._service
+        commands, self._commands = self._commands, []
+        if service._using_redis:
+            pipe = service.client.pipeline(transaction=self._transaction)
+            for command, args, kwargs in commands:
+                if command == "set":
+                    key, value, ttl = args
+                    pipe.set(key, value, ex=ttl)
+                else:
+                    getattr(pipe, command)(*args, **kwargs)
+            results = await pipe.execute()
+        else:
+            # The in-memory cache never yields mid-command, so this is atomic too
+            client = service.client
+            results = [await getattr(client, command)(*args, **kwargs) for command, args, kwargs in commands]
+        
+        written, self._written = self._written, set()
+        for name in written:
+            await service._invalidate(name)
+        self.results = results
+        return results
+
+
 class CacheService:
     """
     Cache service with Redis backend or in-memory fallback.
@@ -111,10 +419,55 @@ class CacheService:
         # Dashboard stats
         await cache.update_dashboard_stat("active_jobs", delta=1)
         stats = await cache.get_dashboard_stats()
+    
+    Near cache: when Redis is connected, reads of keys under
+    NEAR_CACHE_PREFIXES are served from a per-process L1 (NearCache) for a
+    few seconds. Writes through this service drop the key locally and
+    publish it on INVALIDATION_CHANNEL so other workers drop it too.
+    Writes that bypass the service (e.g. via .client) are only picked up
+    when the L1 entry expires.
+    
+    Batching: mget(), mset(), hset(mapping=...) and pipeline() send several
+    commands in one round trip.
+    
+    Single flight: get_or_compute() and single_flight() make concurrent
+    misses on the same key wait for one computation, in-process (shared
+    future) and across workers (short lock key), and get_or_compute()
+    can keep serving a stale value while one caller refreshes it.
     """
     
     _instance: Optional['CacheService'] = None
     
+    INVALIDATION_CHANNEL = "cache:invalidate"
+    
+    # Single flight: lock lifetime, how long losers wait for the winner's
+    # result before computing themselves, and how often they re-check
+    SINGLE_FLIGHT_LOCK_TTL = 10
+    SINGLE_FLIGHT_WAIT_SECONDS = 5.0
+    SINGLE_FLIGHT_POLL_SECONDS = 0.05
+    
+    _RELEASE_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+    
+    _EXTEND_LOCK_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    
+    # Key prefix -> L1 TTL in seconds
+    NEAR_CACHE_PREFIXES: Dict[str, float] = {
+        "utilization:": 10,
+        "cleaner:queue:": 5,
+        "availability:capacity:": 5,
+        "catalog:": 5,
+    }
+    
     def __new__(cls):
         """Singleton pattern."""
         if cls._instance is None:
@@ -127,14 +480,23 @@ class CacheService:
             return
         
         self._redis_client = None
-        self._fallback_cache = InMemoryCache()
+        self._fallback_cache = InMemoryCache(
+            max_entries=settings.MEMORY_CACHE_MAX_ENTRIES,
+            sweep_interval_seconds=settings.MEMORY_CACHE_SWEEP_SECONDS
+        )
         self._using_redis = False
+        self._near_cache = NearCache(max_entries=settings.NEAR_CACHE_MAX_ENTRIES)
+        self._near_cache_enabled = settings.NEAR_CACHE_ENABLED
+        self._instance_id = uuid.uuid4().hex
+        self._invalidation_listener: Optional[asyncio.Task] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
         self._initialized = True
     
     async def connect(self, redis_url: str = "redis://localhost:6379") -> bool:
         """Connect to Redis if available."""
         if not REDIS_AVAILABLE:
             logger.info("Using in-memory cache (Redis not installed)")
+            self._fallback_cache.start_sweeper()
             return False
         
         try:
@@ -142,19 +504,142 @@ class CacheService:
             await self._redis_client.ping()
             self._using_redis = True
             logger.info("Connected to Redis")
+            if self._near_cache_enabled:
+                self._invalidation_listener = asyncio.create_task(self._listen_for_invalidations())
             return True
         except Exception as e:
             logger.warning(f"Redis connection failed: {e}, using in-memory cache")
             self._using_redis = False
+            self._fallback_cache.start_sweeper()
             return False
     
     async def disconnect(self) -> None:
         """Disconnect from Redis."""
+        await self._fallback_cache.stop_sweeper()
+        if self._invalidation_listener:
+            self._invalidation_listener.cancel()
+            await asyncio.gather(self._invalidation_listener, return_exceptions=True)
+            self._invalidation_listener = None
+        self._near_cache.clear()
         if self._redis_client:
             await self._redis_client.close()
             self._redis_client = None
             self._using_redis = False
     
+    async def get_stats(self) -> Dict[str, Any]:
+        """
+        Cache size, hit rate and eviction counters.
+        
+        From Redis INFO when connected, otherwise from the in-memory cache.
+        """
+        if not self._using_redis:
+            return {"backend": "memory", **self._fallback_cache.get_stats()}
+        
+        info = await self._redis_client.info()
+        hits = info.get("keyspace_hits", 0)
+        misses = info.get("keyspace_misses", 0)
+        return {
+            "backend": "redis",
+            "near_cache": self._near_cache.get_stats(),
+            "entries": await self._redis_client.dbsize(),
+            "used_memory_bytes": info.get("used_memory"),
+            "max_memory_bytes": info.get("maxmemory"),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses) * 100, 2) if hits + misses else 0.0,
+            "evictions": info.get("evicted_keys", 0),
+            "expirations": info.get("expired_keys", 0),
+        }
+    
+    # ============ Near Cache ============
+    
+    def _near_cache_ttl(self, key: str) -> Optional[float]:
+        """L1 TTL for a key, or None if it is not near-cached."""
+        if not (self._using_redis and self._near_cache_enabled):
+            return None
+        for prefix, ttl in self.NEAR_CACHE_PREFIXES.items():
+            if key.startswith(prefix):
+                return ttl
+        return None
+    
+    async def _read_through(self, name: str, variant: Any, fetch) -> Any:
+        """Serve a read from the near cache, or fetch it from Redis and keep it."""
+        ttl = self._near_cache_ttl(name)
+        if ttl is None:
+            return await fetch()
+        
+        found, value = self._near_cache.get(name, variant)
+        if found:
+            return value
+        
+        epoch = self._near_cache.epoch
+        value = await fetch()
+        self._near_cache.put(name, variant, value, ttl, epoch)
+        return value
+    
+    async def _read_through_many(self, names: List[str], variant: Any, fetch_many) -> List[Any]:
+        """
+        Like _read_through() for several keys: near-cached ones are served
+        locally and the rest are fetched with one fetch_many(names) call.
+        """
+        values: List[Any] = [None] * len(names)
+        missing = []
+        for i, name in enumerate(names):
+            if self._near_cache_ttl(name) is not None:
+                found, value = self._near_cache.get(name, variant)
+                if found:
+                    values[i] = value
+                    continue
+            missing.append(i)
+        
+        if missing:
+            epoch = self._near_cache.epoch
+            fetched = await fetch_many([names[i] for i in missing])
+            for i, value in zip(missing, fetched):
+                values[i] = value
+                ttl = self._near_cache_ttl(names[i])
+                if ttl is not None:
+                    self._near_cache.put(names[i], variant, value, ttl, epoch)
+        return values
+    
+    async def _invalidate(self, name: str) -> None:
+        """Drop a near-cached key here and in every other worker."""
+        if self._near_cache_ttl(name) is None:
+            return
+        self._near_cache.invalidate(name)
+        try:
+            await self._redis_client.publish(
+                self.INVALIDATION_CHANNEL, f"{self._instance_id}|{name}"
+            )
+        except Exception as e:
+            logger.debug(f"Could not publish cache invalidation for {name}: {e}")
+    
+    async def _listen_for_invalidations(self) -> None:
+        """Drop keys other workers changed. Reconnects on errors."""
+        while True:
+            pubsub = self._redis_client.pubsub()
+            try:
+                await pubsub.subscribe(self.INVALIDATION_CHANNEL)
+                # Invalidations may have been missed while not subscribed
+                self._near_cache.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    origin, _, name = message["data"].partition("|")
+                    if origin != self._instance_id:
+                        self._near_cache.invalidate(name)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e}, resubscribing")
+                self._near_cache.clear()
+                await asyncio.sleep(1)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+    
     @property
     def client(self):
         """Get the cache client (Redis or fallback)."""
@@ -166,7 +651,7 @@ class CacheService:
     
     async def get(self, key: str) -> Optional[str]:
         """Get a value from cache."""
-        return await self.client.get(key)
+        return await self._read_through(key, "get", lambda: self.client.get(key))
     
     async def set(self, key: str, value: str, ttl: int = None) -> None:
         """Set a value in cache with optional TTL."""
@@ -177,10 +662,312 @@ class CacheService:
                 await self.client.set(key, value)
         else:
             await self.client.set(key, value, ttl)
+        await self._invalidate(key)
+    
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """Get several values in one round trip (None for missing keys)."""
+        if not keys:
+            return []
+        return await self._read_through_many(keys, "get", lambda missing: self.client.mget(missing))
+    
+    async def mset(self, mapping: Dict[str, str], ttl: int = None) -> None:
+        """Set several values, all with the same optional TTL, in one round trip."""
+        async with self.pipeline() as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, value, ttl)
     
     async def delete(self, key: str) -> None:
         """Delete a value from cache."""
         await self.client.delete(key)
+        await self._invalidate(key)
+    
+    async def exists(self, key: str) -> bool:
+        """Check whether a key exists."""
+        return bool(await self.client.exists(key))
+    
+    async def expire(self, key: str, ttl: int) -> None:
+        """Set a TTL on an existing key."""
+        await self.client.expire(key, ttl)
+    
+    # ============ Hashes ============
+    
+    async def hget(self, name: str, key: str) -> Optional[str]:
+        """Get a hash field."""
+        return await self._read_through(name, ("hget", key), lambda: self.client.hget(name, key))
+    
+    async def hset(
+        self,
+        name: str,
+        key: Optional[str] = None,
+        value: Optional[str] = None,
+        mapping: Optional[Dict[str, str]] = None
+    ) -> None:
+        """Set a hash field, or several fields from mapping in one command."""
+        await self.client.hset(name, key, value, mapping=mapping)
+        await self._invalidate(name)
+    
+    async def hgetall(self, name: str) -> Dict[str, str]:
+        """Get all fields of a hash."""
+        data = await self._read_through(name, "hgetall", lambda: self.client.hgetall(name))
+        return dict(data) if data else {}
+    
+    async def hgetall_many(self, names: List[str]) -> List[Dict[str, str]]:
+        """Get all fields of several hashes in one round trip."""
+        async with self.pipeline() as pipe:
+            for name in names:
+                pipe.hgetall(name)
+        return [dict(result) if result else {} for result in pipe.results]
+    
+    async def hincrby_many(
+        self,
+        name: str,
+        increments: Dict[str, int],
+        ttl: int = None
+    ) -> None:
+        """
+        Atomically increment several hash fields in one round trip.
+        
+        Each field is a separate HINCRBY, so concurrent writers never lose
+        updates. The TTL, if given, is refreshed on every call.
+        """
+        async with self.pipeline() as pipe:
+            for key, amount in increments.items():
+                pipe.hincrby(name, key, amount)
+            if ttl:
+                pipe.expire(name, ttl)
+    
+    # ============ Sorted Sets ============
+    
+    async def zadd(self, name: str, mapping: Dict[str, float]) -> None:
+        """Add or update members of a sorted set."""
+        await self.client.zadd(name, mapping)
+        await self._invalidate(name)
+    
+    async def zrange(
+        self,
+        name: str,
+        start: int = 0,
+        end: int = -1,
+        withscores: bool = False
+    ) -> List:
+        """Get a range of a sorted set, lowest score first."""
+        items = await self._read_through(
+            name,
+            ("zrange", start, end, withscores),
+            lambda: self.client.zrange(name, start, end, withscores=withscores)
+        )
+        return list(items)
+    
+    async def zrange_many(self, names: List[str], withscores: bool = False) -> List[List]:
+        """Get several whole sorted sets in one round trip."""
+        async def fetch_many(missing: List[str]) -> List[List]:
+            async with self.pipeline() as pipe:
+                for name in missing:
+                    pipe.zrange(name, 0, -1, withscores=withscores)
+            return pipe.results
+        
+        items = await self._read_through_many(names, ("zrange", 0, -1, withscores), fetch_many)
+        return [list(entries) if entries else [] for entries in items]
+    
+    # ============ Pipelines ============
+    
+    @asynccontextmanager
+    async def pipeline(self, transaction: bool = False) -> AsyncIterator[CachePipeline]:
+        """
+        Batch cache commands into one round trip.
+        
+        Commands queued inside the block run when it exits (not at all if it
+        raises); results are then in pipe.results, or call
+        `await pipe.execute()` inside the block to get them earlier. With
+        transaction=True they run atomically (MULTI/EXEC on Redis).
+        
+            async with cache_service.pipeline() as pipe:
+                pipe.set("a", "1", ttl=60).incr("b").expire("b", 60)
+        """
+        pipe = CachePipeline(self, transaction)
+        yield pipe
+        await pipe.execute()
+    
+    # ============ Locks & Single Flight ============
+    
+    async def acquire_lock(self, name: str, ttl: int) -> Optional[str]:
+        """
+        Take a short-lived lock shared by all workers.
+        
+        Returns a token to pass to release_lock(), or None if the lock is
+        held elsewhere. The lock expires after ttl seconds regardless.
+        """
+        token = uuid.uuid4().hex
+        if self._using_redis:
+            acquired = await self.client.set(name, token, nx=True, ex=ttl)
+        else:
+            acquired = await self.client.set_nx(name, token, ttl)
+        return token if acquired else None
+    
+    async def extend_lock(self, name: str, token: str, ttl: int) -> bool:
+        """Reset a lock's expiry to ttl seconds if it is still ours. Returns False if it was lost."""
+        try:
+            if self._using_redis:
+                return bool(await self.client.eval(self._EXTEND_LOCK_SCRIPT, 1, name, token, ttl))
+            if await self.client.get(name) != token:
+                return False
+            await self.client.expire(name, ttl)
+            return True
+        except Exception as e:
+            logger.debug(f"Could not extend lock {name}: {e}")
+            return False
+    
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release a lock taken with acquire_lock(), if it is still ours."""
+        try:
+            if self._using_redis:
+                await self.client.eval(self._RELEASE_LOCK_SCRIPT, 1, name, token)
+            elif await self.client.get(name) == token:
+                await self.client.delete(name)
+        except Exception as e:
+            logger.debug(f"Could not release lock {name}: {e}")
+    
+    async def _lead(self, key: str, work) -> Any:
+        """Run work() as the in-process leader for key; followers share its result."""
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await work()
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Followers re-raise it; do not warn if there are none
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+    
+    async def single_flight(
+        self,
+        key: str,
+        compute,
+        reread=None,
+        lock_ttl: int = SINGLE_FLIGHT_LOCK_TTL,
+        wait_seconds: float = SINGLE_FLIGHT_WAIT_SECONDS
+    ) -> Any:
+        """
+        Run an expensive computation once for all concurrent callers of key.
+        
+        Callers in this process share one call of compute(). Across workers,
+        the first to take the lock computes; the others poll reread()
+        (e.g. a cache read returning None until the winner has stored its
+        result) for up to wait_seconds, then compute themselves.
+        
+        Args:
+            key: Identifies the computation (usually the cache key it fills)
+            compute: Async callable producing the value
+            reread: Async callable returning the value once stored, else None
+        """
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        return await self._lead(key, lambda: self._compute_with_lock(
+            key, compute, reread, lock_ttl, wait_seconds
+        ))
+    
+    async def _compute_with_lock(self, key, compute, reread, lock_ttl, wait_seconds) -> Any:
+        lock_name = f"lock:{key}"
+        token = await self.acquire_lock(lock_name, lock_ttl)
+        
+        if token is None and reread is not None:
+            # Another worker is computing it; wait for its result
+            deadline = time.monotonic() + wait_seconds
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self.SINGLE_FLIGHT_POLL_SECONDS)
+                value = await reread()
+                if value is not None:
+                    return value
+            logger.debug(f"Timed out waiting for {key}, computing it here")
+        
+        try:
+            return await compute()
+        finally:
+            if token:
+                await self.release_lock(lock_name, token)
+    
+    @staticmethod
+    def _encode_fresh(value: str, ttl: int) -> str:
+        return json.dumps({"value": value, "fresh_until": time.time() + ttl})
+    
+    @staticmethod
+    def _decode_fresh(raw: Optional[str]) -> Optional[Tuple[str, float]]:
+        """(value, fresh_until) from a get_or_compute() entry, or None."""
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return data["value"], float(data["fresh_until"])
+        except (ValueError, TypeError, KeyError):
+            return None
+    
+    async def set_with_stale(self, key: str, value: str, ttl: int, stale_ttl: int = 0) -> None:
+        """
+        Store a get_or_compute() entry: fresh for ttl seconds, then served
+        stale for up to stale_ttl more while it is refreshed.
+        """
+        await self.set(key, self._encode_fresh(value, ttl), ttl + stale_ttl)
+    
+    async def get_or_compute(
+        self,
+        key: str,
+        compute,
+        ttl: int,
+        stale_ttl: int = 0,
+        lock_ttl: int = SINGLE_FLIGHT_LOCK_TTL,
+        wait_seconds: float = SINGLE_FLIGHT_WAIT_SECONDS
+    ) -> str:
+        """
+        Read-through cache with single flight and stale-while-revalidate.
+        
+        - Fresh hit: returned as is
+        - Stale hit (within stale_ttl after expiry): one caller across all
+          workers recomputes it; everyone else gets the stale value at once
+        - Miss: one caller computes, concurrent callers wait for its result
+        
+        Args:
+            key: Cache key (entries are stored with set_with_stale())
+            compute: Async callable returning the value as a string
+            ttl: Seconds the value is fresh
+            stale_ttl: Seconds it may be served stale after that
+        """
+        async def compute_and_store() -> str:
+            value = await compute()
+            await self.set_with_stale(key, value, ttl, stale_ttl)
+            return value
+        
+        cached = self._decode_fresh(await self.get(key))
+        if cached is not None:
+            value, fresh_until = cached
+            if time.time() < fresh_until:
+                return value
+            
+            # Stale: refresh here only if nobody else (in any worker) is
+            if key in self._inflight:
+                return value
+            lock_name = f"lock:{key}"
+            token = await self.acquire_lock(lock_name, lock_ttl)
+            if token is None:
+                return value
+            
+            async def refresh() -> str:
+                try:
+                    return await compute_and_store()
+                finally:
+                    await self.release_lock(lock_name, token)
+            return await self._lead(key, refresh)
+        
+        async def reread() -> Optional[str]:
+            # Straight from the backend: the near cache may still hold the miss
+            entry = self._decode_fresh(await self.client.get(key))
+            return entry[0] if entry else None
+        
+        return await self.single_flight(key, compute_and_store, reread, lock_ttl, wait_seconds)
     
     # ============ Cleaner Status Cache ============
     
@@ -214,9 +1001,12 @@ class CacheService:
         return {k: int(v) for k, v in data.items()} if data else {}
     
     async def set_dashboard_stats(self, stats: Dict[str, int]) -> None:
-        """Set all dashboard statistics."""
-        for key, value in stats.items():
-            await self.client.hset(self.DASHBOARD_STATS_KEY, key, str(value))
+        """Set all dashboard statistics in one command."""
+        if stats:
+            await self.hset(
+                self.DASHBOARD_STATS_KEY,
+                mapping={key: str(value) for key, value in stats.items()}
+            )
     
     async def update_dashboard_stat(self, field: str, delta: int = 1) -> int:
         """Increment/decrement a dashboard stat."""
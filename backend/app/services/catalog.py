@@ -0,0 +1,216 @@
+"""
+Catalog Snapshot
+
+Service categories, services, add-ons and subscription plans change a
+few times a month but are read on almost every request. Each process
+keeps one immutable snapshot of the whole catalog in memory:
+
+1. The snapshot is tagged with the catalog version stored in the cache
+   (catalog:version, near-cached so the check is usually a dict lookup)
+2. Reads compare the snapshot's version with the current one and reload
+   the catalog (4 queries) only when it changed
+3. Admin create/update endpoints call bump_catalog_version() after
+   committing, so every worker reloads on its next read
+4. Public endpoints send the version as an ETag and answer 304 Not
+   Modified when the browser already has it
+
+Snapshot rows are plain attribute objects (not ORM instances), safe to
+share between requests and sessions. They expose the same column
+attributes as the models, so pricing code and response schemas
+(from_attributes) work unchanged. Anything that needs to write or follow
+relationships should load the row from the session instead.
+"""
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+
+from app.database import run_db
+from app.models.service import ServiceCategory, Service, AddOn
+from app.models.subscription import SubscriptionPlan
+from app.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_KEY = "catalog:version"
+CATALOG_CACHE_CONTROL = "public, max-age=60"
+
+
+def _snapshot_row(obj: Any, **extra) -> SimpleNamespace:
+    """Copy an ORM row's column values into a detached, read-only-by-convention object."""
+    values = {attr.key: getattr(obj, attr.key) for attr in sa_inspect(obj).mapper.column_attrs}
+    values.update(extra)
+    return SimpleNamespace(**values)
+
+
+def _parse_features(raw: Optional[str]) -> Optional[List[str]]:
+    """Service.features is a JSON array stored as text."""
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return []
+
+
+def _display_order(row) -> tuple:
+    return (row.display_order or 0, row.id)
+
+
+@dataclass
+class CatalogSnapshot:
+    """Immutable view of the catalog at one version."""
+    version: str
+    categories: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    services: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    add_ons: Dict[int, SimpleNamespace] = field(default_factory=dict)
+    plans: Dict[int, SimpleNamespace] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, db: Session, version: str) -> "CatalogSnapshot":
+        categories = {c.id: _snapshot_row(c) for c in db.query(ServiceCategory).all()}
+        services = {}
+        for service in db.query(Service).all():
+            category = categories.get(service.category_id)
+            services[service.id] = _snapshot_row(
+                service,
+                category_name=category.name if category else None,
+                category_slug=category.slug if category else None,
+                features_list=_parse_features(service.features)
+            )
+        add_ons = {a.id: _snapshot_row(a) for a in db.query(AddOn).all()}
+        plans = {p.id: _snapshot_row(p) for p in db.query(SubscriptionPlan).all()}
+        return cls(version, categories, services, add_ons, plans)
+
+    @property
+    def etag(self) -> str:
+        return f'W/"catalog-{self.version}"'
+
+    # ============ Lookups ============
+
+    def active_categories(self) -> List[SimpleNamespace]:
+        return sorted((c for c in self.categories.values() if c.is_active), key=_display_order)
+
+    def active_services(
+        self,
+        category_slug: Optional[str] = None,
+        featured: Optional[bool] = None
+    ) -> List[SimpleNamespace]:
+        services = [
+            s for s in self.services.values()
+            if s.is_active
+            and (category_slug is None or s.category_slug == category_slug)
+            and (featured is None or s.is_featured == featured)
+        ]
+        return sorted(services, key=_display_order)
+
+    def get_service(self, service_id: int, active_only: bool = True) -> Optional[SimpleNamespace]:
+        service = self.services.get(service_id)
+        if service is None or (active_only and not service.is_active):
+            return None
+        return service
+
+    def active_add_ons(self, add_on_ids: Optional[Iterable[int]] = None) -> List[SimpleNamespace]:
+        """Active add-ons in display order, optionally only the given ids."""
+        wanted = set(add_on_ids) if add_on_ids is not None else None
+        add_ons = [
+            a for a in self.add_ons.values()
+            if a.is_active and (wanted is None or a.id in wanted)
+        ]
+        return sorted(add_ons, key=_display_order)
+
+    def active_plans(self) -> List[SimpleNamespace]:
+        return sorted((p for p in self.plans.values() if p.is_active), key=_display_order)
+
+    def get_plan(self, plan_id: int) -> Optional[SimpleNamespace]:
+        return self.plans.get(plan_id)
+
+    def get_plan_by_slug(self, slug: str) -> Optional[SimpleNamespace]:
+        return next((p for p in self.plans.values() if p.slug == slug), None)
+
+
+class CatalogCache:
+    """
+    Holds this process's catalog snapshot and reloads it when the version changes.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    async def get(self, db) -> CatalogSnapshot:
+        """
+        Current snapshot, reloaded first if another worker bumped the version.
+
+        Accepts a Session or an AsyncSession.
+        """
+        try:
+            version = await cache_service.get(CATALOG_VERSION_KEY)
+            if version is None:
+                version = uuid.uuid4().hex
+                await cache_service.set(CATALOG_VERSION_KEY, version)
+        except Exception as e:
+            logger.debug(f"Could not read catalog version: {e}")
+            version = self._snapshot.version if self._snapshot else uuid.uuid4().hex
+
+        if self._snapshot is None or self._snapshot.version != version:
+            self._snapshot = await run_db(db, CatalogSnapshot.load, version)
+            logger.info(f"Loaded catalog snapshot {version}")
+        return self._snapshot
+
+    def get_loaded(self, db: Session) -> CatalogSnapshot:
+        """
+        Snapshot for synchronous callers.
+
+        Does not check the version (that needs the cache), so the snapshot
+        may be older than the catalog until an async read reloads it. Use it
+        for display only; write paths load the rows they act on from the
+        session.
+        """
+        if self._snapshot is None:
+            self._snapshot = CatalogSnapshot.load(db, uuid.uuid4().hex)
+        return self._snapshot
+
+    async def bump_version(self) -> str:
+        """Mark the catalog as changed. Call after committing a catalog write."""
+        version = uuid.uuid4().hex
+        self._snapshot = None
+        try:
+            await cache_service.set(CATALOG_VERSION_KEY, version)
+        except Exception as e:
+            logger.warning(f"Could not bump catalog version: {e}")
+        return version
+
+
+# Global catalog cache
+catalog_cache = CatalogCache()
+
+
+async def get_catalog(db) -> CatalogSnapshot:
+    """Current catalog snapshot."""
+    return await catalog_cache.get(db)
+
+
+async def bump_catalog_version() -> str:
+    """Invalidate every worker's catalog snapshot."""
+    return await catalog_cache.bump_version()
+
+
+def not_modified(request: Request, response: Response, catalog: CatalogSnapshot) -> Optional[Response]:
+    """
+    Tag a public catalog response with the catalog's ETag.
+
+    Returns a 304 response to send instead if the client already has this
+    version (If-None-Match), otherwise None.
+    """
+    headers = {"ETag": catalog.etag, "Cache-Control": CATALOG_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if catalog.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -2,22 +2,27 @@
 Automatic Cleaner Assignment Service
 
 Assigns cleaners to bookings automatically based on:
-1. Region match (cleaner region = booking address city/region)
+1. Region match (cleaner region = booking address region, from coordinates or city)
 2. Account status (ACTIVE only)
 3. Workload balance (prefer fewer bookings that day)
 4. Time conflict check (no overlapping bookings)
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, contains_eager, selectinload
+from sqlalchemy import func, and_, or_, not_
 from datetime import datetime, timedelta
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict, Iterable, Any
 import logging
 
 from app.models.employee import Employee, EmployeeAccountStatus, RegionCode
 from app.models.booking import Booking, BookingStatus
+from app.models.user import Address
+from app.services.spatial_index import spatial_index
+from app.services.allocation_locks import lock_cleaners, lock_unassigned_booking
 
 logger = logging.getLogger(__name__)
 
+BACKLOG_CANDIDATES_PER_JOB = 5  # Bookings locked per job a backlog run may assign
+
 
 # City to Region mapping for UAE
 CITY_REGION_MAP = {
@@ -42,6 +47,34 @@ def get_region_from_city(city: str) -> Optional[str]:
     return CITY_REGION_MAP.get(city_lower)
 
 
+def resolve_region(
+    city: Optional[str],
+    latitude: Optional[Any] = None,
+    longitude: Optional[Any] = None
+) -> Optional[str]:
+    """
+    Map a location to a region code.
+
+    A known city wins: the spatial index only approximates regions by
+    their nearest anchor, which puts border districts (e.g. Al Qusais or
+    Mirdif in Dubai) in the neighbouring emirate. Coordinates are used
+    when the city is missing or not in CITY_REGION_MAP.
+    """
+    region = get_region_from_city(city)
+    if region:
+        return region
+    if latitude is not None and longitude is not None:
+        return spatial_index.region_for_point(float(latitude), float(longitude))
+    return None
+
+
+def get_address_region(address) -> Optional[str]:
+    """Region code for an Address (city first, then coordinates)."""
+    if not address:
+        return None
+    return resolve_region(address.city, address.latitude, address.longitude)
+
+
 def find_available_cleaners(
     region_code: str,
     scheduled_date: datetime,
@@ -121,6 +154,74 @@ def has_time_conflict(
     return False
 
 
+def get_cleaner_busy_intervals(
+    window_start: datetime,
+    window_end: datetime,
+    db: Session,
+    cleaner_ids: Optional[Iterable[Any]] = None,
+    exclude_booking_id: Optional[int] = None
+) -> Dict[Any, List[Tuple[datetime, datetime]]]:
+    """
+    Load the busy intervals of many cleaners for a time window in one query.
+
+    Returns a map of cleaner ID -> [(start, end), ...] containing only the
+    bookings that overlap [window_start, window_end). Uses the same overlap
+    rule and default duration as has_time_conflict, so a cleaner is free
+    for the window exactly when it has no entry in the map.
+
+    Args:
+        window_start: Start of the window to check
+        window_end: End of the window to check
+        db: Database session
+        cleaner_ids: Restrict to these employees (None = every assigned booking)
+        exclude_booking_id: Booking to ignore (e.g. the one being allocated)
+    """
+    default_duration = timedelta(hours=2.5)
+
+    query = db.query(
+        Booking.assigned_employee_id,
+        Booking.scheduled_date,
+        Booking.scheduled_end_time
+    ).filter(
+        Booking.assigned_employee_id != None,
+        Booking.status.notin_([BookingStatus.CANCELLED, BookingStatus.NO_SHOW]),
+        Booking.scheduled_date < window_end,
+        or_(
+            Booking.scheduled_end_time > window_start,
+            and_(
+                Booking.scheduled_end_time == None,
+                Booking.scheduled_date > window_start - default_duration
+            )
+        )
+    )
+
+    if cleaner_ids is not None:
+        cleaner_ids = list(cleaner_ids)
+        if not cleaner_ids:
+            return {}
+        query = query.filter(Booking.assigned_employee_id.in_(cleaner_ids))
+
+    if exclude_booking_id:
+        query = query.filter(Booking.id != exclude_booking_id)
+
+    intervals: Dict[Any, List[Tuple[datetime, datetime]]] = {}
+    for employee_id, start, end in query.all():
+        end = end or (start + default_duration)
+        if end > window_start:
+            intervals.setdefault(employee_id, []).append((start, end))
+
+    return intervals
+
+
+def intervals_overlap(
+    intervals: List[Tuple[datetime, datetime]],
+    start: datetime,
+    end: datetime
+) -> bool:
+    """Check whether [start, end) overlaps any of the given busy intervals."""
+    return any(busy_start < end and busy_end > start for busy_start, busy_end in intervals)
+
+
 def select_best_cleaner(
     cleaners: List[Employee],
     scheduled_date: datetime,
@@ -183,7 +284,7 @@ def auto_assign_cleaner(
         return None
     
     city = booking.address.city
-    region_code = get_region_from_city(city)
+    region_code = get_address_region(booking.address)
     
     if not region_code:
         logger.warning(f"Unknown city '{city}' for booking {booking.id}, cannot determine region")
@@ -213,6 +314,17 @@ def auto_assign_cleaner(
     )
     
     if assigned_cleaner:
+        # Lock the booking and cleaner, then re-check under the lock
+        if not lock_unassigned_booking(db, booking.id):
+            db.rollback()
+            logger.info(f"Booking {booking.id} was assigned by another worker")
+            return None
+        lock_cleaners(db, [assigned_cleaner.id])
+        if has_time_conflict(assigned_cleaner.id, booking.scheduled_date, duration_hours, db, booking.id):
+            db.rollback()
+            logger.warning(f"Cleaner {assigned_cleaner.id} was booked concurrently for booking {booking.id}")
+            return None
+
         # Assign the cleaner to the booking
         booking.assigned_employee_id = assigned_cleaner.id
         db.commit()
@@ -226,6 +338,52 @@ def auto_assign_cleaner(
     return None
 
 
+def _in_region_box(region_code: str):
+    """Address coordinates inside the region's bounding box (None if the region has no anchors)."""
+    bounds = spatial_index.region_bounds(region_code)
+    if not bounds:
+        return None
+    min_lat, max_lat, min_lon, max_lon = bounds
+    return and_(
+        Address.latitude.between(min_lat, max_lat),
+        Address.longitude.between(min_lon, max_lon)
+    )
+
+
+def address_region_filter(region_code: str, include_unknown: bool = False):
+    """
+    SQL prefilter on Address for addresses that resolve (as in
+    resolve_region) to region_code, and with include_unknown also to no
+    region:
+    - a city that maps to the region, or
+    - a missing or unmapped city with coordinates in the region's box;
+      with include_unknown also no coordinates, or coordinates outside
+      every region's box
+    Boxes overlap, so this is a superset; confirm with get_address_region().
+    """
+    city = func.lower(func.trim(Address.city))
+    by_coordinates = []
+    own_box = _in_region_box(region_code)
+    if own_box is not None:
+        by_coordinates.append(own_box)
+    if include_unknown:
+        other_boxes = [
+            box for box in (_in_region_box(code) for code in set(CITY_REGION_MAP.values()) if code != region_code)
+            if box is not None
+        ]
+        by_coordinates += [Address.latitude == None, Address.longitude == None]
+        if other_boxes:
+            by_coordinates.append(not_(or_(*other_boxes)))
+
+    clauses = [city.in_([name for name, region in CITY_REGION_MAP.items() if region == region_code])]
+    if by_coordinates:
+        clauses.append(and_(
+            or_(Address.city == None, city.notin_(list(CITY_REGION_MAP))),
+            or_(*by_coordinates)
+        ))
+    return or_(*clauses)
+
+
 def assign_backlog_to_cleaner(
     cleaner: Employee,
     db: Session,
@@ -234,6 +392,10 @@ def assign_backlog_to_cleaner(
     """
     Attempt to assign unassigned bookings to this specific cleaner.
     Useful when a new cleaner is added or becomes active.
+
+    Only the oldest BACKLOG_CANDIDATES_PER_JOB × limit bookings that may be
+    in the cleaner's region are locked and considered, and the cleaner's
+    bookings over their time span are loaded once and checked in memory.
     
     Args:
         cleaner: The employee to assign jobs to
@@ -245,14 +407,44 @@ def assign_backlog_to_cleaner(
     """
     if cleaner.account_status != EmployeeAccountStatus.ACTIVE:
         return 0
-        
-    # Find active unassigned bookings
-    # Priority: Older bookings first
-    bookings = db.query(Booking).filter(
+
+    # Hold the cleaner's lock for the whole run so concurrent allocators
+    # cannot book them in between the conflict checks and the commit
+    lock_cleaners(db, [cleaner.id])
+
+    # Find active unassigned bookings that may be in the cleaner's region,
+    # skipping rows other workers hold. Priority: Older bookings first
+    bookings = db.query(Booking).join(
+        Address, Address.id == Booking.address_id
+    ).options(
+        contains_eager(Booking.address), selectinload(Booking.service)
+    ).filter(
         Booking.assigned_employee_id == None,
-        Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.IN_PROGRESS])
-    ).order_by(Booking.scheduled_date.asc()).all()
-    
+        Booking.status.in_([BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.IN_PROGRESS]),
+        address_region_filter(cleaner.region_code, include_unknown=True)
+    ).order_by(
+        Booking.scheduled_date.asc(), Booking.id.asc()
+    ).limit(limit * BACKLOG_CANDIDATES_PER_JOB).with_for_update(skip_locked=True, of=Booking).all()
+
+    if not bookings:
+        db.rollback()
+        return 0
+
+    # Each booking lasts its service's duration (2.5 hours if not set)
+    intervals = {}
+    for booking in bookings:
+        service = booking.service
+        duration = float(service.base_duration_hours or 2.5) if service else 2.5
+        intervals[booking.id] = (booking.scheduled_date, booking.scheduled_date + timedelta(hours=duration))
+
+    # The cleaner's existing bookings over the candidates' span, in one query
+    busy = get_cleaner_busy_intervals(
+        bookings[0].scheduled_date,
+        max(end for _, end in intervals.values()),
+        db,
+        cleaner_ids=[cleaner.id]
+    ).get(cleaner.id, [])
+
     assigned_count = 0
     
     for booking in bookings:
@@ -260,24 +452,20 @@ def assign_backlog_to_cleaner(
             break
             
         # Check region match
-        # If booking has address, check if it matches cleaner's region
-        if booking.address and booking.address.city:
-            region = get_region_from_city(booking.address.city)
-            # If region is known and doesn't match, skip
-            # If region is unknown (None), we allow assignment (fallback behavior)
-            if region and region != cleaner.region_code:
-                continue
+        region = get_address_region(booking.address)
+        # If region is known and doesn't match, skip
+        # If region is unknown (None), we allow assignment (fallback behavior)
+        if region and region != cleaner.region_code:
+            continue
         
         # Check for time conflicts
-        # Default to 2.5 hours if not specified
-        duration = 2.5 
-        # TODO: Get actual duration from service/booking
-        
-        if has_time_conflict(cleaner.id, booking.scheduled_date, duration, db):
+        start, end = intervals[booking.id]
+        if intervals_overlap(busy, start, end):
             continue
             
-        # Assign the booking
+        # Assign the booking, and count it as busy for the next candidates
         booking.assigned_employee_id = cleaner.id
+        busy.append((start, end))
         # If it was pending, maybe confirm it? Keeping status as is for now.
         
         assigned_count += 1
@@ -288,5 +476,8 @@ def assign_backlog_to_cleaner(
     
     if assigned_count > 0:
         db.commit()
+    else:
+        # Release the locks
+        db.rollback()
         
     return assigned_count
@@ -0,0 +1,69 @@
+"""
+Cleaner Live Location Store
+
+Latest GPS position reported by each cleaner's mobile app, kept in one
+cache hash so allocation can read every position with a single call.
+Positions older than MAX_LOCATION_AGE_SECONDS are ignored and callers
+fall back to the region centre.
+"""
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from app.services.cache import cache_service
+from app.services.spatial_index import spatial_index
+
+logger = logging.getLogger(__name__)
+
+CLEANER_LOCATIONS_KEY = "cleaner:locations"
+MAX_LOCATION_AGE_SECONDS = 900  # 15 minutes
+
+
+async def update_cleaner_location(
+    employee_id,
+    latitude: float,
+    longitude: float,
+    timestamp: Optional[float] = None
+) -> None:
+    """Record a cleaner's current position."""
+    reported_at = timestamp if timestamp is not None else time.time()
+    await cache_service.hset(
+        CLEANER_LOCATIONS_KEY,
+        str(employee_id),
+        f"{latitude:.6f},{longitude:.6f},{reported_at:.0f}"
+    )
+    spatial_index.update_cleaner(employee_id, latitude, longitude)
+
+
+async def get_cleaner_locations(
+    employee_ids: Optional[Iterable] = None,
+    max_age_seconds: int = MAX_LOCATION_AGE_SECONDS
+) -> Dict[str, Tuple[float, float]]:
+    """
+    Get fresh cleaner positions keyed by employee id (as string).
+
+    Args:
+        employee_ids: Restrict to these employees (all if None)
+        max_age_seconds: Ignore positions reported longer ago than this
+    """
+    try:
+        raw = await cache_service.hgetall(CLEANER_LOCATIONS_KEY)
+    except Exception as e:
+        logger.debug(f"Could not read cleaner locations: {e}")
+        return {}
+
+    wanted = {str(eid) for eid in employee_ids} if employee_ids is not None else None
+    cutoff = time.time() - max_age_seconds
+    locations = {}
+
+    for employee_id, value in raw.items():
+        if wanted is not None and employee_id not in wanted:
+            continue
+        try:
+            lat, lon, reported_at = (float(part) for part in value.split(","))
+        except ValueError:
+            continue
+        if reported_at >= cutoff:
+            locations[employee_id] = (lat, lon)
+
+    return locations
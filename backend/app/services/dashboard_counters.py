@@ -0,0 +1,305 @@
+"""
+Dashboard Counters
+
+The admin realtime stats are kept as counters in one cache hash
+(dashboard:stats) instead of being counted from the database on every
+poll:
+
+1. Job and cleaner events (created, status transitions, online/offline)
+   move the affected counters with atomic HINCRBYs as they happen
+2. Every DASHBOARD_RECONCILE_SECONDS one worker recounts everything from
+   the database and rewrites the hash, correcting any drift (missed
+   events, changes made outside the API, restarts)
+3. /admin/stats/realtime is a single HGETALL
+
+Delayed jobs become delayed by the clock passing, not by an event, so
+delayed_jobs is only refreshed by reconciliation. Completed jobs and
+revenue are counted per day (completed:<date>, revenue_cents:<date>),
+so today's figures start from zero at midnight UTC without a reset.
+
+An increment that lands while a reconciliation is rewriting the hash may
+be lost or counted twice; the next reconciliation corrects it.
+"""
+import logging
+import time
+from datetime import datetime, timezone, timedelta, date
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import run_db
+from app.models import Booking, BookingStatus, CleanerProfile, CleanerStatus
+from app.services.cache import cache_service
+from app.services.events import Event, EventType, event_publisher
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_STATS_KEY = cache_service.DASHBOARD_STATS_KEY
+RECONCILE_LOCK_KEY = "lock:dashboard:reconcile"
+SLA_GRACE = timedelta(minutes=10)
+
+ACTIVE_STATUSES = {BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS, BookingStatus.PAUSED}
+PENDING_STATUSES = {BookingStatus.PENDING_ASSIGNMENT, BookingStatus.CONFIRMED}
+
+JOB_EVENTS = {
+    EventType.JOB_CREATED, EventType.JOB_ASSIGNED, EventType.JOB_STARTED,
+    EventType.JOB_PAUSED, EventType.JOB_RESUMED, EventType.JOB_COMPLETED,
+    EventType.JOB_CANCELLED, EventType.JOB_FAILED,
+}
+CLEANER_EVENTS = {
+    EventType.CLEANER_ONLINE, EventType.CLEANER_OFFLINE, EventType.CLEANER_STATUS_CHANGED,
+}
+
+
+def _booking_field(status: Optional[BookingStatus]) -> Optional[str]:
+    if status in ACTIVE_STATUSES:
+        return "active_jobs"
+    if status in PENDING_STATUSES:
+        return "pending_assignment"
+    return None
+
+
+def _cleaner_field(status: Optional[CleanerStatus]) -> Optional[str]:
+    if status == CleanerStatus.AVAILABLE:
+        return "available_cleaners"
+    if status == CleanerStatus.BUSY:
+        return "busy_cleaners"
+    return None
+
+
+def _parse_status(enum_cls, value):
+    """Enum member from an enum or its value; None if missing or unknown."""
+    if value is None or isinstance(value, enum_cls):
+        return value
+    try:
+        return enum_cls(value)
+    except ValueError:
+        return None
+
+
+def _to_cents(amount) -> int:
+    return int((Decimal(str(amount or 0)) * 100).quantize(Decimal("1")))
+
+
+def _shift(increments: Dict[str, int], old_field: Optional[str], new_field: Optional[str]) -> None:
+    if old_field == new_field:
+        return
+    if old_field:
+        increments[old_field] = increments.get(old_field, 0) - 1
+    if new_field:
+        increments[new_field] = increments.get(new_field, 0) + 1
+
+
+async def record_booking_status_change(
+    old_status: Optional[BookingStatus],
+    new_status: BookingStatus,
+    total_price: Any = None,
+    completed_at: Optional[datetime] = None
+) -> None:
+    """Move the counters for one booking changing status (old_status None = new booking)."""
+    increments: Dict[str, int] = {}
+    _shift(increments, _booking_field(old_status), _booking_field(new_status))
+
+    if new_status == BookingStatus.COMPLETED and old_status != BookingStatus.COMPLETED:
+        day = (completed_at or datetime.now(timezone.utc)).date().isoformat()
+        increments[f"completed:{day}"] = 1
+        increments[f"revenue_cents:{day}"] = _to_cents(total_price)
+
+    if increments:
+        await cache_service.hincrby_many(DASHBOARD_STATS_KEY, increments)
+
+
+async def record_cleaner_status_change(
+    old_status: Optional[CleanerStatus],
+    new_status: CleanerStatus,
+    count: int = 1
+) -> None:
+    """Move the counters for `count` cleaners changing status."""
+    increments: Dict[str, int] = {}
+    _shift(increments, _cleaner_field(old_status), _cleaner_field(new_status))
+    if increments:
+        await cache_service.hincrby_many(
+            DASHBOARD_STATS_KEY, {field: delta * count for field, delta in increments.items()}
+        )
+
+
+async def handle_event(event: Event) -> None:
+    """
+    Event subscriber keeping the counters in step with job and cleaner changes.
+
+    Only events carrying both the new status and the previous one (or job
+    creation) move counters; anything else is left to reconciliation.
+    """
+    payload = event.payload
+    try:
+        if event.type in JOB_EVENTS:
+            new_status = _parse_status(BookingStatus, payload.get("status"))
+            if new_status is None:
+                return
+            if event.type == EventType.JOB_CREATED:
+                old_status = None
+            elif "previous_status" in payload:
+                old_status = _parse_status(BookingStatus, payload["previous_status"])
+            else:
+                return
+            completed_at = payload.get("completed_at")
+            await record_booking_status_change(
+                old_status,
+                new_status,
+                total_price=payload.get("total_price"),
+                completed_at=datetime.fromisoformat(completed_at) if completed_at else None
+            )
+
+        elif event.type in CLEANER_EVENTS:
+            new_status = _parse_status(CleanerStatus, payload.get("status"))
+            if new_status is None or "previous_status" not in payload:
+                return
+            await record_cleaner_status_change(
+                _parse_status(CleanerStatus, payload["previous_status"]), new_status
+            )
+    except Exception as e:
+        logger.debug(f"Could not update dashboard counters for {event.type.value}: {e}")
+
+
+_subscribed = False
+
+
+def subscribe() -> None:
+    """Keep the counters up to date from this process's events (idempotent)."""
+    global _subscribed
+    if _subscribed:
+        return
+    for event_type in JOB_EVENTS | CLEANER_EVENTS:
+        event_publisher.subscribe(event_type, handle_event)
+    _subscribed = True
+
+
+def count_dashboard_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Count the dashboard stats from the database (the slow path)."""
+    now = now or datetime.now(timezone.utc)
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    active_jobs = db.query(func.count(Booking.id)).filter(
+        Booking.status.in_(ACTIVE_STATUSES)
+    ).scalar()
+
+    available_cleaners = db.query(func.count(CleanerProfile.id)).filter(
+        CleanerProfile.status == CleanerStatus.AVAILABLE
+    ).scalar()
+
+    busy_cleaners = db.query(func.count(CleanerProfile.id)).filter(
+        CleanerProfile.status == CleanerStatus.BUSY
+    ).scalar()
+
+    delayed_jobs = db.query(func.count(Booking.id)).filter(
+        Booking.status.in_([BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS]),
+        or_(
+            Booking.sla_deadline < now,
+            Booking.scheduled_date + SLA_GRACE < now
+        )
+    ).scalar()
+
+    pending_assignment = db.query(func.count(Booking.id)).filter(
+        Booking.status.in_(PENDING_STATUSES)
+    ).scalar()
+
+    completed_today, revenue_today = db.query(
+        func.count(Booking.id), func.sum(Booking.total_price)
+    ).filter(
+        Booking.status == BookingStatus.COMPLETED,
+        Booking.actual_end_time >= today_start
+    ).one()
+
+    return {
+        "active_jobs_count": active_jobs or 0,
+        "available_cleaners_count": available_cleaners or 0,
+        "busy_cleaners_count": busy_cleaners or 0,
+        "delayed_jobs_count": delayed_jobs or 0,
+        "pending_assignment_count": pending_assignment or 0,
+        "completed_today_count": completed_today or 0,
+        "revenue_today": float(revenue_today or 0),
+    }
+
+
+def _to_counters(stats: Dict[str, Any], day: date) -> Dict[str, int]:
+    return {
+        "active_jobs": stats["active_jobs_count"],
+        "available_cleaners": stats["available_cleaners_count"],
+        "busy_cleaners": stats["busy_cleaners_count"],
+        "delayed_jobs": stats["delayed_jobs_count"],
+        "pending_assignment": stats["pending_assignment_count"],
+        f"completed:{day.isoformat()}": stats["completed_today_count"],
+        f"revenue_cents:{day.isoformat()}": _to_cents(stats["revenue_today"]),
+    }
+
+
+def _from_counters(counters: Dict[str, str], day: date) -> Dict[str, Any]:
+    values = {field: int(value) for field, value in counters.items()}
+    return {
+        "active_jobs_count": max(values.get("active_jobs", 0), 0),
+        "available_cleaners_count": max(values.get("available_cleaners", 0), 0),
+        "busy_cleaners_count": max(values.get("busy_cleaners", 0), 0),
+        "delayed_jobs_count": max(values.get("delayed_jobs", 0), 0),
+        "pending_assignment_count": max(values.get("pending_assignment", 0), 0),
+        "completed_today_count": values.get(f"completed:{day.isoformat()}", 0),
+        "revenue_today": values.get(f"revenue_cents:{day.isoformat()}", 0) / 100,
+    }
+
+
+async def get_dashboard_counters() -> Optional[Dict[str, Any]]:
+    """
+    Current dashboard stats from the counters (one cache read).
+
+    Returns None if the counters have not been built yet (or were lost),
+    in which case the caller should reconcile.
+    """
+    counters = await cache_service.hgetall(DASHBOARD_STATS_KEY)
+    if "reconciled_at" not in counters:
+        return None
+    return _from_counters(counters, datetime.now(timezone.utc).date())
+
+
+async def reconcile_dashboard_counters(db) -> Dict[str, Any]:
+    """
+    Recount the stats from the database and overwrite the counters with them.
+
+    Accepts a Session or an AsyncSession.
+    """
+    now = datetime.now(timezone.utc)
+    stats = await run_db(db, count_dashboard_stats, now)
+    counters = _to_counters(stats, now.date())
+
+    previous = await cache_service.hgetall(DASHBOARD_STATS_KEY)
+    if "reconciled_at" in previous:
+        drift = {
+            field: value - int(previous.get(field, 0))
+            for field, value in counters.items()
+            if field != "delayed_jobs" and value != int(previous.get(field, 0))
+        }
+        if drift:
+            logger.info(f"Dashboard counters drifted, corrected by {drift}")
+
+    counters["reconciled_at"] = int(time.time())
+    async with cache_service.pipeline(transaction=True) as pipe:
+        pipe.delete(DASHBOARD_STATS_KEY)
+        pipe.hset(DASHBOARD_STATS_KEY, mapping={field: str(value) for field, value in counters.items()})
+    return stats
+
+
+async def reconcile_if_due(db: Session) -> bool:
+    """
+    Reconcile unless another worker did within the interval.
+
+    Returns True if this call reconciled.
+    """
+    token = await cache_service.acquire_lock(
+        RECONCILE_LOCK_KEY, max(settings.DASHBOARD_RECONCILE_SECONDS - 1, 1)
+    )
+    if token is None:
+        return False
+    # The lock is left to expire, so it also spaces reconciliations out
+    await reconcile_dashboard_counters(db)
+    return True
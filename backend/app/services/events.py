@@ -28,6 +28,7 @@ class EventType(str, Enum):
     JOB_CANCELLED = "job.cancelled"
     JOB_FAILED = "job.failed"
     JOB_DELAYED = "job.delayed"
+    JOB_ALLOCATION_FAILED = "job.allocation_failed"  # Allocation queue gave up on the booking
     
     # Cleaner events
     CLEANER_ONLINE = "cleaner.online"
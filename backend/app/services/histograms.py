@@ -0,0 +1,46 @@
+"""
+Bucketed Histograms
+
+Helpers for the fixed-bucket latency histograms kept as cache hash fields
+(allocation metrics, event loop lag). Each observation increments the
+field of the first bucket whose upper bound it does not exceed;
+percentiles are estimated from the bucket counts.
+"""
+from typing import Dict, List, Optional
+
+OVERFLOW_BUCKET = "inf"  # Field suffix of the open-ended last bucket
+
+
+def latency_bucket(time_ms: float, buckets: List[int]) -> str:
+    """Histogram field suffix for a duration, given the buckets' upper bounds (ms)."""
+    for bound in buckets:
+        if time_ms <= bound:
+            return str(bound)
+    return OVERFLOW_BUCKET
+
+
+def histogram_percentile(
+    histogram: Dict[str, int],
+    percentile: float,
+    buckets: List[int]
+) -> Optional[float]:
+    """
+    Estimate a percentile from bucket counts.
+
+    Interpolates linearly inside the bucket the percentile falls in. Values
+    in the open-ended bucket are reported as its lower bound.
+    """
+    total = sum(histogram.values())
+    if total == 0:
+        return None
+
+    rank = percentile / 100 * total
+    seen = 0
+    lower = 0.0
+    for bound in buckets:
+        count = histogram.get(str(bound), 0)
+        if count and seen + count >= rank:
+            return round(lower + (bound - lower) * (rank - seen) / count, 1)
+        seen += count
+        lower = float(bound)
+    return lower
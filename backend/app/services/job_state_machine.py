@@ -195,11 +195,34 @@ class JobStateMachine:
         self.db.commit()
         self.db.refresh(job)
 
+        # Completed cleaners move to the back of the allocation queue
+        if new_status == BookingStatus.COMPLETED and job.assigned_employee_id:
+            self._touch_allocation_queue(job)
+
         # Publish event for the transition (async in background)
         self._publish_transition_event(job, current_status, new_status, actor)
 
         return job
 
+    def _touch_allocation_queue(self, job: Booking) -> None:
+        """Update the employee's allocation queue score (fire-and-forget)."""
+        import asyncio
+        from app.services.allocation_engine import touch_cleaner_queue
+
+        employee = job.assigned_employee
+        if not employee:
+            return
+
+        coro = touch_cleaner_queue(employee.region_code, employee.id, job.actual_end_time)
+        try:
+            loop = asyncio.get_event_loop()
+            if loop.is_running():
+                asyncio.create_task(coro)
+            else:
+                loop.run_until_complete(coro)
+        except RuntimeError:
+            asyncio.run(coro)
+
     def _publish_transition_event(
         self,
         job: Booking,
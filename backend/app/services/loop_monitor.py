@@ -0,0 +1,301 @@
+"""
+Event Loop Lag Monitor
+
+Requests and the background loops share one event loop per worker, so
+anything synchronous they run (queries on the sync Session, Stripe SDK
+calls, bcrypt) delays everything else in that worker.
+
+1. A sampler task sleeps LOOP_LAG_INTERVAL_SECONDS at a time and records
+   how late it wakes up: the scheduling delay every coroutine saw
+2. Samples are counted in fixed lag buckets and flushed to a per-day
+   cache hash (loop_lag:counters:{date}) with HINCRBYs, so the admin
+   endpoint covers all workers; p50/p95/p99 are estimated from it
+3. In debug mode (LOOP_MONITOR_DEBUG) a watchdog thread pings the loop;
+   when a ping is not answered within LOOP_BLOCK_THRESHOLD_MS it captures
+   the loop thread's stack and the running request ("GET /api/...") or
+   background task, and logs the report once the loop is free again.
+   Recent reports are kept per worker.
+
+Requests are labelled by LoopMonitorMiddleware; tasks they start inherit
+the label. Background tasks are reported by their task name.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional
+from weakref import WeakKeyDictionary
+
+from app.config import settings
+from app.services.histograms import OVERFLOW_BUCKET, histogram_percentile, latency_bucket
+from app.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+LAG_KEY = "loop_lag:counters:{date}"
+LAG_TTL_SECONDS = 7 * 86400
+FLUSH_INTERVAL_SECONDS = 10
+MAX_BLOCK_REPORTS = 50
+
+# Upper bounds (ms) of the lag buckets; the last bucket is open-ended
+LAG_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+# Label of the request (or other unit of work) running in the current context
+_current_operation: ContextVar[Optional[str]] = ContextVar("loop_operation", default=None)
+
+
+@dataclass
+class BlockReport:
+    """One occasion the loop was held longer than the threshold."""
+    operation: str
+    blocked_ms: float
+    detected_at: str
+    stack: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class LoopLagMonitor:
+    """
+    Measures event loop lag for the running worker.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._sampler: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._previous_task_factory = None
+        self._task_labels: "WeakKeyDictionary[asyncio.Task, str]" = WeakKeyDictionary()
+        self._pending: Dict[str, int] = {}
+        self._samples = 0
+        self._last_lag_ms = 0.0
+        self._max_lag_ms = 0.0
+        self._blocks: Deque[BlockReport] = deque(maxlen=MAX_BLOCK_REPORTS)
+
+    @property
+    def debug(self) -> bool:
+        return self._watchdog is not None
+
+    async def start(self):
+        """Start sampling (and the watchdog in debug mode) on the running loop."""
+        if self._sampler is not None:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopping.clear()
+        self._sampler = asyncio.create_task(self._run_sampler(), name="loop_lag_monitor")
+
+        if settings.LOOP_MONITOR_DEBUG:
+            self._previous_task_factory = self._loop.get_task_factory()
+            self._loop.set_task_factory(self._task_factory)
+            self._watchdog = threading.Thread(target=self._run_watchdog, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+        logger.info(
+            f"Loop lag monitor started (debug={settings.LOOP_MONITOR_DEBUG}, "
+            f"threshold={settings.LOOP_BLOCK_THRESHOLD_MS}ms)"
+        )
+
+    async def stop(self):
+        """Stop sampling and flush the remaining counts."""
+        self._stopping.set()
+        if self._sampler is not None:
+            self._sampler.cancel()
+            await asyncio.gather(self._sampler, return_exceptions=True)
+            self._sampler = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+            self._loop.set_task_factory(self._previous_task_factory)
+        await self.flush()
+
+    def record(self, lag_ms: float):
+        """Count one lag sample."""
+        lag_ms = max(lag_ms, 0.0)
+        self._samples += 1
+        self._last_lag_ms = lag_ms
+        self._max_lag_ms = max(self._max_lag_ms, lag_ms)
+
+        pending = self._pending
+        pending["samples"] = pending.get("samples", 0) + 1
+        pending["lag_us_total"] = pending.get("lag_us_total", 0) + int(lag_ms * 1000)
+        field = f"lat:{latency_bucket(lag_ms, LAG_BUCKETS_MS)}"
+        pending[field] = pending.get(field, 0) + 1
+
+    async def flush(self):
+        """Add the counts gathered since the last flush to today's hash."""
+        if not self._pending:
+            return
+        increments, self._pending = self._pending, {}
+        date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            await cache_service.hincrby_many(LAG_KEY.format(date=date_str), increments, ttl=LAG_TTL_SECONDS)
+        except Exception as e:
+            logger.debug(f"Could not record loop lag: {e}")
+
+    def get_worker_stats(self) -> Dict[str, Any]:
+        """Lag seen by this worker since it started, and its recent block reports."""
+        return {
+            "pid": os.getpid(),
+            "running": self._sampler is not None,
+            "debug": self.debug,
+            "samples": self._samples,
+            "last_lag_ms": round(self._last_lag_ms, 1),
+            "max_lag_ms": round(self._max_lag_ms, 1),
+            "blocks": [report.to_dict() for report in reversed(self._blocks)],
+        }
+
+    async def _run_sampler(self):
+        interval = settings.LOOP_LAG_INTERVAL_SECONDS
+        last_flush = time.monotonic()
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            self.record((now - started - interval) * 1000)
+
+            if now - last_flush >= FLUSH_INTERVAL_SECONDS:
+                last_flush = now
+                await self.flush()
+
+    # Debug mode
+
+    def _task_factory(self, loop, coro, **kwargs):
+        """Create tasks as usual, tagged with the operation that started them."""
+        if self._previous_task_factory is not None:
+            task = self._previous_task_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        operation = _current_operation.get()
+        if operation:
+            self._task_labels[task] = operation
+        return task
+
+    def _running_operation(self) -> str:
+        """What the loop is running right now (called while it is blocked)."""
+        # The loop thread is stuck in this task, so its current task is stable
+        task = asyncio.current_task(self._loop)
+        if task is None:
+            return "(loop callback)"
+        return self._task_labels.get(task) or task.get_name()
+
+    def _run_watchdog(self):
+        """
+        Ping the loop from a thread; report pings it does not answer in time.
+
+        The ping is a call_soon_threadsafe callback, so it runs as soon as
+        whatever holds the loop gives it back.
+        """
+        threshold = settings.LOOP_BLOCK_THRESHOLD_MS / 1000
+
+        while not self._stopping.is_set():
+            answered = threading.Event()
+            posted = time.monotonic()
+            try:
+                self._loop.call_soon_threadsafe(answered.set)
+            except RuntimeError:
+                return  # Loop closed
+
+            if answered.wait(threshold):
+                self._stopping.wait(threshold / 2)
+                continue
+
+            # Blocked: capture what the loop thread is doing at this moment
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame) if frame is not None else []
+            operation = self._running_operation()
+            detected_at = datetime.now(timezone.utc).isoformat()
+            del frame
+
+            while not answered.wait(0.1):
+                if self._stopping.is_set():
+                    return
+
+            report = BlockReport(
+                operation=operation,
+                blocked_ms=round((time.monotonic() - posted) * 1000, 1),
+                detected_at=detected_at,
+                stack=stack,
+            )
+            self._blocks.append(report)
+            try:
+                self._loop.call_soon_threadsafe(self._count_block)
+            except RuntimeError:
+                return
+            logger.warning(
+                f"Event loop blocked for {report.blocked_ms:.0f}ms by {operation}:\n{''.join(stack)}"
+            )
+
+    def _count_block(self):
+        self._pending["blocks"] = self._pending.get("blocks", 0) + 1
+
+
+loop_monitor = LoopLagMonitor()
+
+
+@contextmanager
+def operation_label(label: str):
+    """
+    Attribute loop blocks inside this block (and tasks started in it) to `label`.
+    """
+    token = _current_operation.set(label)
+    task = asyncio.current_task()
+    previous = loop_monitor._task_labels.get(task) if task is not None else None
+    if task is not None:
+        loop_monitor._task_labels[task] = label
+    try:
+        yield
+    finally:
+        _current_operation.reset(token)
+        if task is not None:
+            if previous is None:
+                loop_monitor._task_labels.pop(task, None)
+            else:
+                loop_monitor._task_labels[task] = previous
+
+
+async def get_loop_lag_metrics(date_str: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get a day's loop lag over all workers, plus this worker's own stats.
+    """
+    date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    try:
+        raw = await cache_service.hgetall(LAG_KEY.format(date=date_str))
+    except Exception as e:
+        logger.debug(f"Could not read loop lag: {e}")
+        raw = {}
+
+    values = {field: int(value) for field, value in (raw or {}).items()}
+    samples = values.get("samples", 0)
+    histogram = {
+        field[len("lat:"):]: count for field, count in values.items() if field.startswith("lat:")
+    }
+
+    return {
+        "date": date_str,
+        "samples": samples,
+        "avg_lag_ms": round(values.get("lag_us_total", 0) / 1000 / samples, 2) if samples else 0.0,
+        "lag_ms": {
+            "p50": histogram_percentile(histogram, 50, LAG_BUCKETS_MS),
+            "p95": histogram_percentile(histogram, 95, LAG_BUCKETS_MS),
+            "p99": histogram_percentile(histogram, 99, LAG_BUCKETS_MS),
+        },
+        "lag_histogram": {
+            str(bound): histogram.get(str(bound), 0)
+            for bound in LAG_BUCKETS_MS + [OVERFLOW_BUCKET]
+        },
+        "blocks": values.get("blocks", 0),
+        "worker": loop_monitor.get_worker_stats(),
+    }
@@ -99,11 +99,8 @@ class OTPService:
             RateLimitExceeded: If rate limit is hit
             CooldownActive: If resend cooldown is active
         """
-        # Check rate limit
-        await self._check_rate_limit(phone_number)
-        
-        # Check resend cooldown
-        await self._check_cooldown(phone_number)
+        # Check rate limit and resend cooldown
+        await self._check_limits(phone_number)
         
         # Generate OTP
         otp = self.generate_otp()
@@ -129,22 +126,18 @@ class OTPService:
         self.db.add(otp_request)
         self.db.commit()
         
-        # Store in cache for fast verification
-        await cache_service.set(
-            f"otp:{phone_number}:{otp_id}",
-            f"{otp_hash}|{user_type}|0",  # hash|type|attempts
-            ttl=self.OTP_EXPIRY_SECONDS
-        )
-        
-        # Set resend cooldown
-        await cache_service.set(
-            f"otp_cooldown:{phone_number}",
-            "1",
-            ttl=self.RESEND_COOLDOWN_SECONDS
-        )
-        
-        # Increment rate limit counter
-        await self._increment_rate_limit(phone_number)
+        # Store in cache for fast verification, set the resend cooldown and
+        # count the request against the rate limit in one round trip
+        rate_key = f"otp_rate:{phone_number}"
+        async with cache_service.pipeline(transaction=True) as pipe:
+            pipe.set(
+                f"otp:{phone_number}:{otp_id}",
+                f"{otp_hash}|{user_type}|0",  # hash|type|attempts
+                ttl=self.OTP_EXPIRY_SECONDS
+            )
+            pipe.set(f"otp_cooldown:{phone_number}", "1", ttl=self.RESEND_COOLDOWN_SECONDS)
+            pipe.incr(rate_key)
+            pipe.expire(rate_key, self.RATE_LIMIT_WINDOW_SECONDS)
         
         logger.info(f"OTP requested for {phone_number[-4:].rjust(len(phone_number), '*')}")
         
@@ -249,31 +242,19 @@ class OTPService:
         # Generate new OTP
         return await self.request_otp(phone_number, user_type)
     
-    async def _check_rate_limit(self, phone_number: str) -> None:
-        """Check if phone number has exceeded rate limit."""
-        key = f"otp_rate:{phone_number}"
-        count = await cache_service.get(key)
+    async def _check_limits(self, phone_number: str) -> None:
+        """Check the rate limit and resend cooldown (one cache round trip)."""
+        count, cooldown = await cache_service.mget([
+            f"otp_rate:{phone_number}",
+            f"otp_cooldown:{phone_number}"
+        ])
         
         if count and int(count) >= self.RATE_LIMIT_REQUESTS:
             raise RateLimitExceeded(
                 "Too many OTP requests. Please try again later."
             )
-    
-    async def _increment_rate_limit(self, phone_number: str) -> None:
-        """Increment rate limit counter."""
-        key = f"otp_rate:{phone_number}"
-        current = await cache_service.get(key)
         
-        if current:
-            # Note: In production with Redis, use INCR
-            await cache_service.set(key, str(int(current) + 1), ttl=self.RATE_LIMIT_WINDOW_SECONDS)
-        else:
-            await cache_service.set(key, "1", ttl=self.RATE_LIMIT_WINDOW_SECONDS)
-    
-    async def _check_cooldown(self, phone_number: str) -> None:
-        """Check if resend cooldown is active."""
-        key = f"otp_cooldown:{phone_number}"
-        if await cache_service.get(key):
+        if cooldown:
             raise CooldownActive(
                 f"Please wait {self.RESEND_COOLDOWN_SECONDS} seconds before requesting another OTP."
             )
@@ -0,0 +1,231 @@
+"""
+Keyset Pagination
+
+List endpoints page over (sort key, id) instead of OFFSET, so page 500
+costs the same as page 1:
+1. paginate() orders by sort key and id (both descending), fetches one
+   row more than the page and returns an opaque cursor for the next page
+   that encodes the last row's (sort key, id)
+2. count_total() returns the total for the list without counting the
+   whole table on every call: a cached count per filter set (single flight,
+   served stale while one caller recounts), or the planner's row estimate
+   from pg_class for unfiltered lists on large tables. Callers pass
+   exact_count=true to get an exact COUNT(*) instead
+
+Cursors are URL-safe base64 JSON. They are opaque to clients and only
+valid for the list that issued them; a malformed cursor is a 400.
+"""
+import base64
+import hashlib
+import json
+import logging
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+
+from fastapi import Response
+from sqlalchemy import DateTime, and_, func, or_, text
+from sqlalchemy.orm import Query, Session
+
+from app.core.exceptions import BadRequestException
+from app.services.cache import cache_service
+
+logger = logging.getLogger(__name__)
+
+COUNT_KEY = "list_count:{name}:{digest}"
+COUNT_TTL_SECONDS = 60          # Cached totals are this fresh...
+COUNT_STALE_SECONDS = 600       # ...and served this much longer while one caller recounts
+ESTIMATE_MIN_ROWS = 10000       # Below this the planner estimate is too rough and COUNT(*) is cheap
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_ESTIMATED_HEADER = "X-Total-Estimated"
+PAGINATION_HEADERS = [NEXT_CURSOR_HEADER, TOTAL_COUNT_HEADER, TOTAL_ESTIMATED_HEADER]
+
+
+# ============ Cursors ============
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "uuid" in value:
+            return uuid.UUID(value["uuid"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+        raise ValueError("unknown cursor value")
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for the row with these key values."""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Key values from a cursor made by encode_cursor(); 400 if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != size or None in values:
+            raise ValueError("wrong cursor shape")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError) as e:
+        raise BadRequestException("Invalid pagination cursor", error_code="INVALID_CURSOR") from e
+
+
+# ============ Pages ============
+
+def _comparable(query: Query, column, expr):
+    """
+    `expr` (the sort column or a cursor value for it) in a form that
+    compares by value.
+
+    SQLite keeps datetimes as text, and rows written by a server default
+    have no microseconds while bound parameters do, so the same instant
+    compares unequal there; compare them as julian days instead.
+    """
+    if isinstance(column.type, DateTime) and query.session.get_bind().dialect.name == "sqlite":
+        return func.julianday(expr)
+    return expr
+
+
+def paginate(
+    query: Query,
+    sort_column,
+    id_column,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    One page of `query`, newest first, and the cursor for the next page.
+
+    Rows are ordered by (sort_column, id_column) descending; the id breaks
+    ties so no row is skipped or repeated between pages. Pass the same
+    column twice to page over a unique key alone. `offset` only serves
+    the legacy skip/page parameters and is ignored once a cursor is given.
+
+    The cursor condition is written as `sort <= v AND (sort < v OR id < i)`
+    rather than a row-value comparison so the planner can use an index on
+    the sort key for the range.
+    """
+    keys = [sort_column] if sort_column is id_column else [sort_column, id_column]
+    sort_key = _comparable(query, sort_column, sort_column)
+
+    if cursor:
+        values = decode_cursor(cursor, len(keys))
+        if len(keys) == 1:
+            query = query.filter(sort_key < values[0])
+        else:
+            last_sort = _comparable(query, sort_column, values[0])
+            last_id = values[1]
+            query = query.filter(
+                sort_key <= last_sort,
+                or_(sort_key < last_sort, and_(sort_key == last_sort, id_column < last_id))
+            )
+        offset = 0
+
+    order = [sort_key.desc()] + [id_column.desc()] * (len(keys) - 1)
+    rows = query.order_by(*order).offset(offset or None).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(*[getattr(last, key.key) for key in keys])
+
+
+# ============ Totals ============
+
+def _estimated_rows(db: Session, table) -> Optional[int]:
+    """Planner row estimate for a table (PostgreSQL only, None if unknown)."""
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    try:
+        estimate = db.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": table.name}
+        ).scalar()
+    except Exception as e:
+        logger.debug(f"Could not read row estimate for {table.name}: {e}")
+        return None
+    # -1 (never analyzed) or a small table: not worth trusting over a count
+    if estimate is None or estimate < ESTIMATE_MIN_ROWS:
+        return None
+    return int(estimate)
+
+
+def _count_key(db: Session, query: Query, name: str) -> str:
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    params = sorted((k, repr(v)) for k, v in compiled.params.items())
+    digest = hashlib.sha1(f"{compiled}|{params}".encode()).hexdigest()[:16]
+    return COUNT_KEY.format(name=name, digest=digest)
+
+
+async def count_total(
+    db: Session,
+    query: Query,
+    name: str,
+    exact: bool = False,
+    table=None
+) -> Tuple[int, bool]:
+    """
+    Total rows of a list query, as (total, is_exact).
+
+    Args:
+        query: The filtered list query, before the cursor is applied
+        name: Cache namespace for the list (e.g. "admin_bookings")
+        exact: Run COUNT(*) now instead of using a cached or estimated total
+        table: The list's table, when the query has no filters at all; lets
+            large tables use the pg_class estimate instead of a count
+    """
+    query = query.order_by(None)
+    if exact:
+        return query.count(), True
+
+    if table is not None:
+        estimate = _estimated_rows(db, table)
+        if estimate is not None:
+            return estimate, False
+
+    # Exact only if the count ran in this call; cached and stale values are not
+    counted = False
+
+    async def compute() -> str:
+        nonlocal counted
+        value = str(query.count())
+        counted = True
+        return value
+
+    try:
+        value = await cache_service.get_or_compute(
+            _count_key(db, query, name), compute,
+            ttl=COUNT_TTL_SECONDS, stale_ttl=COUNT_STALE_SECONDS
+        )
+    except Exception as e:
+        logger.debug(f"Cached count failed for {name}, counting: {e}")
+        return query.count(), True
+    return int(value), counted
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: int, exact: bool) -> None:
+    """Pagination headers for list endpoints whose body is a bare array."""
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[TOTAL_ESTIMATED_HEADER] = "false" if exact else "true"
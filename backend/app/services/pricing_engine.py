@@ -26,6 +26,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 import logging
 
+from app.database import run_db
 from app.services.cache import cache_service
 from app.models import Booking, BookingStatus
 from app.models.employee import Employee, EmployeeAccountStatus, EmployeeCleanerStatus
@@ -60,11 +61,13 @@ class PricingEngine:
     # Working hours per cleaner per day (for utilization calculation)
     WORKING_HOURS_PER_CLEANER = 8
 
-    # Cache TTL for utilization data (5 minutes)
+    # Cache TTL for utilization data (5 minutes), then served stale for up
+    # to 10 more minutes while one request recomputes it
     UTILIZATION_CACHE_TTL = 300
+    UTILIZATION_STALE_TTL = 600
 
-    def __init__(self, db: Session):
-        self.db = db
+    def __init__(self, db):
+        self.db = db  # Session or AsyncSession
 
     async def calculate_dynamic_price(
         self,
@@ -134,22 +137,19 @@ class PricingEngine:
         Returns:
             Tuple of (multiplier, utilization_ratio, tier_name)
         """
-        # Try to get cached utilization first
+        # Cached utilization; on a miss only one request (across workers)
+        # runs the utilization queries and the others wait for its result
         cache_key = f"utilization:{region_code}:{scheduled_date.date().isoformat()}"
-        cached = await cache_service.get(cache_key)
 
-        if cached:
-            utilization = Decimal(cached)
-        else:
-            utilization = await self._calculate_region_utilization(
-                region_code, scheduled_date
-            )
-            # Cache the result
-            await cache_service.set(
-                cache_key,
-                str(utilization),
-                ttl=self.UTILIZATION_CACHE_TTL
-            )
+        async def compute() -> str:
+            return str(await self._calculate_region_utilization(region_code, scheduled_date))
+
+        utilization = Decimal(await cache_service.get_or_compute(
+            cache_key,
+            compute,
+            ttl=self.UTILIZATION_CACHE_TTL,
+            stale_ttl=self.UTILIZATION_STALE_TTL
+        ))
 
         # Determine tier and multiplier
         multiplier = Decimal("1.10")  # Default to highest tier
@@ -188,10 +188,19 @@ class PricingEngine:
         Available Hours = Active Cleaners × Working Hours Per Day
         Booked Hours = Sum of all booking durations
         """
+        return await run_db(self.db, self._query_region_utilization, region_code, scheduled_date)
+
+    def _query_region_utilization(
+        self,
+        db: Session,
+        region_code: str,
+        scheduled_date: datetime
+    ) -> Decimal:
+        """Utilization queries for _calculate_region_utilization (synchronous session)."""
         booking_date = scheduled_date.date()
 
         # Count active cleaners in the region
-        active_cleaners = self.db.query(func.count(Employee.id)).filter(
+        active_cleaners = db.query(func.count(Employee.id)).filter(
             Employee.region_code == region_code,
             Employee.account_status == EmployeeAccountStatus.ACTIVE
         ).scalar() or 0
@@ -212,7 +221,7 @@ class PricingEngine:
         # Join with Address to filter by region
         from app.models import Address
 
-        bookings = self.db.query(Booking).join(
+        bookings = db.query(Booking).join(
             Address, Booking.address_id == Address.id
         ).filter(
             Booking.scheduled_date >= start_of_day,
@@ -224,13 +233,13 @@ class PricingEngine:
             ])
         ).all()
 
-        # Filter by region (using city mapping)
-        from app.services.cleaner_assignment import get_region_from_city
+        # Filter by region (address coordinates, falling back to city mapping)
+        from app.services.cleaner_assignment import get_address_region
 
         booked_hours = Decimal("0")
         for booking in bookings:
-            if booking.address and booking.address.city:
-                booking_region = get_region_from_city(booking.address.city)
+            if booking.address:
+                booking_region = get_address_region(booking.address)
                 if booking_region == region_code:
                     # Get service duration
                     if booking.service and booking.service.base_duration_hours:
@@ -308,13 +317,11 @@ class PricingEngine:
         This is used by the frontend to show customers the price
         breakdown before they confirm the booking.
         """
-        from app.models import Service, AddOn
+        from app.services.catalog import get_catalog
 
         # Get service
-        service = self.db.query(Service).filter(
-            Service.id == service_id,
-            Service.is_active == True
-        ).first()
+        catalog = await get_catalog(self.db)
+        service = catalog.get_service(service_id)
 
         if not service:
             raise ValueError(f"Service {service_id} not found")
@@ -329,11 +336,7 @@ class PricingEngine:
         add_ons_total = Decimal("0")
         add_ons_detail = []
         if add_on_ids:
-            add_ons = self.db.query(AddOn).filter(
-                AddOn.id.in_(add_on_ids),
-                AddOn.is_active == True
-            ).all()
-            for addon in add_ons:
+            for addon in catalog.active_add_ons(add_on_ids):
                 add_ons_total += Decimal(str(addon.price))
                 add_ons_detail.append({
                     "id": addon.id,
@@ -425,10 +428,11 @@ class PricingEngine:
         )
 
         # Update cache
-        await cache_service.set(
+        await cache_service.set_with_stale(
             cache_key,
             str(utilization),
-            ttl=self.UTILIZATION_CACHE_TTL
+            ttl=self.UTILIZATION_CACHE_TTL,
+            stale_ttl=self.UTILIZATION_STALE_TTL
         )
 
         logger.info(
@@ -0,0 +1,265 @@
+"""
+Per-request SQL Query Stats
+
+SQLAlchemy cursor events on every engine (primary, async and read
+replicas) record each statement executed while a QueryStats is active:
+1. Query count and total DB time
+2. Statement fingerprints (placeholders, literals and IN lists collapsed),
+   so one statement repeated per row - an N+1 - shows up as a single
+   fingerprint with a high count
+
+QueryStatsMiddleware opens a QueryStats per request. In DEBUG the numbers
+are sent back as X-DB-* response headers and N+1 suspects are logged. In
+every mode they are summed per route into a per-day cache hash
+(query_stats:counters:{date}, flushed every FLUSH_INTERVAL_SECONDS) for
+GET /admin/db/query-stats.
+
+query_budget() asserts a query budget around any block of code; see
+check_query_budgets.py.
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine, async_engine
+from app.services.cache import cache_service
+from app.services.read_replicas import read_replicas
+
+logger = logging.getLogger(__name__)
+
+STATS_KEY = "query_stats:counters:{date}"
+STATS_TTL_SECONDS = 7 * 86400
+FLUSH_INTERVAL_SECONDS = 10
+MAX_SUSPECTS = 50
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|\?")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ", re.DOTALL)
+
+_current_stats: ContextVar[Optional["QueryStats"]] = ContextVar("query_stats", default=None)
+
+
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so executions differing only in values compare equal."""
+    normalized = _PLACEHOLDER.sub("?", statement)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _VALUE_LIST.sub("(?)", normalized)
+    return _WHITESPACE.sub(" ", normalized).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    """Short stable ID for a fingerprint (for headers and logs)."""
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+
+class QueryStats:
+    """
+    Statements executed during one request or block.
+
+    Stats nest: a statement is also recorded on the enclosing QueryStats,
+    so a query_budget around a test request sees the request's queries.
+    """
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.time_ms = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, statement: str, time_ms: float):
+        stats = self
+        normalized = fingerprint(statement)
+        while stats is not None:
+            stats.count += 1
+            stats.time_ms += time_ms
+            stats.fingerprints[normalized] += 1
+            stats = stats.parent
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Tuple[str, int]]:
+        """Fingerprints executed more than `threshold` times, most repeated first."""
+        threshold = threshold if threshold is not None else settings.QUERY_REPEAT_THRESHOLD
+        return [(fp, n) for fp, n in self.fingerprints.most_common() if n > threshold]
+
+    def describe(self, limit: int = 5) -> str:
+        lines = [f"{self.count} queries, {self.time_ms:.1f}ms"]
+        for normalized, n in self.fingerprints.most_common(limit):
+            short = _SELECT_LIST.sub("SELECT ... FROM ", normalized)
+            lines.append(f"  {n:>4}x [{fingerprint_id(normalized)}] {short[:200]}")
+        return "\n".join(lines)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Stats of the running request, if any."""
+    return _current_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Record the statements executed inside the block."""
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block ran more queries (or repeated one more often) than allowed."""
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None, label: str = "block"):
+    """
+    Fail if the block runs more than `max_queries` statements.
+
+    With `max_repeats`, also fail if any one statement fingerprint runs
+    more often than that, which catches an N+1 before the total does.
+
+    Usage:
+        with query_budget(6, max_repeats=1, label="GET /api/bookings/me"):
+            client.get("/api/bookings/me")
+    """
+    with track_queries() as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(f"{label}: over budget of {max_queries} queries\n{stats.describe()}")
+    if max_repeats is not None and stats.repeated(max_repeats):
+        raise QueryBudgetExceeded(f"{label}: a statement ran more than {max_repeats} times\n{stats.describe()}")
+
+
+# SQLAlchemy hooks
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_stats_started")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+def instrument_engine(target) -> None:
+    """Attach the query hooks to an Engine (idempotent)."""
+    if not event.contains(target, "before_cursor_execute", _before_cursor_execute):
+        event.listen(target, "before_cursor_execute", _before_cursor_execute)
+        event.listen(target, "after_cursor_execute", _after_cursor_execute)
+
+
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+for replica in read_replicas.replicas:
+    instrument_engine(replica.engine)
+
+
+# Production metrics
+
+class QueryMetricsRecorder:
+    """
+    Per-route query counters, buffered in process and flushed to the cache.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, int] = {}
+        self._last_flush = time.monotonic()
+        self._suspects: Deque[Dict[str, Any]] = deque(maxlen=MAX_SUSPECTS)
+
+    async def record_request(self, route: str, stats: QueryStats):
+        pending = self._pending
+        repeated = stats.repeated()
+        for field, value in (
+            ("requests", 1),
+            ("queries", stats.count),
+            ("db_us", int(stats.time_ms * 1000)),
+            ("n_plus_one", 1 if repeated else 0),
+        ):
+            key = f"{field}:{route}"
+            pending[key] = pending.get(key, 0) + value
+
+        if repeated:
+            normalized, count = repeated[0]
+            self._suspects.append({
+                "route": route,
+                "fingerprint": fingerprint_id(normalized),
+                "statement": normalized[:500],
+                "count": count,
+                "queries": stats.count,
+                "at": datetime.now(timezone.utc).isoformat(),
+            })
+
+        if time.monotonic() - self._last_flush >= FLUSH_INTERVAL_SECONDS:
+            await self.flush()
+
+    async def flush(self):
+        """Add the counts gathered since the last flush to today's hash."""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        increments, self._pending = self._pending, {}
+        date_str = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        try:
+            await cache_service.hincrby_many(STATS_KEY.format(date=date_str), increments, ttl=STATS_TTL_SECONDS)
+        except Exception as e:
+            logger.debug(f"Could not record query stats: {e}")
+
+    def recent_suspects(self) -> List[Dict[str, Any]]:
+        return list(reversed(self._suspects))
+
+
+query_metrics = QueryMetricsRecorder()
+
+
+async def get_query_metrics(date_str: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get a day's per-route query counts over all workers, most queries first.
+    """
+    date_str = date_str or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    try:
+        raw = await cache_service.hgetall(STATS_KEY.format(date=date_str))
+    except Exception as e:
+        logger.debug(f"Could not read query stats: {e}")
+        raw = {}
+
+    routes: Dict[str, Dict[str, int]] = {}
+    for key, value in (raw or {}).items():
+        field, route = key.split(":", 1)
+        routes.setdefault(route, {})[field] = int(value)
+
+    summary = []
+    for route, values in routes.items():
+        requests = values.get("requests", 0)
+        summary.append({
+            "route": route,
+            "requests": requests,
+            "queries": values.get("queries", 0),
+            "avg_queries": round(values.get("queries", 0) / requests, 2) if requests else 0.0,
+            "avg_db_ms": round(values.get("db_us", 0) / 1000 / requests, 2) if requests else 0.0,
+            "n_plus_one_requests": values.get("n_plus_one", 0),
+        })
+    summary.sort(key=lambda row: row["queries"], reverse=True)
+
+    return {
+        "date": date_str,
+        "repeat_threshold": settings.QUERY_REPEAT_THRESHOLD,
+        "routes": summary,
+        "recent_suspects": query_metrics.recent_suspects(),
+    }
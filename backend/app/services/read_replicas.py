@@ -0,0 +1,202 @@
+"""
+Read Replica Routing
+
+Read-only handlers take `db: Session = Depends(get_read_db)` instead of
+get_db, which sends their queries to a read replica when one is usable:
+1. Replicas come from DATABASE_REPLICA_URLS (comma-separated), each with
+   its own connection pool. With none configured get_read_db is get_db
+2. Each worker probes a replica's replication lag at most every
+   REPLICA_LAG_CHECK_SECONDS. Replicas more than REPLICA_MAX_LAG_SECONDS
+   behind, or failing the probe, are skipped until a later probe passes;
+   healthy ones are used round robin, and with none left reads fall back
+   to the primary
+3. Replica sessions refuse to flush, so a handler that writes fails loudly
+   instead of writing through a replica URL that points at a primary
+
+Read-after-write: a replica may be up to REPLICA_MAX_LAG_SECONDS behind.
+Handlers that read what the same client has just written (its own
+bookings, anything that fills a shared cache right after an invalidation)
+stay on get_db. A client can also send `X-Read-Primary: 1` to force the
+primary for one request, e.g. for the first reload after a mutation.
+
+Local testing: point DATABASE_REPLICA_URLS at a second PostgreSQL instance
+replicating from the primary, or at any copy of the database (a simulated
+replica, lag 0). check_replica_routing.py does the latter and simulates lag
+by overriding Replica.lag_probe.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import Connection, make_url
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+READ_PRIMARY_HEADER = "X-Read-Primary"
+READ_TARGET_HEADER = "X-DB-Read-Target"  # DEBUG only
+
+# Seconds since the last replayed transaction; 0 when the replica has
+# replayed everything it received (an idle primary writes nothing to replay)
+PG_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+class ReplicaWriteError(RuntimeError):
+    """A replica session tried to flush changes."""
+    pass
+
+
+def _reject_flush(session, flush_context, instances):
+    raise ReplicaWriteError("Read replica sessions are read-only; use get_db for handlers that write")
+
+
+def _probe_lag(conn: Connection) -> float:
+    """Replication lag in seconds (0 for databases without replication info)."""
+    if conn.dialect.name != "postgresql":
+        return 0.0
+    return float(conn.execute(PG_LAG_QUERY).scalar() or 0)
+
+
+class Replica:
+    """One read replica: its pool, session factory and last lag probe."""
+
+    def __init__(self, url: str):
+        parsed = make_url(url)
+        self.name = f"{parsed.host}/{parsed.database}" if parsed.host else parsed.database
+        self.engine = create_engine(
+            url,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_pre_ping=True,
+            echo=settings.DEBUG
+        )
+        self.session_factory = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        event.listen(self.session_factory, "before_flush", _reject_flush)
+
+        self.lag_probe: Callable[[Connection], float] = _probe_lag
+        self.lag_seconds: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self._probe_lock = threading.Lock()
+
+    @property
+    def usable(self) -> bool:
+        return (
+            self.error is None
+            and self.lag_seconds is not None
+            and self.lag_seconds <= settings.REPLICA_MAX_LAG_SECONDS
+        )
+
+    def check(self, force: bool = False) -> bool:
+        """Re-probe the lag if the last probe is too old; returns usable."""
+        if not force and time.monotonic() - self.checked_at < settings.REPLICA_LAG_CHECK_SECONDS:
+            return self.usable
+        # One probe at a time; concurrent callers use the last result
+        if not self._probe_lock.acquire(blocking=False):
+            return self.usable
+        try:
+            with self.engine.connect() as conn:
+                self.lag_seconds = self.lag_probe(conn)
+            self.error = None
+        except Exception as e:
+            if self.error is None:
+                logger.warning(f"Read replica {self.name} unavailable, reading from primary: {e}")
+            self.lag_seconds = None
+            self.error = str(e)
+        finally:
+            self.checked_at = time.monotonic()
+            self._probe_lock.release()
+
+        if self.lag_seconds is not None and not self.usable:
+            logger.info(f"Read replica {self.name} is {self.lag_seconds:.1f}s behind, skipping it")
+        return self.usable
+
+
+class ReadReplicaRouter:
+    """
+    Picks a replica for each read-only request.
+
+    Counters are per worker process: reads served by a replica, reads that
+    fell back to the primary because no replica was usable, and reads sent
+    to the primary by the X-Read-Primary header.
+    """
+
+    def __init__(self, urls: List[str]):
+        self.replicas = [Replica(url) for url in urls]
+        self._next = itertools.count()
+        self.counters = {"replica": 0, "fallback": 0, "forced_primary": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Next usable replica round robin, or None to read from the primary."""
+        start = next(self._next)
+        for i in range(len(self.replicas)):
+            replica = self.replicas[(start + i) % len(self.replicas)]
+            if replica.check():
+                self.counters["replica"] += 1
+                return replica
+        self.counters["fallback"] += 1
+        return None
+
+    def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "max_lag_seconds": settings.REPLICA_MAX_LAG_SECONDS,
+            "worker_reads": dict(self.counters),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "usable": replica.usable,
+                    "lag_seconds": round(replica.lag_seconds, 3) if replica.lag_seconds is not None else None,
+                    "error": replica.error,
+                    "checked_seconds_ago": round(time.monotonic() - replica.checked_at, 1) if replica.checked_at else None,
+                }
+                for replica in self.replicas
+            ],
+        }
+
+
+read_replicas = ReadReplicaRouter(
+    [url.strip() for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+)
+
+
+def get_read_db(request: Request, response: Response):
+    """
+    Dependency for read-only routes: a session on a usable replica, or on
+    the primary if there is none or the request sends X-Read-Primary.
+    """
+    replica = None
+    if read_replicas.enabled:
+        if request.headers.get(READ_PRIMARY_HEADER):
+            read_replicas.counters["forced_primary"] += 1
+        else:
+            replica = read_replicas.choose()
+        if settings.DEBUG:
+            response.headers[READ_TARGET_HEADER] = f"replica:{replica.name}" if replica else "primary"
+
+    db = replica.session_factory() if replica else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
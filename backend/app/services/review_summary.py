@@ -0,0 +1,151 @@
+"""
+Review Summaries
+
+Keeps review_summaries (app/models/review.py), one row of published-review
+sums and counts per service, so GET /reviews/stats is a single-row read:
+1. apply_review_change() adds or removes one review when it is created,
+   published or unpublished, with an in-place UPDATE in the caller's
+   transaction
+2. rebuild_review_summaries() recomputes rows from the reviews in one
+   grouped query; used for a service's first review, and by the rollup
+   refresher (build_missing_review_summaries) to build the table after
+   deploy
+3. get_review_summary() returns the stats for one service or, summed over
+   all rows, for every service. It never builds: until the table exists
+   and there are published reviews it answers 503 (REVIEW_STATS_BUILDING)
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.exceptions import ServiceUnavailableException
+from app.models import Booking, Review, ReviewSummary
+
+logger = logging.getLogger(__name__)
+
+ASPECTS = ("cleanliness", "punctuality", "communication", "value")
+RATINGS = range(1, 6)
+
+SUMMARY_COLUMNS = (
+    ["review_count", "rating_sum"]
+    + [f"rating_{rating}" for rating in RATINGS]
+    + [f"{aspect}_{part}" for aspect in ASPECTS for part in ("sum", "count")]
+)
+
+
+def _review_increments(review: Review, sign: int) -> Dict[str, int]:
+    """Summary column changes for adding (sign=1) or removing (-1) one review."""
+    increments = {
+        "review_count": sign,
+        "rating_sum": sign * review.overall_rating,
+        f"rating_{review.overall_rating}": sign,
+    }
+    for aspect in ASPECTS:
+        value = getattr(review, f"{aspect}_rating")
+        if value is not None:
+            increments[f"{aspect}_sum"] = sign * value
+            increments[f"{aspect}_count"] = sign
+    return increments
+
+
+def rebuild_review_summaries(db: Session, service_id: Optional[int] = None) -> int:
+    """Recompute the summary of one service (or all) from published reviews. Returns rows written."""
+    aggregates = [func.count(Review.id), func.coalesce(func.sum(Review.overall_rating), 0)]
+    aggregates += [func.count(Review.id).filter(Review.overall_rating == rating) for rating in RATINGS]
+    for aspect in ASPECTS:
+        column = getattr(Review, f"{aspect}_rating")
+        aggregates += [func.coalesce(func.sum(column), 0), func.count(column)]
+
+    query = db.query(Booking.service_id, *aggregates).join(
+        Booking, Booking.id == Review.booking_id
+    ).filter(Review.is_published == True)
+    stale = db.query(ReviewSummary)
+    if service_id is not None:
+        query = query.filter(Booking.service_id == service_id)
+        stale = stale.filter(ReviewSummary.service_id == service_id)
+
+    rows = query.group_by(Booking.service_id).all()
+    stale.delete(synchronize_session=False)
+    db.add_all([
+        ReviewSummary(service_id=row[0], **dict(zip(SUMMARY_COLUMNS, row[1:])))
+        for row in rows
+    ])
+    db.flush()
+    return len(rows)
+
+
+def apply_review_change(db: Session, review: Review, service_id: int, sign: int) -> None:
+    """
+    Add (sign=1) or remove (sign=-1) one published review from its
+    service's summary. Call after the review change is flushed; the
+    caller commits.
+    """
+    increments = _review_increments(review, sign)
+    values = {getattr(ReviewSummary, column): getattr(ReviewSummary, column) + value
+              for column, value in increments.items()}
+
+    updated = db.query(ReviewSummary).filter(
+        ReviewSummary.service_id == service_id
+    ).update(values, synchronize_session=False)
+    if updated:
+        return
+
+    # No row yet: the service's first review, or the table was never built.
+    # Build from the reviews, which already include this change.
+    try:
+        with db.begin_nested():
+            never_built = db.query(ReviewSummary.service_id).first() is None
+            rebuild_review_summaries(db, None if never_built else service_id)
+    except IntegrityError:
+        # A concurrent request created the row first; apply the change to it
+        db.query(ReviewSummary).filter(
+            ReviewSummary.service_id == service_id
+        ).update(values, synchronize_session=False)
+
+
+def build_missing_review_summaries(db: Session) -> int:
+    """Build the summaries if the table is empty but there are published reviews. Commits."""
+    if db.query(ReviewSummary.service_id).first() is not None:
+        return 0
+    written = rebuild_review_summaries(db)
+    db.commit()
+    return written
+
+
+def _average(total: int, count: int) -> Optional[float]:
+    return round(total / count, 1) if count else None
+
+
+def get_review_summary(db: Session, service_id: Optional[int] = None) -> Dict[str, Any]:
+    """Review stats for one service, or across all services, from the summaries."""
+    columns = [getattr(ReviewSummary, column) for column in SUMMARY_COLUMNS]
+    if service_id is not None:
+        query = db.query(*columns).filter(ReviewSummary.service_id == service_id)
+    else:
+        query = db.query(*[func.sum(column) for column in columns])
+
+    row = query.first()
+    if row is None or row[0] is None:
+        # No summary row; unless the table was never built, there are no reviews
+        if (
+            db.query(ReviewSummary.service_id).first() is None
+            and db.query(Review.id).filter(Review.is_published == True).first() is not None
+        ):
+            raise ServiceUnavailableException(
+                "Review statistics are still being built, try again shortly",
+                error_code="REVIEW_STATS_BUILDING"
+            )
+    values = dict(zip(SUMMARY_COLUMNS, [int(v or 0) for v in row])) if row else dict.fromkeys(SUMMARY_COLUMNS, 0)
+
+    return {
+        "total_reviews": values["review_count"],
+        "average_rating": _average(values["rating_sum"], values["review_count"]) or 0.0,
+        "rating_distribution": {rating: values[f"rating_{rating}"] for rating in RATINGS},
+        **{
+            f"average_{aspect}": _average(values[f"{aspect}_sum"], values[f"{aspect}_count"])
+            for aspect in ASPECTS
+        },
+    }
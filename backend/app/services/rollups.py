@@ -0,0 +1,473 @@
+"""
+Daily Rollups
+
+Maintains the per-day rollup tables (app/models/rollup.py) that admin
+statistics read instead of scanning whole tables.
+
+refresh_rollups() is run every ROLLUP_REFRESH_SECONDS by one worker
+(background task, in a thread off the event loop) and:
+1. Backfills, once, every closed day that has no rollup yet
+2. Rebuilds days touched since the last refresh: the creation day of every
+   booking, subscription or customer updated since then (bookings created
+   weeks ago still change status and payment)
+3. Rebuilds today, including the live subscription snapshot (MRR,
+   active/paused), and rolls up wallet transactions for days that closed
+
+A day is always rebuilt as a whole from its own rows (delete + insert), so
+refreshing is idempotent and a failed run is simply redone next time.
+Days are UTC dates. Until the first refresh has finished the readers
+answer 503 (ROLLUPS_BUILDING).
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.models import (
+    Address, Booking, BookingStatus, PaymentStatus, User, UserRole,
+    Subscription, SubscriptionPlan, SubscriptionStatus,
+    WalletTransaction, TransactionType,
+    BookingDailyRollup, CustomerDailyRollup, WalletDailyRollup
+)
+from app.services.cache import cache_service
+from app.services.cleaner_assignment import resolve_region
+from app.services.review_summary import build_missing_review_summaries
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_KEY = "lock:rollups:refresh"
+DIRTY_OVERLAP = timedelta(minutes=2)  # Re-check rows committed while the last refresh ran
+
+CREDIT_TYPES = [
+    TransactionType.CREDIT, TransactionType.CASHBACK,
+    TransactionType.REFERRAL, TransactionType.TOPUP
+]
+
+
+def _day_bounds(day: date):
+    start = datetime.combine(day, dt_time.min).replace(tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def _utc_date(value: Optional[datetime]) -> Optional[date]:
+    if value is None:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.date()
+
+
+# ============ Day Rebuilds ============
+
+def rebuild_booking_day(db: Session, day: date) -> None:
+    """Recompute the booking rollup rows for one day."""
+    start, end = _day_bounds(day)
+    rows = db.query(
+        Booking.service_id, Booking.status, Booking.payment_status, Booking.total_price,
+        Address.city, Address.latitude, Address.longitude
+    ).outerjoin(Address, Address.id == Booking.address_id).filter(
+        Booking.created_at >= start,
+        Booking.created_at < end
+    ).all()
+
+    groups: Dict[tuple, List] = defaultdict(lambda: [0, Decimal("0")])
+    for service_id, status, payment_status, total_price, city, latitude, longitude in rows:
+        region = resolve_region(city, latitude, longitude) or ""
+        group = groups[(region, service_id, status.value, payment_status.value)]
+        group[0] += 1
+        group[1] += Decimal(total_price or 0)
+
+    db.query(BookingDailyRollup).filter(BookingDailyRollup.day == day).delete(synchronize_session=False)
+    db.add_all([
+        BookingDailyRollup(
+            day=day, region_code=region, service_id=service_id, status=status,
+            payment_status=payment_status, bookings=count, revenue=revenue
+        )
+        for (region, service_id, status, payment_status), (count, revenue) in groups.items()
+    ])
+
+
+def _subscription_snapshot(db: Session, as_of: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Active/paused subscriptions, MRR and visits used.
+
+    Live (as_of None) uses current statuses. For a past day there is no
+    status history, so active means created by then and not cancelled by
+    then; paused is unknown (0).
+    """
+    query = db.query(
+        func.count(Subscription.id),
+        func.sum(SubscriptionPlan.monthly_price),
+        func.sum(Subscription.visits_used)
+    ).join(SubscriptionPlan, SubscriptionPlan.id == Subscription.plan_id)
+
+    if as_of is None:
+        active, mrr, visits = query.filter(Subscription.status == SubscriptionStatus.ACTIVE).one()
+        paused = db.query(func.count(Subscription.id)).filter(
+            Subscription.status == SubscriptionStatus.PAUSED
+        ).scalar()
+    else:
+        active, mrr, visits = query.filter(
+            Subscription.created_at < as_of,
+            Subscription.status != SubscriptionStatus.PENDING_ACTIVATION,
+            (Subscription.cancelled_at == None) | (Subscription.cancelled_at >= as_of)
+        ).one()
+        paused = 0
+
+    return {
+        "subscriptions_active": active or 0,
+        "subscriptions_paused": paused or 0,
+        "mrr": Decimal(mrr or 0),
+        "visits_used": visits or 0,
+    }
+
+
+def rebuild_customer_day(db: Session, day: date, snapshot: Optional[str] = None) -> None:
+    """
+    Recompute one day's customer rollup row.
+
+    Flows are always recomputed. snapshot is "live" (today: current
+    statuses), "reconstruct" (backfill of a past day) or None (keep the
+    snapshot already recorded for the day).
+    """
+    start, end = _day_bounds(day)
+    values: Dict[str, Any] = {
+        "new_customers": db.query(func.count(User.id)).filter(
+            User.role == UserRole.CUSTOMER, User.created_at >= start, User.created_at < end
+        ).scalar() or 0,
+        "subscriptions_new": db.query(func.count(Subscription.id)).filter(
+            Subscription.created_at >= start, Subscription.created_at < end
+        ).scalar() or 0,
+        "subscriptions_cancelled": db.query(func.count(Subscription.id)).filter(
+            Subscription.cancelled_at >= start, Subscription.cancelled_at < end
+        ).scalar() or 0,
+        "refreshed_at": datetime.now(timezone.utc),
+    }
+    if snapshot == "live":
+        values.update(_subscription_snapshot(db))
+    elif snapshot == "reconstruct":
+        values.update(_subscription_snapshot(db, as_of=end))
+
+    row = db.query(CustomerDailyRollup).filter(CustomerDailyRollup.day == day).first()
+    if row is None:
+        if snapshot is None:
+            values.update(_subscription_snapshot(db, as_of=end))
+        db.add(CustomerDailyRollup(day=day, **values))
+    else:
+        for key, value in values.items():
+            setattr(row, key, value)
+
+
+def rebuild_wallet_day(db: Session, day: date) -> None:
+    """Recompute per-wallet credits and debits for one closed day."""
+    start, end = _day_bounds(day)
+    credit = func.sum(WalletTransaction.amount).filter(WalletTransaction.type.in_(CREDIT_TYPES))
+    debit = func.sum(WalletTransaction.amount).filter(WalletTransaction.type == TransactionType.DEBIT)
+    rows = db.query(WalletTransaction.wallet_id, credit, debit).filter(
+        WalletTransaction.created_at >= start,
+        WalletTransaction.created_at < end
+    ).group_by(WalletTransaction.wallet_id).all()
+
+    db.query(WalletDailyRollup).filter(WalletDailyRollup.day == day).delete(synchronize_session=False)
+    db.add_all([
+        WalletDailyRollup(day=day, wallet_id=wallet_id, credits=credits or 0, debits=debits or 0)
+        for wallet_id, credits, debits in rows
+        if credits or debits
+    ])
+
+
+# ============ Refresh ============
+
+def _dirty_days(db: Session, since: datetime) -> Dict[str, Set[date]]:
+    """Creation (and cancellation) days of rows updated since `since`."""
+    booking_days = {
+        _utc_date(created_at)
+        for (created_at,) in db.query(Booking.created_at).filter(Booking.updated_at >= since)
+    }
+    customer_days = {
+        _utc_date(created_at)
+        for (created_at,) in db.query(User.created_at).filter(
+            User.role == UserRole.CUSTOMER, User.updated_at >= since
+        )
+    }
+    for created_at, cancelled_at in db.query(Subscription.created_at, Subscription.cancelled_at).filter(
+        Subscription.updated_at >= since
+    ):
+        customer_days.add(_utc_date(created_at))
+        if cancelled_at:
+            customer_days.add(_utc_date(cancelled_at))
+    return {"bookings": booking_days - {None}, "customers": customer_days - {None}}
+
+
+def _missing_days(db: Session, today: date) -> List[date]:
+    """Closed days since the first booking or customer that have no rollup yet."""
+    first = [
+        db.query(func.min(Booking.created_at)).scalar(),
+        db.query(func.min(User.created_at)).filter(User.role == UserRole.CUSTOMER).scalar(),
+        db.query(func.min(WalletTransaction.created_at)).scalar(),
+    ]
+    first_days = [_utc_date(value) for value in first if value is not None]
+    if not first_days:
+        return []
+
+    rolled = {day for (day,) in db.query(CustomerDailyRollup.day)}
+    day, missing = min(first_days), []
+    while day < today:
+        if day not in rolled:
+            missing.append(day)
+        day += timedelta(days=1)
+    return missing
+
+
+def refresh_rollups(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Bring every rollup table up to date. Returns how many days were rebuilt.
+
+    Each day is committed on its own so a long backfill makes progress
+    even if it is interrupted.
+    """
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    watermark = db.query(func.max(CustomerDailyRollup.refreshed_at)).scalar()
+    stats = {"backfilled": 0, "bookings": 0, "customers": 0, "wallets": 0}
+
+    # 1. Backfill closed days never rolled up
+    for day in _missing_days(db, today):
+        rebuild_booking_day(db, day)
+        rebuild_customer_day(db, day, snapshot="reconstruct")
+        rebuild_wallet_day(db, day)
+        db.commit()
+        stats["backfilled"] += 1
+
+    # 2. Days touched since the last refresh, and today
+    dirty = {"bookings": set(), "customers": set()}
+    if watermark is not None:
+        if watermark.tzinfo is None:
+            watermark = watermark.replace(tzinfo=timezone.utc)
+        dirty = _dirty_days(db, watermark - DIRTY_OVERLAP)
+
+        # Wallet transactions never change, so a day only needs rolling up once it closes
+        day = _utc_date(watermark)
+        while day < today:
+            rebuild_wallet_day(db, day)
+            stats["wallets"] += 1
+            day += timedelta(days=1)
+
+    for day in sorted(dirty["bookings"] | {today}):
+        rebuild_booking_day(db, day)
+        stats["bookings"] += 1
+    for day in sorted(dirty["customers"] - {today}):
+        rebuild_customer_day(db, day)
+        stats["customers"] += 1
+    rebuild_customer_day(db, today, snapshot="live")
+    stats["customers"] += 1
+
+    db.commit()
+    return stats
+
+
+def _refresh_in_session(session_factory: Callable[[], Session]) -> Dict[str, int]:
+    """refresh_rollups() plus the review summaries, on a session of its own."""
+    db = session_factory()
+    try:
+        stats = refresh_rollups(db)
+        stats["review_summaries"] = build_missing_review_summaries(db)
+        return stats
+    finally:
+        db.close()
+
+
+async def _keep_lock(token: str, ttl: int) -> None:
+    """Renew the refresh lock until cancelled, so a long backfill is never run twice."""
+    while True:
+        await asyncio.sleep(max(ttl / 3, 1))
+        if not await cache_service.extend_lock(REFRESH_LOCK_KEY, token, ttl):
+            logger.warning("Rollup refresh lock lost while refreshing")
+            return
+
+
+async def refresh_if_due(session_factory: Callable[[], Session]) -> bool:
+    """
+    Refresh unless another worker did within the interval. Returns True if
+    this call did. Also builds the review summaries if they were never built.
+
+    The refresh runs in a thread with its own session: the first run
+    backfills every closed day and would otherwise block the event loop.
+    The lock is renewed while it runs and then kept for the interval.
+    """
+    ttl = max(settings.ROLLUP_REFRESH_SECONDS - 1, 1)
+    token = await cache_service.acquire_lock(REFRESH_LOCK_KEY, ttl)
+    if token is None:
+        return False
+
+    keeper = asyncio.create_task(_keep_lock(token, ttl))
+    try:
+        stats = await asyncio.to_thread(_refresh_in_session, session_factory)
+    finally:
+        keeper.cancel()
+    # Next refresh one interval after this one finished
+    await cache_service.extend_lock(REFRESH_LOCK_KEY, token, ttl)
+
+    if stats["backfilled"]:
+        logger.info(f"Rollups backfilled {stats['backfilled']} days")
+    if stats["review_summaries"]:
+        logger.info(f"Built review summaries for {stats['review_summaries']} services")
+    return True
+
+
+def require_rollups(db: Session) -> None:
+    """
+    503 until the refresher has built the rollups for the first time
+    (right after deploy). Readers never build them inline: the backfill
+    scans every table and would run inside a request.
+    """
+    if db.query(CustomerDailyRollup.day).first() is None:
+        raise ServiceUnavailableException(
+            "Statistics are still being built, try again shortly",
+            error_code="ROLLUPS_BUILDING"
+        )
+
+
+# ============ Readers ============
+
+def get_booking_stats(db: Session) -> Dict[str, Any]:
+    """All-time booking counts by status, paid revenue and customers, from the rollups."""
+    require_rollups(db)
+
+    by_status = dict(db.query(
+        BookingDailyRollup.status, func.sum(BookingDailyRollup.bookings)
+    ).group_by(BookingDailyRollup.status).all())
+
+    total_revenue = db.query(func.sum(BookingDailyRollup.revenue)).filter(
+        BookingDailyRollup.payment_status == PaymentStatus.PAID.value
+    ).scalar() or 0
+
+    by_region = {
+        region or "unknown": {"bookings": int(count or 0), "revenue": float(revenue or 0)}
+        for region, count, revenue in db.query(
+            BookingDailyRollup.region_code,
+            func.sum(BookingDailyRollup.bookings),
+            func.sum(BookingDailyRollup.revenue).filter(
+                BookingDailyRollup.payment_status == PaymentStatus.PAID.value
+            )
+        ).group_by(BookingDailyRollup.region_code).all()
+    }
+
+    total_customers = db.query(func.sum(CustomerDailyRollup.new_customers)).scalar() or 0
+
+    return {
+        "total_bookings": int(sum(count or 0 for count in by_status.values())),
+        "pending_bookings": int(by_status.get(BookingStatus.PENDING.value) or 0),
+        "confirmed_bookings": int(by_status.get(BookingStatus.CONFIRMED.value) or 0),
+        "completed_bookings": int(by_status.get(BookingStatus.COMPLETED.value) or 0),
+        "total_customers": int(total_customers),
+        "total_revenue": float(total_revenue),
+        "by_region": by_region,
+    }
+
+
+def get_daily_booking_stats(db: Session, start: date, end: date) -> List[Dict[str, Any]]:
+    """Per-day bookings and paid revenue by region for start..end (inclusive)."""
+    require_rollups(db)
+
+    rows = db.query(
+        BookingDailyRollup.day,
+        BookingDailyRollup.region_code,
+        func.sum(BookingDailyRollup.bookings),
+        func.sum(BookingDailyRollup.revenue).filter(
+            BookingDailyRollup.payment_status == PaymentStatus.PAID.value
+        )
+    ).filter(
+        BookingDailyRollup.day >= start,
+        BookingDailyRollup.day <= end
+    ).group_by(BookingDailyRollup.day, BookingDailyRollup.region_code).all()
+
+    days: Dict[date, Dict[str, Any]] = {}
+    for day, region, count, revenue in rows:
+        entry = days.setdefault(day, {"date": day.isoformat(), "bookings": 0, "revenue": 0.0, "by_region": {}})
+        entry["bookings"] += int(count or 0)
+        entry["revenue"] += float(revenue or 0)
+        entry["by_region"][region or "unknown"] = {"bookings": int(count or 0), "revenue": float(revenue or 0)}
+    return [days[day] for day in sorted(days)]
+
+
+def get_subscription_stats(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Subscription counts, MRR and churn from the customer rollups."""
+    require_rollups(db)
+    now = now or datetime.now(timezone.utc)
+    month_start = now.date().replace(day=1)
+
+    latest = db.query(CustomerDailyRollup).order_by(CustomerDailyRollup.day.desc()).first()
+    new_this_month, cancelled_this_month = db.query(
+        func.sum(CustomerDailyRollup.subscriptions_new),
+        func.sum(CustomerDailyRollup.subscriptions_cancelled)
+    ).filter(CustomerDailyRollup.day >= month_start).one()
+    new_this_month = int(new_this_month or 0)
+    cancelled_this_month = int(cancelled_this_month or 0)
+
+    active = latest.subscriptions_active if latest else 0
+    start_row = db.query(CustomerDailyRollup).filter(
+        CustomerDailyRollup.day == month_start - timedelta(days=1)
+    ).first()
+    # Churn: cancelled this month / active at the start of the month
+    active_at_start = start_row.subscriptions_active if start_row else active + cancelled_this_month
+    churn_rate = (cancelled_this_month / active_at_start * 100) if active_at_start > 0 else 0
+
+    return {
+        "total_active": active,
+        "total_paused": latest.subscriptions_paused if latest else 0,
+        "total_cancelled_this_month": cancelled_this_month,
+        "new_this_month": new_this_month,
+        "mrr": Decimal(latest.mrr) if latest else Decimal("0"),
+        "average_visits_per_subscription": round(latest.visits_used / active, 2) if active else 0.0,
+        "churn_rate": round(churn_rate, 2),
+    }
+
+
+def get_wallet_totals(db: Session, wallet_id: int, days: int = 30, now: Optional[datetime] = None) -> Dict[str, Decimal]:
+    """
+    A wallet's credits and debits over the last `days` days (today included).
+
+    Closed days come from the wallet rollups; days not rolled up yet
+    (today, and any day since the last refresh) from the transactions.
+    """
+    now = now or datetime.now(timezone.utc)
+    today = now.date()
+    first_day = today - timedelta(days=days - 1)
+
+    rolled_through = db.query(func.max(WalletDailyRollup.day)).scalar()
+    live_from = first_day
+    credits, debits = Decimal("0"), Decimal("0")
+
+    if rolled_through is not None and rolled_through >= first_day:
+        rolled_credits, rolled_debits = db.query(
+            func.sum(WalletDailyRollup.credits), func.sum(WalletDailyRollup.debits)
+        ).filter(
+            WalletDailyRollup.wallet_id == wallet_id,
+            WalletDailyRollup.day >= first_day,
+            WalletDailyRollup.day <= rolled_through
+        ).one()
+        credits += Decimal(rolled_credits or 0)
+        debits += Decimal(rolled_debits or 0)
+        live_from = rolled_through + timedelta(days=1)
+
+    live_start, _ = _day_bounds(live_from)
+    live_credits, live_debits = db.query(
+        func.sum(WalletTransaction.amount).filter(WalletTransaction.type.in_(CREDIT_TYPES)),
+        func.sum(WalletTransaction.amount).filter(WalletTransaction.type == TransactionType.DEBIT)
+    ).filter(
+        WalletTransaction.wallet_id == wallet_id,
+        WalletTransaction.created_at >= live_start
+    ).one()
+
+    return {
+        "credits": credits + Decimal(live_credits or 0),
+        "debits": debits + Decimal(live_debits or 0),
+    }
@@ -0,0 +1,125 @@
+"""
+Candidate Scoring Kernel
+
+Vectorised distance and weighted-score computation for allocation.
+Takes arrays of candidate latitude/longitude, queue position and rating
+and scores every candidate in one NumPy pass:
+
+    Score = (queue_weight × queue_score) +
+            (distance_weight × distance_score) +
+            (rating_weight × rating_score)
+
+Missing coordinates are passed as NaN and get the neutral distance score.
+"""
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+MAX_DISTANCE_KM = 50.0          # 0km = 1.0 distance score, 50km+ = 0.0
+DEFAULT_DISTANCE_SCORE = 0.5    # Used when either side has no coordinates
+DEFAULT_RATING = 4.0            # Used when a cleaner has no rating
+MISSING_QUEUE_POSITION = 999    # Cleaners not found in the queue
+
+
+@dataclass
+class CandidateScores:
+    """Per-candidate score arrays, aligned with the input order."""
+    queue_position: np.ndarray
+    queue_score: np.ndarray
+    distance_km: np.ndarray       # NaN where distance is unknown
+    distance_score: np.ndarray
+    rating_score: np.ndarray
+    total_score: np.ndarray
+
+
+def haversine_km(
+    lat1: np.ndarray,
+    lon1: np.ndarray,
+    lat2: float,
+    lon2: float
+) -> np.ndarray:
+    """
+    Great-circle distance in kilometers from each (lat1, lon1) to one point.
+
+    Args:
+        lat1, lon1: Arrays of latitudes/longitudes in degrees
+        lat2, lon2: Target point in degrees
+
+    Returns:
+        Array of distances (NaN where the input coordinates are NaN)
+    """
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))
+    lat2 = np.radians(lat2)
+    lon2 = np.radians(lon2)
+
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2 +
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def score_candidates(
+    latitudes: Sequence[float],
+    longitudes: Sequence[float],
+    queue_positions: Sequence[float],
+    ratings: Sequence[float],
+    booking_coords: Optional[Tuple[float, float]],
+    max_queue_position: int,
+    queue_weight: float,
+    distance_weight: float,
+    rating_weight: float
+) -> CandidateScores:
+    """
+    Score all candidates in one pass.
+
+    Args:
+        latitudes, longitudes: Candidate coordinates (NaN if unknown)
+        queue_positions: 1-based queue positions (MISSING_QUEUE_POSITION if absent)
+        ratings: Ratings on a 0-5 scale (NaN if unrated)
+        booking_coords: (latitude, longitude) of the job, or None
+        max_queue_position: Largest position in the queue, computed once
+        queue_weight, distance_weight, rating_weight: Scoring weights
+    """
+    positions = np.asarray(queue_positions, dtype=np.float64)
+    count = positions.shape[0]
+
+    # Queue score (lower position = higher score)
+    if max_queue_position > 0:
+        queue_score = 1.0 - positions / (max_queue_position + 1)
+    else:
+        queue_score = np.full(count, 0.5)
+
+    # Distance score
+    if booking_coords is not None:
+        distance_km = haversine_km(latitudes, longitudes, booking_coords[0], booking_coords[1])
+        distance_score = np.where(
+            np.isnan(distance_km),
+            DEFAULT_DISTANCE_SCORE,
+            np.maximum(0.0, 1.0 - distance_km / MAX_DISTANCE_KM)
+        )
+    else:
+        distance_km = np.full(count, np.nan)
+        distance_score = np.full(count, DEFAULT_DISTANCE_SCORE)
+
+    # Rating score (0-5 normalized to 0-1)
+    rating = np.asarray(ratings, dtype=np.float64)
+    rating_score = np.where(np.isnan(rating) | (rating == 0), DEFAULT_RATING, rating) / 5.0
+
+    total_score = (
+        queue_weight * queue_score +
+        distance_weight * distance_score +
+        rating_weight * rating_score
+    )
+
+    return CandidateScores(
+        queue_position=positions,
+        queue_score=queue_score,
+        distance_km=distance_km,
+        distance_score=distance_score,
+        rating_score=rating_score,
+        total_score=total_score
+    )
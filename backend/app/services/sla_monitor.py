@@ -6,7 +6,7 @@ Can be run as a background task or scheduled cron job.
 """
 from datetime import datetime, timezone, timedelta
 from typing import List, Dict, Any, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_
 import asyncio
 import logging
@@ -59,7 +59,7 @@ class SLAMonitor:
             Booking.status == BookingStatus.ASSIGNED,
             or_(
                 Booking.sla_deadline < now,
-                Booking.scheduled_date + sla_threshold < now
+                Booking.scheduled_date < now - sla_threshold
             )
         ).all()
         
@@ -250,10 +250,15 @@ class SLAMonitor:
             Booking.status.in_([BookingStatus.IN_PROGRESS])
         ).all()
 
+        # Load the assigned employees in one query
+        employee_ids = {job.assigned_employee_id for job in active_employee_jobs}
+        employees = {
+            employee.id: employee
+            for employee in self.db.query(Employee).filter(Employee.id.in_(employee_ids)).all()
+        } if employee_ids else {}
+
         for job in active_employee_jobs:
-            employee = self.db.query(Employee).filter(
-                Employee.id == job.assigned_employee_id
-            ).first()
+            employee = employees.get(job.assigned_employee_id)
 
             if employee and employee.cleaner_status == EmployeeCleanerStatus.OFFLINE:
                 alerts.append({
@@ -276,12 +281,16 @@ class SLAMonitor:
             Booking.cleaner_id != None,
             Booking.assigned_employee_id == None,  # Legacy only
             Booking.status.in_([BookingStatus.IN_PROGRESS])
-        ).all()
+        ).options(joinedload(Booking.cleaner)).all()
+
+        cleaner_ids = {job.cleaner_id for job in active_user_jobs}
+        profiles = {
+            profile.user_id: profile
+            for profile in self.db.query(CleanerProfile).filter(CleanerProfile.user_id.in_(cleaner_ids)).all()
+        } if cleaner_ids else {}
 
         for job in active_user_jobs:
-            profile = self.db.query(CleanerProfile).filter(
-                CleanerProfile.user_id == job.cleaner_id
-            ).first()
+            profile = profiles.get(job.cleaner_id)
 
             if profile and profile.status == CleanerStatus.OFFLINE:
                 alerts.append({
@@ -317,22 +326,37 @@ class BackgroundTaskRunner:
         
         # Start SLA monitoring task
         self._tasks.append(
-            asyncio.create_task(self._run_sla_monitor(db_session_factory))
+            asyncio.create_task(self._run_sla_monitor(db_session_factory), name="sla_monitor")
         )
         
         # Start cooldown release task
         self._tasks.append(
-            asyncio.create_task(self._run_cooldown_releaser(db_session_factory))
+            asyncio.create_task(self._run_cooldown_releaser(db_session_factory), name="cooldown_releaser")
         )
 
         # Start payment timeout checker
         self._tasks.append(
-            asyncio.create_task(self._run_payment_timeout_checker(db_session_factory))
+            asyncio.create_task(self._run_payment_timeout_checker(db_session_factory), name="payment_timeout_checker")
         )
 
         # Start offline cleaner alert checker
         self._tasks.append(
-            asyncio.create_task(self._run_offline_cleaner_checker(db_session_factory))
+            asyncio.create_task(self._run_offline_cleaner_checker(db_session_factory), name="offline_cleaner_checker")
+        )
+
+        # Start batch allocation sweep
+        self._tasks.append(
+            asyncio.create_task(self._run_batch_allocation_sweep(db_session_factory), name="batch_allocation_sweep")
+        )
+
+        # Start dashboard counter reconciliation
+        self._tasks.append(
+            asyncio.create_task(self._run_dashboard_reconciler(db_session_factory), name="dashboard_reconciler")
+        )
+
+        # Start daily rollup refresh
+        self._tasks.append(
+            asyncio.create_task(self._run_rollup_refresher(db_session_factory), name="rollup_refresher")
         )
 
         logger.info("Background tasks started")
@@ -371,6 +395,10 @@ class BackgroundTaskRunner:
                     released = monitor.release_expired_cooldowns()
                     if released > 0:
                         logger.info(f"Released {released} cleaners from cooldown")
+                        from app.services.dashboard_counters import record_cleaner_status_change
+                        await record_cleaner_status_change(
+                            CleanerStatus.COOLING_DOWN, CleanerStatus.AVAILABLE, count=released
+                        )
                 finally:
                     db.close()
             except Exception as e:
@@ -428,6 +456,56 @@ class BackgroundTaskRunner:
 
             await asyncio.sleep(120)  # Check every 2 minutes
 
+    async def _run_batch_allocation_sweep(self, db_session_factory):
+        """Assign any unassigned bookings for the next 24 hours every 5 minutes."""
+        from app.services.batch_allocator import run_batch_allocation
+
+        while self._running:
+            try:
+                db = db_session_factory()
+                try:
+                    result = await run_batch_allocation(db)
+                    if result.assignments:
+                        logger.info(
+                            f"Batch allocation sweep assigned {len(result.assignments)} bookings"
+                        )
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Batch allocation sweep error: {e}")
+
+            await asyncio.sleep(300)  # Sweep every 5 minutes
+
+    async def _run_dashboard_reconciler(self, db_session_factory):
+        """Recount the dashboard counters from the database (one worker per interval)."""
+        from app.config import settings
+        from app.services.dashboard_counters import reconcile_if_due
+
+        while self._running:
+            try:
+                db = db_session_factory()
+                try:
+                    await reconcile_if_due(db)
+                finally:
+                    db.close()
+            except Exception as e:
+                logger.error(f"Dashboard reconciler error: {e}")
+
+            await asyncio.sleep(settings.DASHBOARD_RECONCILE_SECONDS)
+
+    async def _run_rollup_refresher(self, db_session_factory):
+        """Keep the daily rollup tables current (one worker per interval)."""
+        from app.config import settings
+        from app.services.rollups import refresh_if_due
+
+        while self._running:
+            try:
+                await refresh_if_due(db_session_factory)
+            except Exception as e:
+                logger.error(f"Rollup refresher error: {e}")
+
+            await asyncio.sleep(settings.ROLLUP_REFRESH_SECONDS)
+
 
 # Global background task runner
 background_runner = BackgroundTaskRunner()
@@ -0,0 +1,310 @@
+"""
+Slot Capacity Index
+
+Day-level index of slot availability for the booking calendar:
+1. Booking starts per time slot (slot is full at MAX_BOOKINGS_PER_SLOT)
+2. Free experts per time slot
+
+Built from one bookings query and one employee count per (date, region),
+using a sweep over each expert's busy intervals instead of a count query
+per slot. Cached per date and invalidated when a booking on that date is
+created, cancelled, rescheduled or (re)assigned: every session commit that
+changed a booking's status, date or cleaner drops the dates it touched
+(session events below), so no write path has to remember to.
+"""
+import asyncio
+import bisect
+import json
+import logging
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, date
+from typing import Dict, List, Optional, Tuple, Any
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.database import run_db
+from app.models import Address
+from app.models.booking import Booking, BookingStatus
+from app.models.employee import Employee, EmployeeAccountStatus
+from app.services.cache import cache_service
+from app.services.cleaner_assignment import resolve_region
+
+logger = logging.getLogger(__name__)
+
+
+# Bookings that occupy a slot
+ACTIVE_BOOKING_STATUSES = [
+    BookingStatus.PENDING,
+    BookingStatus.PENDING_ASSIGNMENT,
+    BookingStatus.CONFIRMED,
+    BookingStatus.ASSIGNED,
+    BookingStatus.IN_PROGRESS
+]
+
+# Bookings that make their assigned expert unavailable
+BUSY_EXPERT_STATUSES = [
+    BookingStatus.ASSIGNED,
+    BookingStatus.IN_PROGRESS
+]
+
+MAX_BOOKINGS_PER_SLOT = 5          # Maximum concurrent bookings per slot
+EXPERT_WINDOW_MINUTES = 120        # An expert is needed for 2 hours from slot start
+DEFAULT_DURATION_MINUTES = 150     # Bookings without an end time last 2.5 hours
+FALLBACK_EXPERT_COUNT = 8          # Shown when no employees exist yet
+
+CACHE_KEY = "availability:capacity:{date}"
+CACHE_TTL_SECONDS = 300
+ALL_REGIONS = "all"
+
+
+@dataclass
+class SlotCapacityIndex:
+    """Capacity snapshot for one date (and optionally one region)."""
+    date: str
+    region: Optional[str]
+    active_experts: int
+    slot_bookings: Dict[str, int] = field(default_factory=dict)  # "HH:MM" -> booking starts
+    free_experts: Dict[str, int] = field(default_factory=dict)   # "HH:MM" -> free experts
+
+    def unavailable_slots(self) -> List[str]:
+        """Slots that have reached the booking capacity."""
+        return [slot for slot, count in self.slot_bookings.items() if count >= MAX_BOOKINGS_PER_SLOT]
+
+    def expert_count(self, slot_value: str) -> int:
+        """Free experts for a slot (all active experts if the slot is unknown)."""
+        return self.free_experts.get(slot_value, self.active_experts)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "SlotCapacityIndex":
+        return cls(**json.loads(data))
+
+
+def _minute_of_day(value: datetime, check_date: date) -> int:
+    """Minutes from midnight of check_date, in the datetime's own wall clock."""
+    return (value.date() - check_date).days * 1440 + value.hour * 60 + value.minute
+
+
+def _sweep_free_experts(
+    slot_minutes: List[int],
+    busy_intervals: Dict[Any, List[Tuple[int, int]]],
+    active_experts: int
+) -> List[int]:
+    """
+    Count free experts per slot with a difference-array sweep.
+
+    A slot starting at t needs an expert for [t, t + EXPERT_WINDOW_MINUTES),
+    so a busy interval (a, b) blocks every slot with a - window < t < b.
+    Each expert's blocked ranges are merged first so an expert is counted
+    at most once per slot.
+    """
+    diff = [0] * (len(slot_minutes) + 1)
+
+    for intervals in busy_intervals.values():
+        blocked = sorted((start - EXPERT_WINDOW_MINUTES, end) for start, end in intervals)
+
+        merged: List[List[int]] = []
+        for start, end in blocked:
+            if merged and start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        for start, end in merged:
+            lo = bisect.bisect_right(slot_minutes, start)
+            hi = bisect.bisect_left(slot_minutes, end)
+            if lo < hi:
+                diff[lo] += 1
+                diff[hi] -= 1
+
+    free = []
+    busy = 0
+    for i in range(len(slot_minutes)):
+        busy += diff[i]
+        free.append(max(0, active_experts - busy))
+    return free
+
+
+def build_capacity_index(
+    db: Session,
+    check_date: date,
+    slot_values: List[str],
+    region: Optional[str] = None
+) -> SlotCapacityIndex:
+    """
+    Build the capacity index for a date from the database.
+
+    Args:
+        db: Database session
+        check_date: Date to index
+        slot_values: Slot start times ("HH:MM") to compute expert counts for
+        region: Optional region code to restrict bookings and experts to
+    """
+    start_of_day = datetime.combine(check_date, datetime.min.time())
+    end_of_day = datetime.combine(check_date, datetime.max.time())
+
+    # Active experts
+    employee_query = db.query(func.count(Employee.id)).filter(
+        Employee.account_status == EmployeeAccountStatus.ACTIVE
+    )
+    if region:
+        employee_query = employee_query.filter(Employee.region_code == region)
+    active_experts = employee_query.scalar() or 0
+
+    # Every active booking on the date, with what is needed to filter by region
+    rows = db.query(
+        Booking.scheduled_date,
+        Booking.scheduled_end_time,
+        Booking.status,
+        Booking.assigned_employee_id,
+        Address.city,
+        Address.latitude,
+        Address.longitude,
+        Employee.region_code
+    ).join(
+        Address, Booking.address_id == Address.id
+    ).outerjoin(
+        Employee, Booking.assigned_employee_id == Employee.id
+    ).filter(
+        Booking.scheduled_date >= start_of_day,
+        Booking.scheduled_date <= end_of_day,
+        Booking.status.in_(ACTIVE_BOOKING_STATUSES)
+    ).all()
+
+    slot_bookings: Dict[str, int] = {}
+    busy_intervals: Dict[Any, List[Tuple[int, int]]] = {}
+
+    for scheduled, scheduled_end, status, employee_id, city, lat, lon, employee_region in rows:
+        if not region or resolve_region(city, lat, lon) == region:
+            slot_time = scheduled.strftime("%H:%M")
+            slot_bookings[slot_time] = slot_bookings.get(slot_time, 0) + 1
+
+        if employee_id and status in BUSY_EXPERT_STATUSES and (not region or employee_region == region):
+            start = _minute_of_day(scheduled, check_date)
+            end = (
+                _minute_of_day(scheduled_end, check_date) if scheduled_end
+                else start + DEFAULT_DURATION_MINUTES
+            )
+            busy_intervals.setdefault(employee_id, []).append((start, end))
+
+    if active_experts == 0 and not region:
+        # Return mock data if no employees in system
+        active_experts = FALLBACK_EXPERT_COUNT
+        free_experts = {slot: FALLBACK_EXPERT_COUNT for slot in slot_values}
+    else:
+        ordered = sorted(slot_values, key=lambda v: tuple(map(int, v.split(":"))))
+        slot_minutes = [int(v[:2]) * 60 + int(v[3:5]) for v in ordered]
+        counts = _sweep_free_experts(slot_minutes, busy_intervals, active_experts)
+        free_experts = dict(zip(ordered, counts))
+
+    return SlotCapacityIndex(
+        date=check_date.isoformat(),
+        region=region,
+        active_experts=active_experts,
+        slot_bookings=slot_bookings,
+        free_experts=free_experts
+    )
+
+
+async def get_capacity_index(
+    db,
+    check_date: date,
+    slot_values: List[str],
+    region: Optional[str] = None
+) -> SlotCapacityIndex:
+    """
+    Get the capacity index for a date, building and caching it on a miss.
+
+    Accepts a Session or an AsyncSession.
+    """
+    cache_key = CACHE_KEY.format(date=check_date.isoformat())
+    field_name = region or ALL_REGIONS
+
+    try:
+        cached = await cache_service.hget(cache_key, field_name)
+        if cached:
+            index = SlotCapacityIndex.from_json(cached)
+            if all(slot in index.free_experts for slot in slot_values):
+                return index
+    except Exception as e:
+        logger.debug(f"Capacity index cache read failed: {e}")
+
+    index = await run_db(db, build_capacity_index, check_date, slot_values, region)
+
+    try:
+        async with cache_service.pipeline() as pipe:
+            pipe.hset(cache_key, field_name, index.to_json())
+            pipe.expire(cache_key, CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.debug(f"Capacity index cache write failed: {e}")
+
+    return index
+
+
+async def invalidate_capacity_index(*dates: Optional[datetime]) -> None:
+    """
+    Drop cached capacity for the given dates (all regions).
+
+    Runs automatically after any commit that changes a booking on the
+    date; endpoints also await it so the next read sees the change.
+    Accepts dates or datetimes; None values are ignored.
+    """
+    for value in dates:
+        if value is None:
+            continue
+        day = value.date() if isinstance(value, datetime) else value
+        try:
+            await cache_service.delete(CACHE_KEY.format(date=day.isoformat()))
+        except Exception as e:
+            logger.debug(f"Capacity index invalidation failed for {day}: {e}")
+
+
+# ============ Invalidation on commit ============
+
+# Booking columns that change the capacity index
+CAPACITY_ATTRIBUTES = ("status", "scheduled_date", "scheduled_end_time", "assigned_employee_id")
+DIRTY_DATES_KEY = "capacity_dirty_dates"
+
+
+def _schedule_invalidation(dates: set) -> None:
+    """Run invalidate_capacity_index (fire-and-forget when a loop is running)."""
+    coro = invalidate_capacity_index(*dates)
+    try:
+        asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        # No event loop in this thread (scripts, worker threads)
+        try:
+            asyncio.run(coro)
+        except Exception as e:
+            logger.debug(f"Capacity index invalidation failed: {e}")
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_capacity_dates(session, flush_context, instances):
+    """Remember the dates of bookings created, deleted or moved in this transaction."""
+    dates = session.info.setdefault(DIRTY_DATES_KEY, set())
+    for booking in list(session.new) + list(session.deleted):
+        if isinstance(booking, Booking):
+            dates.add(booking.scheduled_date)
+    for booking in session.dirty:
+        if not isinstance(booking, Booking):
+            continue
+        state = inspect(booking)
+        if any(state.attrs[name].history.has_changes() for name in CAPACITY_ATTRIBUTES):
+            dates.add(booking.scheduled_date)
+            dates.update(state.attrs.scheduled_date.history.deleted)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_dates(session):
+    dates = {value for value in session.info.pop(DIRTY_DATES_KEY, ()) if value is not None}
+    if dates:
+        _schedule_invalidation(dates)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_dates(session):
+    session.info.pop(DIRTY_DATES_KEY, None)
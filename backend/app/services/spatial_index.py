@@ -0,0 +1,273 @@
+"""
+Spatial Index
+
+In-process grid-bucket index for coordinate lookups:
+1. Which region contains a point (nearest region anchor)
+2. Which cleaners are within R km of a point (live cleaner positions)
+
+Points are bucketed into fixed lat/lon cells, so a radius query only
+visits the cells overlapping the search box and runs the Haversine check
+on those few points.
+
+Region boundaries are approximated by the cells around a set of anchor
+points per region (emirate capitals plus outlying towns). A point belongs
+to the region of its nearest anchor within MAX_ANCHOR_DISTANCE_KM; points
+further out resolve to None. Near borders the nearest anchor can be in the
+wrong emirate, so resolve_region() uses this only when the address city
+is missing or unknown.
+"""
+import logging
+import math
+import threading
+import time
+from typing import Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.2
+DEFAULT_CELL_DEGREES = 0.05         # ~5.5km cells
+MAX_ANCHOR_DISTANCE_KM = 80.0
+CLEANER_REFRESH_SECONDS = 30        # How often to pull positions from the shared store
+
+
+# Anchor points per region (latitude, longitude, region_code)
+REGION_ANCHORS: List[Tuple[float, float, str]] = [
+    # Dubai
+    (25.2048, 55.2708, "DXB"),   # Dubai
+    (25.0800, 55.1400, "DXB"),   # Dubai Marina
+    (25.0118, 55.0611, "DXB"),   # Jebel Ali
+    (24.9700, 55.3900, "DXB"),   # Al Lisaili
+    (24.8000, 56.1200, "DXB"),   # Hatta
+    # Abu Dhabi
+    (24.4539, 54.3773, "AUH"),   # Abu Dhabi
+    (24.3500, 54.5000, "AUH"),   # Mussafah
+    (24.5300, 54.6700, "AUH"),   # Al Shahama
+    (24.7000, 54.8400, "AUH"),   # Al Rahba
+    (24.2075, 55.7447, "AUH"),   # Al Ain
+    (23.6800, 53.7000, "AUH"),   # Madinat Zayed
+    (24.1100, 52.7300, "AUH"),   # Ruwais
+    # Sharjah
+    (25.3462, 55.4211, "SHJ"),   # Sharjah
+    (25.2900, 55.8800, "SHJ"),   # Al Dhaid
+    (25.3400, 56.3500, "SHJ"),   # Khor Fakkan
+    (25.0700, 56.3500, "SHJ"),   # Kalba
+    # Ajman
+    (25.4052, 55.5136, "AJM"),   # Ajman
+    # Umm Al Quwain
+    (25.5647, 55.5552, "UAQ"),   # Umm Al Quwain
+    # Ras Al Khaimah
+    (25.7895, 55.9432, "RAK"),   # Ras Al Khaimah
+    (25.6600, 55.7800, "RAK"),   # Al Jazirah Al Hamra
+    # Fujairah
+    (25.1288, 56.3265, "FUJ"),   # Fujairah
+    (25.5900, 56.2600, "FUJ"),   # Dibba Al Fujairah
+    (25.2500, 56.2000, "FUJ"),   # Masafi
+]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometers."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class GridIndex:
+    """
+    Fixed-size lat/lon bucket grid.
+
+    Each key has at most one position; re-inserting a key moves it.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self._positions: Dict[Hashable, Tuple[float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def insert(self, key: Hashable, lat: float, lon: float) -> None:
+        """Add or move a point."""
+        self.remove(key)
+        self._positions[key] = (lat, lon)
+        self._cells.setdefault(self._cell(lat, lon), {})[key] = (lat, lon)
+
+    def remove(self, key: Hashable) -> None:
+        """Remove a point if present."""
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        cell = self._cell(*position)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def position(self, key: Hashable) -> Optional[Tuple[float, float]]:
+        """Current position of a key."""
+        return self._positions.get(key)
+
+    def within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[Hashable, float]]:
+        """
+        All points within radius_km of (lat, lon), nearest first.
+
+        Returns:
+            List of (key, distance_km)
+        """
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 0.01))
+
+        min_row, min_col = self._cell(lat - dlat, lon - dlon)
+        max_row, max_col = self._cell(lat + dlat, lon + dlon)
+
+        results = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                bucket = self._cells.get((row, col))
+                if not bucket:
+                    continue
+                for key, (plat, plon) in bucket.items():
+                    distance = haversine_km(lat, lon, plat, plon)
+                    if distance <= radius_km:
+                        results.append((key, distance))
+
+        results.sort(key=lambda item: item[1])
+        return results
+
+    def nearest(self, lat: float, lon: float, max_km: float) -> Optional[Tuple[Hashable, float]]:
+        """
+        Nearest point within max_km, searching outwards ring by ring.
+
+        Returns:
+            (key, distance_km) or None
+        """
+        radius = min(self.cell_degrees * KM_PER_DEGREE_LAT, max_km)
+        while True:
+            found = self.within(lat, lon, radius)
+            if found:
+                return found[0]
+            if radius >= max_km:
+                return None
+            radius = min(radius * 2, max_km)
+
+
+class SpatialIndex:
+    """
+    Region and cleaner lookups over one process-wide grid.
+
+    Cleaner positions are updated in place when reported to this worker
+    and pulled from the shared location store by sync_cleaners() so other
+    workers' updates are picked up.
+    """
+
+    def __init__(self, cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self._lock = threading.Lock()
+        self._anchors = GridIndex(cell_degrees)
+        self._anchor_regions: Dict[int, str] = {}
+        for i, (lat, lon, region) in enumerate(REGION_ANCHORS):
+            self._anchors.insert(i, lat, lon)
+            self._anchor_regions[i] = region
+
+        self._cleaners = GridIndex(cell_degrees)
+        self._cleaners_synced_at = 0.0
+
+    # ============ Regions ============
+
+    def region_for_point(
+        self,
+        lat: float,
+        lon: float,
+        max_km: float = MAX_ANCHOR_DISTANCE_KM
+    ) -> Optional[str]:
+        """Region code containing a point, or None if it is outside every region."""
+        found = self._anchors.nearest(lat, lon, max_km)
+        if not found:
+            return None
+        return self._anchor_regions[found[0]]
+
+    def region_bounds(
+        self,
+        region_code: str,
+        max_km: float = MAX_ANCHOR_DISTANCE_KM
+    ) -> Optional[Tuple[float, float, float, float]]:
+        """
+        (min_lat, max_lat, min_lon, max_lon) box holding every point that
+        can resolve to the region, for prefiltering in SQL. Points in the
+        box may still belong to a neighbouring region; confirm with
+        region_for_point(). None for an unknown region.
+        """
+        anchors = [(lat, lon) for lat, lon, region in REGION_ANCHORS if region == region_code]
+        if not anchors:
+            return None
+        lat_margin = max_km / KM_PER_DEGREE_LAT
+        lon_margin = max(
+            # Degrees of longitude are shortest at the box's poleward edge
+            max_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(abs(lat) + lat_margin)))
+            for lat, _ in anchors
+        )
+        return (
+            min(lat for lat, _ in anchors) - lat_margin,
+            max(lat for lat, _ in anchors) + lat_margin,
+            min(lon for _, lon in anchors) - lon_margin,
+            max(lon for _, lon in anchors) + lon_margin,
+        )
+
+    # ============ Cleaners ============
+
+    def update_cleaner(self, employee_id, lat: float, lon: float) -> None:
+        """Set a cleaner's current position."""
+        with self._lock:
+            self._cleaners.insert(str(employee_id), lat, lon)
+
+    def remove_cleaner(self, employee_id) -> None:
+        """Forget a cleaner's position."""
+        with self._lock:
+            self._cleaners.remove(str(employee_id))
+
+    def replace_cleaners(self, positions: Dict[str, Tuple[float, float]]) -> None:
+        """Replace every cleaner position (used when syncing from the shared store)."""
+        cleaners = GridIndex(self._cleaners.cell_degrees)
+        for employee_id, (lat, lon) in positions.items():
+            cleaners.insert(str(employee_id), lat, lon)
+        with self._lock:
+            self._cleaners = cleaners
+            self._cleaners_synced_at = time.monotonic()
+
+    def cleaner_position(self, employee_id) -> Optional[Tuple[float, float]]:
+        """Last known position of a cleaner."""
+        return self._cleaners.position(str(employee_id))
+
+    def cleaners_within(self, lat: float, lon: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        Cleaners within radius_km of a point, nearest first.
+
+        Returns:
+            List of (employee_id as string, distance_km)
+        """
+        with self._lock:
+            return self._cleaners.within(lat, lon, radius_km)
+
+    async def sync_cleaners(self, max_age_seconds: int = CLEANER_REFRESH_SECONDS) -> None:
+        """Reload cleaner positions from the shared location store if stale."""
+        if time.monotonic() - self._cleaners_synced_at < max_age_seconds:
+            return
+
+        from app.services.cleaner_location import get_cleaner_locations
+
+        try:
+            self.replace_cleaners(await get_cleaner_locations())
+        except Exception as e:
+            logger.debug(f"Could not sync cleaner positions: {e}")
+
+
+# Global spatial index instance
+spatial_index = SpatialIndex()
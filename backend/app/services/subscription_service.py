@@ -9,7 +9,6 @@ Handles all subscription-related business logic:
 - Rollover calculations
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 from typing import Optional, List, Tuple
@@ -25,6 +24,7 @@ from app.models.subscription import (
 from app.models.user import User, Address
 from app.models.booking import Booking, BookingStatus
 from app.models.service import Service
+from app.services.catalog import catalog_cache
 
 logger = logging.getLogger(__name__)
 
@@ -45,23 +45,27 @@ class SubscriptionService:
 
     # ============ Plan Operations ============
 
+    # Plans are served from the catalog snapshot (read-only rows, see
+    # app.services.catalog), which is not checked against the catalog
+    # version here. Write paths load the plan from the session with
+    # _get_plan_for_write() so a plan deactivated or changed on another
+    # worker is seen.
+
     def get_active_plans(self) -> List[SubscriptionPlan]:
         """Get all active subscription plans."""
-        return self.db.query(SubscriptionPlan).filter(
-            SubscriptionPlan.is_active == True
-        ).order_by(SubscriptionPlan.display_order).all()
+        return catalog_cache.get_loaded(self.db).active_plans()
 
     def get_plan_by_id(self, plan_id: int) -> Optional[SubscriptionPlan]:
         """Get a plan by ID."""
-        return self.db.query(SubscriptionPlan).filter(
-            SubscriptionPlan.id == plan_id
-        ).first()
+        return catalog_cache.get_loaded(self.db).get_plan(plan_id)
 
     def get_plan_by_slug(self, slug: str) -> Optional[SubscriptionPlan]:
         """Get a plan by slug."""
-        return self.db.query(SubscriptionPlan).filter(
-            SubscriptionPlan.slug == slug
-        ).first()
+        return catalog_cache.get_loaded(self.db).get_plan_by_slug(slug)
+
+    def _get_plan_for_write(self, plan_id: int) -> Optional[SubscriptionPlan]:
+        """Current plan row from the database, for creating or changing subscriptions."""
+        return self.db.query(SubscriptionPlan).filter(SubscriptionPlan.id == plan_id).first()
 
     # ============ Subscription CRUD ============
 
@@ -87,7 +91,7 @@ class SubscriptionService:
         It becomes ACTIVE after the first successful payment.
         """
         # Validate plan exists and is active
-        plan = self.get_plan_by_id(plan_id)
+        plan = self._get_plan_for_write(plan_id)
         if not plan or not plan.is_active:
             raise ValueError(f"Invalid or inactive plan: {plan_id}")
 
@@ -648,7 +652,7 @@ class SubscriptionService:
         if not subscription:
             raise ValueError(f"Subscription not found: {subscription_id}")
 
-        new_plan = self.get_plan_by_id(new_plan_id)
+        new_plan = self._get_plan_for_write(new_plan_id)
         if not new_plan or not new_plan.is_active:
             raise ValueError(f"Invalid or inactive plan: {new_plan_id}")
 
@@ -742,57 +746,11 @@ class SubscriptionService:
     # ============ Statistics ============
 
     def get_subscription_stats(self) -> dict:
-        """Get subscription statistics for admin dashboard."""
-        now = datetime.utcnow()
-        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-
-        # Count by status
-        active_count = self.db.query(Subscription).filter(
-            Subscription.status == SubscriptionStatus.ACTIVE
-        ).count()
-
-        paused_count = self.db.query(Subscription).filter(
-            Subscription.status == SubscriptionStatus.PAUSED
-        ).count()
-
-        # Cancelled this month
-        cancelled_this_month = self.db.query(Subscription).filter(
-            Subscription.status == SubscriptionStatus.CANCELLED,
-            Subscription.cancelled_at >= month_start
-        ).count()
-
-        # New this month
-        new_this_month = self.db.query(Subscription).filter(
-            Subscription.created_at >= month_start
-        ).count()
-
-        # MRR (Monthly Recurring Revenue)
-        mrr_result = self.db.query(
-            func.sum(SubscriptionPlan.monthly_price)
-        ).join(Subscription).filter(
-            Subscription.status == SubscriptionStatus.ACTIVE
-        ).scalar()
-        mrr = Decimal(mrr_result or 0)
+        """
+        Get subscription statistics for admin dashboard.
 
-        # Average visits per subscription
-        avg_visits_result = self.db.query(
-            func.avg(Subscription.visits_used)
-        ).filter(
-            Subscription.status == SubscriptionStatus.ACTIVE
-        ).scalar()
-        avg_visits = float(avg_visits_result or 0)
-
-        # Churn rate (cancelled / total active at month start)
-        # Simplified calculation
-        total_at_start = active_count + cancelled_this_month
-        churn_rate = (cancelled_this_month / total_at_start * 100) if total_at_start > 0 else 0
-
-        return {
-            "total_active": active_count,
-            "total_paused": paused_count,
-            "total_cancelled_this_month": cancelled_this_month,
-            "new_this_month": new_this_month,
-            "mrr": mrr,
-            "average_visits_per_subscription": round(avg_visits, 2),
-            "churn_rate": round(churn_rate, 2)
-        }
+        Read from the daily customer rollups (one row per day) rather than
+        counted over the subscriptions table; see app/services/rollups.py.
+        """
+        from app.services.rollups import get_subscription_stats
+        return get_subscription_stats(self.db)
@@ -177,7 +177,8 @@ class ConnectionManager:
             EventType.JOB_STARTED,
             EventType.JOB_COMPLETED,
             EventType.JOB_CANCELLED,
-            EventType.JOB_FAILED
+            EventType.JOB_FAILED,
+            EventType.JOB_ALLOCATION_FAILED
         ]:
             # Send to assigned cleaner
             cleaner_id = event.payload.get("cleaner_id")
@@ -0,0 +1,376 @@
+"""
+Allocation Job Queue
+
+Bookings are queued for allocation instead of being allocated inside the
+request that creates them. Allocation workers (allocation_worker.py) claim
+jobs from the queue, and each job gets:
+1. Retry with exponential backoff when no cleaner could be assigned
+2. Dead-lettering after max_attempts (status DEAD, admin is alerted)
+3. Per-region fairness: claims rotate round-robin over regions with
+   ready jobs, so a backlog in one region cannot starve the others
+
+Backends:
+- DatabaseAllocationQueue: the allocation_jobs table. Jobs are claimed
+  with FOR UPDATE SKIP LOCKED, so workers in several processes can share
+  it, and jobs survive restarts. A RUNNING job whose worker died is picked
+  up again once its lease expires.
+- InMemoryAllocationQueue: single-process stand-in for local runs and
+  scripts. Jobs are lost on restart.
+"""
+import logging
+import random
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import func, or_, and_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.allocation import AllocationJob, AllocationJobStatus
+
+logger = logging.getLogger(__name__)
+
+NO_REGION = "ANY"            # Queue bucket for bookings without a resolvable region
+LEASE_SECONDS = 300          # RUNNING jobs older than this are considered abandoned
+MAX_ERROR_LENGTH = 1000
+
+
+@dataclass
+class QueuedAllocation:
+    """A claimed allocation job, detached from any session."""
+    id: int
+    booking_id: int
+    region_code: str
+    duration_hours: float
+    attempts: int
+    max_attempts: int
+
+
+def retry_delay_seconds(
+    attempts: int,
+    base_seconds: Optional[int] = None,
+    max_seconds: Optional[int] = None
+) -> float:
+    """Exponential backoff with jitter: base, 2×base, 4×base... capped at max."""
+    base = base_seconds if base_seconds is not None else settings.ALLOCATION_RETRY_BASE_SECONDS
+    cap = max_seconds if max_seconds is not None else settings.ALLOCATION_RETRY_MAX_SECONDS
+    delay = min(base * (2 ** max(attempts - 1, 0)), cap)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _rotate(regions: List[str], last_region: Optional[str]) -> List[str]:
+    """Order regions round-robin, starting after the last region served."""
+    regions = sorted(regions)
+    if last_region is None:
+        return regions
+    split = next((i for i, region in enumerate(regions) if region > last_region), 0)
+    return regions[split:] + regions[:split]
+
+
+class AllocationQueue(ABC):
+    """Interface shared by the queue backends."""
+
+    # Whether enqueue() writes through the caller's session. If it does not,
+    # the caller must enqueue only after the booking is committed, or a
+    # worker could claim the job before the booking is visible
+    transactional: bool = True
+
+    @abstractmethod
+    def enqueue(
+        self,
+        db: Session,
+        booking_id: int,
+        region_code: Optional[str],
+        duration_hours: float = 2.5
+    ) -> None:
+        """
+        Queue a booking for allocation.
+
+        The database backend adds the job to the caller's session, so it is
+        committed atomically with the booking; the caller must commit.
+        """
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[QueuedAllocation]:
+        """Claim the next ready job (round-robin over regions), or None."""
+
+    @abstractmethod
+    def complete(self, job: QueuedAllocation, assigned_employee_id: Any = None) -> None:
+        """Mark a job done."""
+
+    @abstractmethod
+    def fail(self, job: QueuedAllocation, error: str) -> AllocationJobStatus:
+        """
+        Record a failed attempt.
+
+        Returns QUEUED if the job will be retried after a backoff, or DEAD
+        if it has used up its attempts.
+        """
+
+    @abstractmethod
+    def requeue(self, job_id: int) -> bool:
+        """Give a dead job a fresh set of attempts. Returns False if not found."""
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, Any]:
+        """Job counts by status and queued jobs by region."""
+
+
+class DatabaseAllocationQueue(AllocationQueue):
+    """Queue backed by the allocation_jobs table."""
+
+    def __init__(self, session_factory: Callable[[], Session]):
+        self._session_factory = session_factory
+        self._last_region: Optional[str] = None
+
+    def enqueue(self, db, booking_id, region_code, duration_hours=2.5):
+        db.add(AllocationJob(
+            booking_id=booking_id,
+            region_code=region_code or NO_REGION,
+            duration_hours=Decimal(str(duration_hours)),
+            status=AllocationJobStatus.QUEUED,
+            max_attempts=settings.ALLOCATION_MAX_ATTEMPTS,
+            available_at=datetime.now(timezone.utc)
+        ))
+
+    @staticmethod
+    def _ready_filter(now: datetime):
+        return or_(
+            and_(
+                AllocationJob.status == AllocationJobStatus.QUEUED,
+                AllocationJob.available_at <= now
+            ),
+            and_(
+                AllocationJob.status == AllocationJobStatus.RUNNING,
+                AllocationJob.locked_at < now - timedelta(seconds=LEASE_SECONDS)
+            )
+        )
+
+    def claim(self, worker_id):
+        now = datetime.now(timezone.utc)
+        db = self._session_factory()
+        try:
+            regions = [
+                region for (region,) in db.query(AllocationJob.region_code).filter(
+                    self._ready_filter(now)
+                ).distinct().all()
+            ]
+
+            for region in _rotate(regions, self._last_region):
+                job = db.query(AllocationJob).filter(
+                    self._ready_filter(now),
+                    AllocationJob.region_code == region
+                ).order_by(
+                    AllocationJob.available_at.asc(), AllocationJob.id.asc()
+                ).with_for_update(skip_locked=True).first()
+
+                if not job:
+                    continue
+
+                job.status = AllocationJobStatus.RUNNING
+                job.locked_by = worker_id
+                job.locked_at = now
+                job.attempts += 1
+                claimed = QueuedAllocation(
+                    id=job.id,
+                    booking_id=job.booking_id,
+                    region_code=job.region_code,
+                    duration_hours=float(job.duration_hours),
+                    attempts=job.attempts,
+                    max_attempts=job.max_attempts
+                )
+                db.commit()
+                self._last_region = region
+                return claimed
+
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def complete(self, job, assigned_employee_id=None):
+        db = self._session_factory()
+        try:
+            db.query(AllocationJob).filter(AllocationJob.id == job.id).update({
+                AllocationJob.status: AllocationJobStatus.DONE,
+                AllocationJob.assigned_employee_id: assigned_employee_id,
+                AllocationJob.completed_at: datetime.now(timezone.utc),
+                AllocationJob.locked_by: None,
+                AllocationJob.locked_at: None
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def fail(self, job, error):
+        now = datetime.now(timezone.utc)
+        dead = job.attempts >= job.max_attempts
+        status = AllocationJobStatus.DEAD if dead else AllocationJobStatus.QUEUED
+
+        values = {
+            AllocationJob.status: status,
+            AllocationJob.last_error: error[:MAX_ERROR_LENGTH],
+            AllocationJob.locked_by: None,
+            AllocationJob.locked_at: None
+        }
+        if dead:
+            values[AllocationJob.completed_at] = now
+        else:
+            values[AllocationJob.available_at] = now + timedelta(seconds=retry_delay_seconds(job.attempts))
+
+        db = self._session_factory()
+        try:
+            db.query(AllocationJob).filter(AllocationJob.id == job.id).update(
+                values, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+        return status
+
+    def requeue(self, job_id):
+        db = self._session_factory()
+        try:
+            updated = db.query(AllocationJob).filter(
+                AllocationJob.id == job_id,
+                AllocationJob.status == AllocationJobStatus.DEAD
+            ).update({
+                AllocationJob.status: AllocationJobStatus.QUEUED,
+                AllocationJob.attempts: 0,
+                AllocationJob.available_at: datetime.now(timezone.utc),
+                AllocationJob.completed_at: None
+            }, synchronize_session=False)
+            db.commit()
+            return updated > 0
+        finally:
+            db.close()
+
+    def get_stats(self):
+        db = self._session_factory()
+        try:
+            rows = db.query(
+                AllocationJob.status, AllocationJob.region_code, func.count(AllocationJob.id)
+            ).filter(
+                AllocationJob.status != AllocationJobStatus.DONE
+            ).group_by(AllocationJob.status, AllocationJob.region_code).all()
+        finally:
+            db.close()
+
+        stats = {"by_status": {}, "queued_by_region": {}}
+        for status, region, count in rows:
+            stats["by_status"][status.value] = stats["by_status"].get(status.value, 0) + count
+            if status == AllocationJobStatus.QUEUED:
+                stats["queued_by_region"][region] = count
+        return stats
+
+
+class InMemoryAllocationQueue(AllocationQueue):
+    """Single-process queue for local development and scripts."""
+
+    transactional = False
+
+    def __init__(self):
+        self._jobs: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 1
+        self._last_region: Optional[str] = None
+
+    def enqueue(self, db, booking_id, region_code, duration_hours=2.5):
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = {
+            "id": job_id,
+            "booking_id": booking_id,
+            "region_code": region_code or NO_REGION,
+            "duration_hours": float(duration_hours),
+            "status": AllocationJobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": settings.ALLOCATION_MAX_ATTEMPTS,
+            "available_at": datetime.now(timezone.utc),
+            "last_error": None,
+        }
+
+    def claim(self, worker_id):
+        now = datetime.now(timezone.utc)
+        ready = [
+            job for job in self._jobs.values()
+            if job["status"] == AllocationJobStatus.QUEUED and job["available_at"] <= now
+        ]
+        if not ready:
+            return None
+
+        region = _rotate(list({job["region_code"] for job in ready}), self._last_region)[0]
+        job = min(
+            (job for job in ready if job["region_code"] == region),
+            key=lambda j: (j["available_at"], j["id"])
+        )
+        job["status"] = AllocationJobStatus.RUNNING
+        job["attempts"] += 1
+        self._last_region = region
+
+        return QueuedAllocation(
+            id=job["id"],
+            booking_id=job["booking_id"],
+            region_code=job["region_code"],
+            duration_hours=job["duration_hours"],
+            attempts=job["attempts"],
+            max_attempts=job["max_attempts"]
+        )
+
+    def complete(self, job, assigned_employee_id=None):
+        # Finished jobs are not kept in memory
+        self._jobs.pop(job.id, None)
+
+    def fail(self, job, error):
+        record = self._jobs.get(job.id)
+        if record is None:
+            return AllocationJobStatus.DEAD
+
+        record["last_error"] = error[:MAX_ERROR_LENGTH]
+        if job.attempts >= job.max_attempts:
+            record["status"] = AllocationJobStatus.DEAD
+        else:
+            record["status"] = AllocationJobStatus.QUEUED
+            record["available_at"] = datetime.now(timezone.utc) + timedelta(
+                seconds=retry_delay_seconds(job.attempts)
+            )
+        return record["status"]
+
+    def requeue(self, job_id):
+        record = self._jobs.get(job_id)
+        if record is None or record["status"] != AllocationJobStatus.DEAD:
+            return False
+        record.update(
+            status=AllocationJobStatus.QUEUED,
+            attempts=0,
+            available_at=datetime.now(timezone.utc)
+        )
+        return True
+
+    def get_stats(self):
+        stats = {"by_status": {}, "queued_by_region": {}}
+        for job in self._jobs.values():
+            status = job["status"].value
+            stats["by_status"][status] = stats["by_status"].get(status, 0) + 1
+            if job["status"] == AllocationJobStatus.QUEUED:
+                region = job["region_code"]
+                stats["queued_by_region"][region] = stats["queued_by_region"].get(region, 0) + 1
+        return stats
+
+
+def create_allocation_queue(backend: Optional[str] = None) -> AllocationQueue:
+    """Build the queue backend named in settings (ALLOCATION_QUEUE_BACKEND)."""
+    backend = backend or settings.ALLOCATION_QUEUE_BACKEND
+    if backend == "memory":
+        return InMemoryAllocationQueue()
+    if backend != "database":
+        logger.warning(f"Unknown allocation queue backend '{backend}', using database")
+
+    from app.database import SessionLocal
+    return DatabaseAllocationQueue(SessionLocal)
+
+
+# Global queue instance
+allocation_queue = create_allocation_queue()
@@ -0,0 +1,185 @@
+"""
+Allocation Worker Pool
+
+Runs ALLOCATION_WORKERS asyncio workers that take jobs from the allocation
+queue and assign a cleaner with the allocation engine. Outcomes are pushed
+over the existing event/websocket channels:
+- JOB_ASSIGNED when a cleaner is assigned (customer, cleaner and admin)
+- JOB_ALLOCATION_FAILED when a job is dead-lettered (customer and admin)
+
+Workers poll the queue every POLL_INTERVAL_SECONDS, and are woken
+immediately when a booking is queued in this process (notify()).
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import List, Optional
+
+from sqlalchemy.orm import joinedload
+
+from app.config import settings
+from app.models.allocation import AllocationJobStatus
+from app.models.booking import Booking
+from app.services.allocation_locks import ALLOCATABLE_STATUSES
+from app.services.events import event_publisher, EventType
+from app.tasks.allocation_queue import AllocationQueue, QueuedAllocation, allocation_queue
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class AllocationWorkerPool:
+    """
+    Pool of allocation workers sharing one queue.
+    """
+
+    def __init__(self, queue: AllocationQueue, workers: Optional[int] = None):
+        self.queue = queue
+        self.workers = workers if workers is not None else settings.ALLOCATION_WORKERS
+        self._running = False
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self, db_session_factory):
+        """Start the workers."""
+        self._running = True
+        self._wakeup = asyncio.Event()
+
+        prefix = f"{socket.gethostname()}:{os.getpid()}"
+        for i in range(self.workers):
+            self._tasks.append(
+                asyncio.create_task(
+                    self._run_worker(f"{prefix}:{i}", db_session_factory),
+                    name=f"allocation_worker:{i}"
+                )
+            )
+
+        logger.info(f"Started {self.workers} allocation workers")
+
+    async def stop(self):
+        """Stop the workers. Jobs they were running are retried after their lease expires."""
+        self._running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        logger.info("Allocation workers stopped")
+
+    def notify(self):
+        """Wake idle workers after a job is queued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run_worker(self, worker_id: str, db_session_factory):
+        while self._running:
+            job = None
+            try:
+                job = self.queue.claim(worker_id)
+                if job:
+                    await self.process_job(job, db_session_factory)
+            except Exception as e:
+                logger.error(f"Allocation worker {worker_id} error: {e}")
+                if job:
+                    self._fail(job, str(e))
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def process_job(self, job: QueuedAllocation, db_session_factory):
+        """Allocate one queued booking and publish the outcome."""
+        from app.services.allocation_engine import enhanced_auto_assign
+
+        db = db_session_factory()
+        try:
+            booking = db.query(Booking).options(
+                joinedload(Booking.address)
+            ).filter(Booking.id == job.booking_id).first()
+
+            # Not visible (yet): the creating transaction may not have
+            # committed. Retry with backoff; a deleted booking dead-letters
+            if booking is None:
+                status = self._fail(job, "Booking not found")
+                logger.info(
+                    f"Booking {job.booking_id} for allocation job {job.id} not found "
+                    f"(attempt {job.attempts}/{job.max_attempts}), "
+                    f"{'will retry' if status != AllocationJobStatus.DEAD else 'dead-lettered'}"
+                )
+                return
+
+            # Cancelled or already assigned meanwhile: nothing to do
+            if booking.status not in ALLOCATABLE_STATUSES or booking.assigned_employee_id is not None:
+                self.queue.complete(job, booking.assigned_employee_id)
+                return
+
+            assigned = await enhanced_auto_assign(booking, db, duration_hours=job.duration_hours)
+
+            if not assigned:
+                db.rollback()
+                db.refresh(booking)
+                if booking.assigned_employee_id is not None:
+                    # Another worker (or the batch sweep) assigned it meanwhile
+                    self.queue.complete(job, booking.assigned_employee_id)
+                else:
+                    await self._fail_and_notify(job, booking, "No available cleaners found")
+                return
+
+            self.queue.complete(job, assigned.id)
+
+            await event_publisher.publish(EventType.JOB_ASSIGNED, {
+                "job_id": booking.id,
+                "booking_number": booking.booking_number,
+                "status": booking.status.value,
+                "customer_id": booking.customer_id,
+                "cleaner_id": str(assigned.id),
+                "cleaner_name": assigned.full_name,
+                "employee_id": assigned.employee_id,
+                "scheduled_date": booking.scheduled_date.isoformat(),
+                "auto_assigned": True,
+                "attempts": job.attempts
+            })
+
+            from app.services.slot_capacity import invalidate_capacity_index
+            await invalidate_capacity_index(booking.scheduled_date)
+        finally:
+            db.close()
+
+    def _fail(self, job: QueuedAllocation, error: str):
+        try:
+            return self.queue.fail(job, error)
+        except Exception as e:
+            logger.error(f"Could not record failure for allocation job {job.id}: {e}")
+            return None
+
+    async def _fail_and_notify(self, job: QueuedAllocation, booking: Booking, error: str):
+        status = self._fail(job, error)
+        if status != AllocationJobStatus.DEAD:
+            logger.info(
+                f"Allocation for booking {booking.booking_number} failed "
+                f"(attempt {job.attempts}/{job.max_attempts}), will retry"
+            )
+            return
+
+        logger.warning(
+            f"Allocation for booking {booking.booking_number} dead-lettered "
+            f"after {job.attempts} attempts: {error}"
+        )
+        await event_publisher.publish(EventType.JOB_ALLOCATION_FAILED, {
+            "job_id": booking.id,
+            "booking_number": booking.booking_number,
+            "status": booking.status.value,
+            "customer_id": booking.customer_id,
+            "scheduled_date": booking.scheduled_date.isoformat(),
+            "region_code": job.region_code,
+            "attempts": job.attempts,
+            "reason": error
+        })
+
+
+# Global worker pool
+allocation_workers = AllocationWorkerPool(allocation_queue)
@@ -0,0 +1,205 @@
+"""
+Allocation latency benchmark
+
+Compares candidate filtering with one has_time_conflict query per cleaner
+(the previous behaviour) against the bulk availability snapshot used by
+AllocationEngine, for increasing cleaner counts.
+
+Runs against DATABASE_URL if set, otherwise a throwaway SQLite file.
+Only the tables allocation needs are created, and they are dropped again
+afterwards, so do not point this at a database you care about.
+
+Run with: python benchmark_allocation.py [--cleaners 50,200,1000] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/allocation_bench.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from app.database import Base, engine, SessionLocal
+from app.models import (
+    User, Address, Employee, EmployeeAccountStatus, ServiceCategory, Service,
+    AddOn, Booking, BookingStatus, booking_add_ons
+)
+from app.services.allocation_engine import AllocationEngine
+from app.services.cleaner_assignment import has_time_conflict
+
+BENCH_TABLES = [
+    User.__table__, Address.__table__, Employee.__table__,
+    ServiceCategory.__table__, Service.__table__, AddOn.__table__,
+    Booking.__table__, booking_add_ons,
+]
+
+BOOKINGS_PER_CLEANER = 3
+DURATION_HOURS = 2.5
+
+
+class QueryCounter:
+    """Counts statements executed on the engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed(db, cleaner_count: int, slot: datetime) -> Booking:
+    """Create cleaner_count cleaners with a few bookings each around the slot."""
+    customer = User(email="bench@example.com", password_hash="x", first_name="Bench", last_name="User")
+    db.add(customer)
+    category = ServiceCategory(name="Bench", slug="bench")
+    db.add(category)
+    db.flush()
+    service = Service(
+        category_id=category.id, name="Bench Clean", slug="bench-clean",
+        base_price=Decimal("100"), base_duration_hours=Decimal("2.5")
+    )
+    address = Address(user_id=customer.id, street_address="1 Bench St", city="Dubai", postal_code="00000")
+    db.add_all([service, address])
+    db.flush()
+
+    bookings = []
+    for i in range(cleaner_count):
+        cleaner = Employee(
+            id=uuid.uuid4(),
+            employee_id=f"CLN-DXB-BN-{i:05d}",
+            phone_number=f"+9715{i:08d}",
+            full_name=f"Bench Cleaner {i}",
+            region_code="DXB",
+            account_status=EmployeeAccountStatus.ACTIVE,
+        )
+        db.add(cleaner)
+        for j in range(BOOKINGS_PER_CLEANER):
+            # Spread bookings through the day so roughly a third of cleaners conflict
+            start = slot + timedelta(hours=(i % 9) - 4 + j * 3)
+            bookings.append(Booking(
+                booking_number=f"BN{i:06d}{j}",
+                customer_id=customer.id,
+                assigned_employee_id=cleaner.id,
+                service_id=service.id,
+                address_id=address.id,
+                scheduled_date=start,
+                property_size_sqft=1000,
+                base_price=Decimal("100"),
+                total_price=Decimal("105"),
+                status=BookingStatus.ASSIGNED,
+            ))
+    target = Booking(
+        booking_number="BN-TARGET",
+        customer_id=customer.id,
+        service_id=service.id,
+        address_id=address.id,
+        scheduled_date=slot,
+        property_size_sqft=1000,
+        base_price=Decimal("100"),
+        total_price=Decimal("105"),
+        status=BookingStatus.PENDING_ASSIGNMENT,
+    )
+    db.add_all(bookings + [target])
+    db.commit()
+    return target
+
+
+def legacy_available(db, slot: datetime, exclude_booking_id: int) -> int:
+    """Previous behaviour: one overlap query per active cleaner."""
+    cleaners = db.query(Employee).filter(
+        Employee.account_status == EmployeeAccountStatus.ACTIVE,
+        Employee.region_code == "DXB"
+    ).all()
+    return sum(
+        1 for cleaner in cleaners
+        if not has_time_conflict(cleaner.id, slot, DURATION_HOURS, db, exclude_booking_id)
+    )
+
+
+async def snapshot_available(db, slot: datetime, exclude_booking_id: int) -> int:
+    """Current behaviour: bulk availability snapshot."""
+    engine_ = AllocationEngine(db)
+    candidates = await engine_._get_scored_candidates(
+        region_code="DXB",
+        scheduled_date=slot,
+        duration_hours=DURATION_HOURS,
+        booking_coords=None,
+        exclude_booking_id=exclude_booking_id
+    )
+    return len(candidates)
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    queries = 0
+    for _ in range(repeat):
+        with QueryCounter() as counter:
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        queries = counter.count
+    return result, best * 1000, queries
+
+
+def run(cleaner_counts, repeat: int):
+    slot = (datetime.now(timezone.utc) + timedelta(days=1)).replace(
+        hour=12, minute=0, second=0, microsecond=0
+    )
+    if engine.dialect.name == "sqlite":
+        # SQLite returns naive datetimes, keep the comparisons consistent
+        slot = slot.replace(tzinfo=None)
+    loop = asyncio.new_event_loop()
+
+    print(f"{'cleaners':>9} | {'legacy ms':>10} {'queries':>8} | {'snapshot ms':>12} {'queries':>8} | {'speedup':>7}")
+    print("-" * 70)
+
+    for count in cleaner_counts:
+        Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+        Base.metadata.create_all(bind=engine, tables=BENCH_TABLES)
+        db = SessionLocal()
+        try:
+            target = seed(db, count, slot)
+
+            legacy_n, legacy_ms, legacy_q = timed(
+                lambda: legacy_available(db, slot, target.id), repeat
+            )
+            snap_n, snap_ms, snap_q = timed(
+                lambda: loop.run_until_complete(snapshot_available(db, slot, target.id)), repeat
+            )
+            assert legacy_n == snap_n, f"Mismatch: legacy={legacy_n} snapshot={snap_n}"
+
+            print(
+                f"{count:>9} | {legacy_ms:>10.2f} {legacy_q:>8} | "
+                f"{snap_ms:>12.2f} {snap_q:>8} | {legacy_ms / snap_ms:>6.1f}x"
+            )
+        finally:
+            db.close()
+
+    Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+    loop.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cleaners", default="50,200,1000", help="Comma-separated cleaner counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run([int(c) for c in args.cleaners.split(",")], args.repeat)
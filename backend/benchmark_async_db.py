@@ -0,0 +1,173 @@
+"""
+Async database throughput benchmark
+
+Compares an async route using the synchronous Session (the previous
+behaviour of the hot endpoints: every query blocks the event loop, so a
+worker serves one request at a time) against the same route on the async
+engine (get_async_db), under concurrent load in a single worker.
+
+Each request authenticates the user and builds the slot capacity index
+for a day (the availability hot path, without the cache), i.e. three
+queries. While the load runs, a probe measures event loop lag (how late
+a 10 ms sleep wakes up), i.e. how long everything else in the worker,
+websockets included, is kept waiting.
+
+Runs against DATABASE_URL if set, otherwise a throwaway SQLite file. The
+difference shows best against PostgreSQL, where queries wait on the
+network; --sleep-ms adds a pg_sleep to every request to emulate a slower
+database. Concurrency defaults to the connection pool size
+(DB_POOL_SIZE + DB_MAX_OVERFLOW): above it the sync variant stalls, since
+a request waiting for a connection blocks the loop that would release
+one. Only the tables the benchmark needs are created, and they are
+dropped again afterwards, so do not point this at a database you care
+about.
+
+Run with: python benchmark_async_db.py [--requests 500] [--concurrency 15] [--sleep-ms 0]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/async_bench.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_user, get_current_user_async
+from app.config import settings
+from app.core.security import create_access_token
+from app.database import Base, engine, async_engine, get_db, get_async_db, run_db
+from app.models import User
+from app.services.slot_capacity import build_capacity_index
+from benchmark_allocation import BENCH_TABLES
+from stress_allocation import seed
+
+SLOT_VALUES = [f"{hour:02d}:{minute:02d}" for hour in range(7, 21) for minute in (0, 15, 30, 45)]
+
+
+def build_app(check_date, sleep_seconds: float) -> FastAPI:
+    app = FastAPI()
+    use_sleep = sleep_seconds > 0 and engine.dialect.name == "postgresql"
+
+    @app.get("/sync/slots")
+    async def sync_slots(
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db)
+    ):
+        if use_sleep:
+            db.execute(text("SELECT pg_sleep(:s)"), {"s": sleep_seconds})
+        index = build_capacity_index(db, check_date, SLOT_VALUES)
+        return {"active_experts": index.active_experts}
+
+    @app.get("/async/slots")
+    async def async_slots(
+        current_user: User = Depends(get_current_user_async),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        if use_sleep:
+            await db.execute(text("SELECT pg_sleep(:s)"), {"s": sleep_seconds})
+        index = await run_db(db, build_capacity_index, check_date, SLOT_VALUES)
+        return {"active_experts": index.active_experts}
+
+    return app
+
+
+def _percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)] if ordered else 0.0
+
+
+async def run_load(app: FastAPI, path: str, headers: dict, requests: int, concurrency: int) -> dict:
+    """Fire `requests` requests at `path`, `concurrency` at a time, while probing loop lag."""
+    transport = httpx.ASGITransport(app=app)
+    latencies, lags = [], []
+    done = asyncio.Event()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, headers=headers)
+                response.raise_for_status()
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        async def probe():
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append((time.perf_counter() - started - 0.01) * 1000)
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+
+    return {
+        "rps": requests / elapsed,
+        "p50": _percentile(latencies, 0.5),
+        "p99": _percentile(latencies, 0.99),
+        "lag_p99": _percentile(lags, 0.99),
+        "lag_max": max(lags) if lags else 0.0,
+    }
+
+
+async def run(args) -> None:
+    base = seed(args.cleaners, args.bookings)
+    token = create_access_token(1, "stress@example.com", "customer")
+    headers = {"Authorization": f"Bearer {token}"}
+    app = build_app(base.date(), args.sleep_ms / 1000)
+
+    if args.sleep_ms and engine.dialect.name != "postgresql":
+        print("--sleep-ms needs PostgreSQL; ignored")
+
+    print(f"{engine.dialect.name}: {args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'session':>8} | {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} | {'lag p99 ms':>10} {'lag max ms':>10}")
+    print("-" * 66)
+
+    # Warm both pools first
+    await run_load(app, "/sync/slots", headers, args.concurrency, args.concurrency)
+    await run_load(app, "/async/slots", headers, args.concurrency, args.concurrency)
+
+    results = {}
+    for label, path in (("sync", "/sync/slots"), ("async", "/async/slots")):
+        result = await run_load(app, path, headers, args.requests, args.concurrency)
+        results[label] = result
+        print(
+            f"{label:>8} | {result['rps']:>8.1f} {result['p50']:>8.1f} {result['p99']:>8.1f} | "
+            f"{result['lag_p99']:>10.1f} {result['lag_max']:>10.1f}"
+        )
+
+    print(f"\nThroughput: {results['async']['rps'] / results['sync']['rps']:.2f}x")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW)
+    parser.add_argument("--cleaners", type=int, default=50)
+    parser.add_argument("--bookings", type=int, default=200)
+    parser.add_argument("--sleep-ms", type=int, default=0, help="pg_sleep per request (PostgreSQL only)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    finally:
+        Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+
+
+if __name__ == "__main__":
+    main()
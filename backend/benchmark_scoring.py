@@ -0,0 +1,139 @@
+"""
+Candidate scoring microbenchmark
+
+Compares the previous per-candidate scoring loop (scalar Haversine, queue
+maximum recomputed for every candidate) against the vectorised scoring
+kernel, both on its own and through AllocationEngine._score_candidates.
+
+No database is queried; candidates are synthetic cleaners spread around
+Dubai with random ratings, queue positions and live coordinates.
+DATABASE_URL defaults to a throwaway SQLite file only so the app
+modules can be imported.
+
+Run with: python benchmark_scoring.py [--candidates 100,1000,10000] [--repeat 5]
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from types import SimpleNamespace
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/scoring_bench.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.allocation_engine import AllocationEngine, AllocationConfig, REGION_COORDINATES
+from app.services.scoring_kernel import score_candidates
+
+BOOKING_COORDS = (25.1972, 55.2744)  # Downtown Dubai
+
+
+def make_candidates(count: int, seed: int = 42):
+    rng = random.Random(seed)
+    cleaners = [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            region_code="DXB",
+            rating=round(rng.uniform(3.0, 5.0), 2) if rng.random() > 0.1 else None,
+        )
+        for _ in range(count)
+    ]
+    queue_positions = {str(c.id): i + 1 for i, c in enumerate(rng.sample(cleaners, count))}
+    coords = {
+        str(c.id): (25.2048 + rng.uniform(-0.3, 0.3), 55.2708 + rng.uniform(-0.3, 0.3))
+        for c in cleaners
+    }
+    return cleaners, queue_positions, coords
+
+
+def legacy_haversine(coord1, coord2):
+    lat1, lon1 = math.radians(coord1[0]), math.radians(coord1[1])
+    lat2, lon2 = math.radians(coord2[0]), math.radians(coord2[1])
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+def legacy_scores(cleaners, queue_positions, coords, config):
+    """Previous behaviour: one scalar scoring call per candidate."""
+    totals = []
+    for cleaner in cleaners:
+        queue_pos = queue_positions.get(str(cleaner.id), 999)
+        max_pos = max(queue_positions.values()) if queue_positions else 1
+        queue_score = 1.0 - (queue_pos / (max_pos + 1)) if max_pos > 0 else 0.5
+
+        cleaner_coords = coords.get(str(cleaner.id)) or REGION_COORDINATES[cleaner.region_code]
+        distance_km = legacy_haversine(BOOKING_COORDS, cleaner_coords)
+        distance_score = max(0, 1.0 - (distance_km / 50.0))
+
+        rating_score = float(cleaner.rating or 4.0) / 5.0
+        totals.append(
+            config.queue_weight * queue_score +
+            config.distance_weight * distance_score +
+            config.rating_weight * rating_score
+        )
+    return totals
+
+
+def kernel_scores(cleaners, queue_positions, coords, config):
+    """Kernel only: arrays in, arrays out."""
+    lats = [coords[str(c.id)][0] for c in cleaners]
+    lons = [coords[str(c.id)][1] for c in cleaners]
+    positions = [queue_positions[str(c.id)] for c in cleaners]
+    ratings = [float(c.rating) if c.rating else float("nan") for c in cleaners]
+    return score_candidates(
+        lats, lons, positions, ratings, BOOKING_COORDS,
+        max_queue_position=max(queue_positions.values()),
+        queue_weight=config.queue_weight,
+        distance_weight=config.distance_weight,
+        rating_weight=config.rating_weight
+    ).total_score.tolist()
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best * 1000
+
+
+def run(candidate_counts, repeat: int):
+    config = AllocationConfig()
+    engine = AllocationEngine(db=None, config=config)
+
+    print(f"{'candidates':>10} | {'legacy ms':>10} | {'kernel ms':>10} {'speedup':>8} | {'engine ms':>10} {'speedup':>8}")
+    print("-" * 72)
+
+    for count in candidate_counts:
+        cleaners, queue_positions, coords = make_candidates(count)
+
+        legacy, legacy_ms = timed(lambda: legacy_scores(cleaners, queue_positions, coords, config), repeat)
+        kernel, kernel_ms = timed(lambda: kernel_scores(cleaners, queue_positions, coords, config), repeat)
+        engine_result, engine_ms = timed(
+            lambda: engine._score_candidates(cleaners, queue_positions, BOOKING_COORDS, coords), repeat
+        )
+
+        for expected, got, via_engine in zip(legacy, kernel, engine_result):
+            assert math.isclose(expected, got, abs_tol=1e-9), f"Kernel mismatch: {expected} != {got}"
+            assert math.isclose(expected, via_engine.total_score, abs_tol=1e-9), "Engine mismatch"
+
+        print(
+            f"{count:>10} | {legacy_ms:>10.2f} | {kernel_ms:>10.2f} {legacy_ms / kernel_ms:>7.1f}x | "
+            f"{engine_ms:>10.2f} {legacy_ms / engine_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", default="100,1000,10000", help="Comma-separated candidate counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    run([int(c) for c in args.candidates.split(",")], args.repeat)
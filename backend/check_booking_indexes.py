@@ -0,0 +1,271 @@
+"""
+Booking index check
+
+Seeds a realistically sized bookings table (a year of history plus a
+month ahead, mostly completed, a few thousand live jobs), ANALYZEs it and
+EXPLAINs the hot booking queries, asserting that each one reaches
+bookings through an index rather than a full table scan:
+
+- has_time_conflict / get_cleaner_busy_intervals (allocation)
+- SLAMonitor.get_delayed_jobs (both queries)
+- SLAMonitor.cancel_unpaid_bookings
+- list_my_bookings
+
+The queries are built here with the same filters as in the services,
+with literal values, so PostgreSQL can match the partial-index
+predicates. Exits non-zero if any query falls back to a sequential scan.
+
+Runs against DATABASE_URL if set, otherwise a throwaway SQLite file.
+Only the tables the check needs are created, and they are dropped again
+afterwards, so do not point this at a database you care about.
+
+Run with: python check_booking_indexes.py [--bookings 100000] [--customers 5000] [--cleaners 300]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/index_check.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import and_, insert, or_, select, text
+
+from app.database import Base, engine, SessionLocal
+from app.models import (
+    User, Address, Employee, EmployeeAccountStatus, ServiceCategory, Service,
+    Booking, BookingStatus, PaymentStatus
+)
+from benchmark_allocation import BENCH_TABLES
+
+CHUNK = 5000
+
+# Share of bookings per (status, payment status), roughly a mature marketplace
+STATUS_MIX = [
+    (BookingStatus.COMPLETED, PaymentStatus.PAID, 0.78),
+    (BookingStatus.CANCELLED, PaymentStatus.REFUNDED, 0.08),
+    (BookingStatus.NO_SHOW, PaymentStatus.PAID, 0.01),
+    (BookingStatus.CONFIRMED, PaymentStatus.PAID, 0.05),
+    (BookingStatus.PENDING_ASSIGNMENT, PaymentStatus.PAID, 0.02),
+    (BookingStatus.ASSIGNED, PaymentStatus.PAID, 0.04),
+    (BookingStatus.IN_PROGRESS, PaymentStatus.PAID, 0.005),
+    (BookingStatus.PENDING, PaymentStatus.PENDING, 0.015),
+]
+
+
+def seed(booking_count: int, customer_count: int, cleaner_count: int) -> dict:
+    """Bulk-insert the dataset; returns sample IDs for the queries."""
+    Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+    Base.metadata.create_all(bind=engine, tables=BENCH_TABLES)
+
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+    if engine.dialect.name == "sqlite":
+        now = now.replace(tzinfo=None)
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"email": f"customer{i}@example.com", "password_hash": "x",
+             "first_name": "Customer", "last_name": str(i)}
+            for i in range(customer_count)
+        ])
+        customer_ids = list(db.scalars(select(User.id)))
+
+        category = ServiceCategory(name="Index Check", slug="index-check")
+        db.add(category)
+        db.flush()
+        service = Service(
+            category_id=category.id, name="Check Clean", slug="check-clean",
+            base_price=Decimal("100"), base_duration_hours=Decimal("2.5")
+        )
+        address = Address(user_id=customer_ids[0], street_address="1 Check St", city="Dubai", postal_code="00000")
+        db.add_all([service, address])
+        db.flush()
+
+        cleaner_ids = [uuid.uuid4() for _ in range(cleaner_count)]
+        db.execute(insert(Employee), [
+            {"id": cleaner_id, "employee_id": f"CLN-DXB-IX-{i:05d}", "phone_number": f"+9715{i:08d}",
+             "full_name": f"Cleaner {i}", "region_code": "DXB",
+             "account_status": EmployeeAccountStatus.ACTIVE}
+            for i, cleaner_id in enumerate(cleaner_ids)
+        ])
+
+        statuses = [(status, payment) for status, payment, _ in STATUS_MIX]
+        weights = [share for _, _, share in STATUS_MIX]
+        rows = []
+        for i in range(booking_count):
+            status, payment_status = rng.choices(statuses, weights)[0]
+            if status in (BookingStatus.COMPLETED, BookingStatus.NO_SHOW, BookingStatus.CANCELLED):
+                scheduled = now - timedelta(days=rng.uniform(1, 365))
+            elif status in (BookingStatus.ASSIGNED, BookingStatus.IN_PROGRESS):
+                scheduled = now + timedelta(hours=rng.uniform(-6, 72))
+            else:
+                scheduled = now + timedelta(days=rng.uniform(0, 30))
+            scheduled = scheduled.replace(minute=rng.choice([0, 15, 30, 45]), second=0, microsecond=0)
+            created = scheduled - timedelta(days=rng.uniform(0.1, 14))
+            if status == BookingStatus.PENDING:
+                created = now - timedelta(minutes=rng.uniform(0, 600))
+            has_cleaner = status not in (BookingStatus.PENDING, BookingStatus.PENDING_ASSIGNMENT)
+
+            rows.append({
+                "booking_number": f"IX{i:08d}",
+                "customer_id": rng.choice(customer_ids),
+                "service_id": service.id,
+                "address_id": address.id,
+                "assigned_employee_id": rng.choice(cleaner_ids) if has_cleaner else None,
+                "scheduled_date": scheduled,
+                "scheduled_end_time": scheduled + timedelta(hours=2.5),
+                "sla_deadline": scheduled + timedelta(minutes=15) if has_cleaner else None,
+                "actual_start_time": (
+                    scheduled + timedelta(minutes=rng.uniform(-5, 30))
+                    if status in (BookingStatus.IN_PROGRESS, BookingStatus.COMPLETED) else None
+                ),
+                "property_size_sqft": 1000,
+                "base_price": Decimal("100"),
+                "total_price": Decimal("105"),
+                "status": status,
+                "payment_status": payment_status,
+                "created_at": created,
+            })
+            if len(rows) == CHUNK:
+                db.execute(insert(Booking), rows)
+                rows = []
+        if rows:
+            db.execute(insert(Booking), rows)
+        db.commit()
+    finally:
+        db.close()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+    return {"now": now, "customer_id": customer_ids[len(customer_ids) // 2], "cleaner_ids": cleaner_ids}
+
+
+def hot_queries(sample: dict) -> list:
+    """(name, expected index, statement) for each hot query."""
+    now = sample["now"]
+    start = now + timedelta(days=1)
+    end = start + timedelta(hours=2.5)
+    default_duration = timedelta(hours=2.5)
+    inactive = [BookingStatus.CANCELLED, BookingStatus.NO_SHOW]
+
+    return [
+        ("has_time_conflict", "ix_bookings_employee_schedule_active", select(Booking).where(
+            Booking.assigned_employee_id == sample["cleaner_ids"][0],
+            Booking.status.notin_(inactive),
+            Booking.scheduled_date < end,
+        )),
+        ("get_cleaner_busy_intervals", "ix_bookings_employee_schedule_active", select(
+            Booking.assigned_employee_id, Booking.scheduled_date, Booking.scheduled_end_time
+        ).where(
+            Booking.assigned_employee_id != None,
+            Booking.status.notin_(inactive),
+            Booking.scheduled_date < end,
+            or_(
+                Booking.scheduled_end_time > start,
+                and_(Booking.scheduled_end_time == None, Booking.scheduled_date > start - default_duration)
+            ),
+            Booking.assigned_employee_id.in_(sample["cleaner_ids"][:20]),
+        )),
+        ("sla: assigned jobs past deadline", "ix_bookings_sla_open", select(Booking).where(
+            Booking.status == BookingStatus.ASSIGNED,
+            or_(
+                Booking.sla_deadline < now,
+                Booking.scheduled_date < now - timedelta(minutes=15)
+            ),
+        )),
+        ("sla: in-progress jobs started late", "ix_bookings_sla_open", select(Booking).where(
+            Booking.status == BookingStatus.IN_PROGRESS,
+            Booking.actual_start_time != None,
+            Booking.sla_deadline != None,
+            Booking.actual_start_time > Booking.sla_deadline,
+        )),
+        ("cancel_unpaid_bookings", "ix_bookings_unpaid_created", select(Booking).where(
+            Booking.status == BookingStatus.PENDING,
+            Booking.payment_status == PaymentStatus.PENDING,
+            Booking.created_at < now - timedelta(minutes=15),
+        )),
+        ("list_my_bookings", "ix_bookings_customer_created", select(Booking).where(
+            Booking.customer_id == sample["customer_id"]
+        ).order_by(Booking.created_at.desc(), Booking.id.desc()).limit(20)),
+    ]
+
+
+def _postgres_plan(conn, sql: str):
+    """(uses an index, index names, plan summary) from EXPLAIN (FORMAT JSON)."""
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans, indexes = [], []
+
+    def walk(node):
+        if node.get("Index Name"):
+            indexes.append(node["Index Name"])
+        if node.get("Relation Name") == "bookings":
+            scans.append(node["Node Type"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    uses_index = bool(scans) and "Seq Scan" not in scans
+    return uses_index, indexes, ", ".join(scans)
+
+
+def _sqlite_plan(conn, sql: str):
+    """(uses an index, index names, plan summary) from EXPLAIN QUERY PLAN."""
+    details = [row[3] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+    scans = [detail for detail in details if " bookings" in detail]
+    indexes = [detail.split("INDEX ")[1].split(" ")[0] for detail in scans if "INDEX " in detail]
+    uses_index = bool(scans) and all(detail.startswith("SEARCH") for detail in scans)
+    return uses_index, indexes, "; ".join(scans)
+
+
+def check(sample: dict) -> bool:
+    explain = _postgres_plan if engine.dialect.name == "postgresql" else _sqlite_plan
+    ok = True
+
+    print(f"{'query':<36} {'result':<6} index")
+    print("-" * 90)
+    with engine.connect() as conn:
+        for name, expected, statement in hot_queries(sample):
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            uses_index, indexes, summary = explain(conn, sql)
+            ok = ok and uses_index
+            used = ", ".join(dict.fromkeys(indexes)) or "-"
+            note = "" if expected in indexes else f"  (expected {expected})"
+            print(f"{name:<36} {'ok' if uses_index else 'FAIL':<6} {used}{note}")
+            if not uses_index:
+                print(f"    plan: {summary}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--cleaners", type=int, default=300)
+    args = parser.parse_args()
+
+    try:
+        print(f"{engine.dialect.name}: seeding {args.bookings} bookings...")
+        sample = seed(args.bookings, args.customers, args.cleaners)
+        ok = check(sample)
+    finally:
+        Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+
+    print("\nAll hot queries use an index" if ok else "\nSome hot queries scan bookings")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Query budget check
+
+Seeds a small dataset where every list row points at a different
+customer, cleaner and add-on, then calls the list endpoints and the SLA
+monitor's offline-cleaner check under query_budget(). A page of 50 rows
+must cost the same handful of queries as a page of 1, and no statement
+may repeat, so an N+1 fails here instead of in production. List totals
+are cached on first read, so each endpoint is called once before it is
+measured; review summaries are built by the seed, as the rollup refresher
+would after deploy.
+
+Runs against DATABASE_URL if set, otherwise a throwaway SQLite file. Only
+the tables the check needs are created, and they are dropped again
+afterwards, so do not point this at a database you care about.
+
+Run with: python check_query_budgets.py [--rows 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/query_budget.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from sqlalchemy import insert
+
+from app.core.security import create_access_token
+from app.database import Base, engine, SessionLocal
+from app.models import (
+    User, UserRole, Address, Employee, EmployeeAccountStatus, ServiceCategory, Service, AddOn,
+    Booking, BookingStatus, PaymentStatus, Review, ReviewSummary
+)
+from app.models.employee import EmployeeCleanerStatus
+from app.models.service import booking_add_ons
+from app.services.query_stats import QueryBudgetExceeded, query_budget
+from app.services.review_summary import build_missing_review_summaries
+from app.services.sla_monitor import SLAMonitor
+from benchmark_allocation import BENCH_TABLES
+
+CHECK_TABLES = BENCH_TABLES + [Review.__table__, ReviewSummary.__table__]
+
+# (label, path, token, max queries); every check also allows no repeated statement
+ENDPOINT_BUDGETS = [
+    ("my bookings", "/api/bookings/?limit={rows}", "customer", 5),
+    ("admin bookings", "/api/bookings/admin/all?limit={rows}", "admin", 5),
+    ("reviews", "/api/reviews/?limit={rows}", None, 2),
+    ("review stats", "/api/reviews/stats", None, 1),
+    ("admin customers", "/api/users/admin/customers?limit={rows}", "admin", 3),
+    ("admin users", "/api/users/?limit={rows}", "admin", 3),
+]
+OFFLINE_CLEANER_BUDGET = 4
+
+
+def seed(rows: int) -> dict:
+    """One booking per customer/cleaner/add-on, plus a review and an in-progress job each."""
+    Base.metadata.drop_all(bind=engine, tables=CHECK_TABLES)
+    Base.metadata.create_all(bind=engine, tables=CHECK_TABLES)
+
+    now = datetime.now(timezone.utc)
+    if engine.dialect.name == "sqlite":
+        now = now.replace(tzinfo=None)
+
+    db = SessionLocal()
+    try:
+        admin = User(email="admin@example.com", password_hash="x", first_name="Admin", last_name="User",
+                     role=UserRole.ADMIN)
+        customer = User(email="customer@example.com", password_hash="x", first_name="Main", last_name="Customer")
+        category = ServiceCategory(name="Budget", slug="budget")
+        db.add_all([admin, customer, category])
+        db.flush()
+        service = Service(
+            category_id=category.id, name="Budget Clean", slug="budget-clean",
+            base_price=Decimal("100"), base_duration_hours=Decimal("2.5")
+        )
+        address = Address(user_id=customer.id, street_address="1 Budget St", city="Dubai", postal_code="00000")
+        db.add_all([service, address])
+        db.flush()
+
+        for i in range(rows):
+            reviewer = User(email=f"reviewer{i}@example.com", password_hash="x", first_name="Reviewer", last_name=str(i))
+            employee = Employee(
+                id=uuid.uuid4(), employee_id=f"CLN-DXB-QB-{i:05d}", phone_number=f"+9714{i:08d}",
+                full_name=f"Cleaner {i}", region_code="DXB", account_status=EmployeeAccountStatus.ACTIVE,
+                cleaner_status=EmployeeCleanerStatus.OFFLINE
+            )
+            add_on = AddOn(name=f"Extra {i}", slug=f"extra-{i}", price=Decimal("10"))
+            db.add_all([reviewer, employee, add_on])
+            db.flush()
+
+            for booking_customer, status in ((customer, BookingStatus.IN_PROGRESS), (reviewer, BookingStatus.COMPLETED)):
+                booking = Booking(
+                    booking_number=f"QB{booking_customer.id:04d}{i:05d}",
+                    customer_id=booking_customer.id,
+                    service_id=service.id,
+                    address_id=address.id,
+                    assigned_employee_id=employee.id,
+                    scheduled_date=now - timedelta(hours=i),
+                    property_size_sqft=1000,
+                    base_price=Decimal("100"),
+                    total_price=Decimal("110"),
+                    status=status,
+                    payment_status=PaymentStatus.PAID,
+                )
+                db.add(booking)
+                db.flush()
+                db.execute(insert(booking_add_ons).values(
+                    booking_id=booking.id, add_on_id=add_on.id, price_at_booking=add_on.price
+                ))
+
+            db.add(Review(booking_id=booking.id, customer_id=reviewer.id, overall_rating=5, comment="Great"))
+        db.commit()
+        build_missing_review_summaries(db)
+
+        return {
+            "admin": create_access_token(admin.id, admin.email, "admin"),
+            "customer": create_access_token(customer.id, customer.email, "customer"),
+        }
+    finally:
+        db.close()
+
+
+def check_budget(label: str, max_queries: int, run) -> bool:
+    try:
+        with query_budget(max_queries, max_repeats=1, label=label) as stats:
+            run()
+    except QueryBudgetExceeded as e:
+        print(f"FAIL  {e}\n")
+        return False
+    print(f"ok    {label}: {stats.count} queries (budget {max_queries})")
+    return True
+
+
+async def run_checks(tokens: dict, rows: int) -> bool:
+    from main import app
+
+    ok = True
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+        for label, path, token, budget in ENDPOINT_BUDGETS:
+            headers = {"Authorization": f"Bearer {tokens[token]}"} if token else {}
+            # Warm the cached list total first; the budget is for a page served with it
+            await client.get(path.format(rows=rows), headers=headers)
+            try:
+                with query_budget(budget, max_repeats=1, label=label) as stats:
+                    response = await client.get(path.format(rows=rows), headers=headers)
+                response.raise_for_status()
+                print(f"ok    {label}: {stats.count} queries (budget {budget})")
+            except QueryBudgetExceeded as e:
+                print(f"FAIL  {e}\n")
+                ok = False
+
+    def offline_cleaners():
+        db = SessionLocal()
+        try:
+            SLAMonitor(db).detect_offline_cleaners_with_active_jobs()
+        finally:
+            db.close()
+
+    ok = check_budget("offline cleaner alerts", OFFLINE_CLEANER_BUDGET, offline_cleaners) and ok
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50, help="Rows per list page (distinct related rows each)")
+    args = parser.parse_args()
+
+    try:
+        tokens = seed(args.rows)
+        ok = asyncio.run(run_checks(tokens, args.rows))
+    finally:
+        Base.metadata.drop_all(bind=engine, tables=CHECK_TABLES)
+
+    print("\nAll query budgets met" if ok else "\nSome endpoints exceed their query budget")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Region resolution check
+
+Resolves addresses near emirate borders with resolve_region() and checks
+the region they land in. A known city must win over the nearest-anchor
+guess from the spatial index (Dubai districts next to Sharjah would
+otherwise resolve to SHJ); coordinates decide only when the city is
+missing or unmapped.
+
+No database is used; DATABASE_URL defaults to a throwaway SQLite file
+only so the app modules can be imported.
+
+Run with: python check_region_resolution.py
+"""
+import os
+import sys
+import tempfile
+
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/regions.db"
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.cleaner_assignment import resolve_region
+
+# (label, city, latitude, longitude, expected region)
+CASES = [
+    ("Al Qusais, Dubai", "Dubai", 25.278, 55.38, "DXB"),
+    ("Mirdif, Dubai", "Dubai", 25.22, 55.42, "DXB"),
+    ("Al Nahda, Sharjah", "Sharjah", 25.30, 55.37, "SHJ"),
+    ("Al Jurf, Ajman", "Ajman", 25.39, 55.46, "AJM"),
+    ("Al Ain, Abu Dhabi", "Al Ain", 24.2075, 55.7447, "AUH"),
+    ("Hatta, Dubai (city as typed)", " dubai ", 24.80, 56.12, "DXB"),
+    ("Dubai Marina, no city", None, 25.08, 55.14, "DXB"),
+    ("Sharjah centre, unmapped city", "Al Majaz", 25.3462, 55.4211, "SHJ"),
+    ("Unmapped city, no coordinates", "Atlantis", None, None, None),
+    ("Outside every region", "Atlantis", 21.0, 50.0, None),
+]
+
+
+def main():
+    ok = True
+    for label, city, latitude, longitude, expected in CASES:
+        region = resolve_region(city, latitude, longitude)
+        passed = region == expected
+        ok = ok and passed
+        print(f"{'ok' if passed else 'FAIL':<5} {label:<32} {str(region):<5} (expected {expected})")
+
+    print("\nRegions resolve as expected" if ok else "\nRegion resolution check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
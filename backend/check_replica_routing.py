@@ -0,0 +1,159 @@
+"""
+Read replica routing check
+
+Calls a read-only endpoint (GET /api/users/admin/customers, which uses
+get_read_db) after writing a new customer to the primary, and checks
+where each read went:
+
+1. Plain read: served by the replica
+2. X-Read-Primary header: served by the primary, sees the new customer
+3. Replica lagging past REPLICA_MAX_LAG_SECONDS (simulated): falls back to
+   the primary
+4. Replica unreachable (simulated): falls back to the primary
+
+With no DATABASE_URL the primary is a throwaway SQLite file and the
+replica a copy of it taken before the write (a simulated replica), so the
+plain read must not see the new customer. Against a real pair, set
+DATABASE_URL and DATABASE_REPLICA_URLS; the script waits for the seed to
+replicate and only reports whether the plain read saw the write. Only the
+tables the check needs are created (on the primary), and they are dropped
+again afterwards, so do not point this at a database you care about.
+
+Run with: python check_replica_routing.py
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+SIMULATED = not os.getenv("DATABASE_URL")
+if SIMULATED:
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir}/primary.db"
+    os.environ["DATABASE_REPLICA_URLS"] = f"sqlite:///{workdir}/replica.db"
+elif not os.getenv("DATABASE_REPLICA_URLS"):
+    sys.exit("Set DATABASE_REPLICA_URLS as well, or neither to simulate a replica")
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+from sqlalchemy import select
+
+from app.core.security import create_access_token
+from app.database import Base, engine, SessionLocal
+from app.models import User, UserRole
+from app.services.read_replicas import READ_PRIMARY_HEADER, read_replicas
+from benchmark_allocation import BENCH_TABLES
+
+REPLICATION_WAIT_SECONDS = 30
+
+
+def seed() -> str:
+    """Admin plus a few customers on the primary; returns the admin token."""
+    Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+    Base.metadata.create_all(bind=engine, tables=BENCH_TABLES)
+    db = SessionLocal()
+    try:
+        admin = User(email="admin@example.com", password_hash="x", first_name="Admin", last_name="User",
+                     role=UserRole.ADMIN)
+        db.add(admin)
+        db.add_all([
+            User(email=f"customer{i}@example.com", password_hash="x", first_name="Customer", last_name=str(i))
+            for i in range(5)
+        ])
+        db.commit()
+        return create_access_token(admin.id, admin.email, "admin")
+    finally:
+        db.close()
+
+
+def wait_for_replica(replica) -> None:
+    """Simulated: snapshot the primary. Real: wait until the seed has replicated."""
+    if SIMULATED:
+        shutil.copy(engine.url.database, replica.engine.url.database)
+        return
+    deadline = time.monotonic() + REPLICATION_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        try:
+            with replica.engine.connect() as conn:
+                if conn.execute(select(User.id).where(User.email == "admin@example.com")).first():
+                    return
+        except Exception:
+            pass
+        time.sleep(0.5)
+    sys.exit(f"Seed did not reach {replica.name} within {REPLICATION_WAIT_SECONDS}s")
+
+
+def add_customer(email: str) -> None:
+    db = SessionLocal()
+    try:
+        db.add(User(email=email, password_hash="x", first_name="Fresh", last_name="Write"))
+        db.commit()
+    finally:
+        db.close()
+
+
+async def run_checks(token: str) -> bool:
+    from main import app
+
+    replica = read_replicas.replicas[0]
+    new_email = "fresh@example.com"
+    add_customer(new_email)
+    ok = True
+
+    async def read(label: str, expect: str, expect_write_visible=None, headers=None):
+        nonlocal ok
+        before = dict(read_replicas.counters)
+        response = await client.get(
+            "/api/users/admin/customers?limit=100&exact_count=true",
+            headers={"Authorization": f"Bearer {token}", **(headers or {})}
+        )
+        response.raise_for_status()
+        served = [name for name, count in read_replicas.counters.items() if count > before[name]]
+        target = "replica" if served == ["replica"] else "primary"
+        sees_write = any(row["email"] == new_email for row in response.json())
+
+        passed = target == expect and expect_write_visible in (None, sees_write)
+        ok = ok and passed
+        print(f"{'ok' if passed else 'FAIL':<5} {label:<36} read from {target:<8} "
+              f"new customer {'visible' if sees_write else 'not visible'}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://replicas") as client:
+        replica.check(force=True)
+        await read("plain read", "replica", expect_write_visible=False if SIMULATED else None)
+        await read("X-Read-Primary", "primary", expect_write_visible=True, headers={READ_PRIMARY_HEADER: "1"})
+
+        replica.lag_probe = lambda conn: 60.0
+        replica.check(force=True)
+        await read("replica 60s behind", "primary", expect_write_visible=True)
+
+        def unreachable(conn):
+            raise ConnectionError("simulated outage")
+        replica.lag_probe = unreachable
+        replica.check(force=True)
+        await read("replica unreachable", "primary", expect_write_visible=True)
+
+    print(f"\nworker reads: {read_replicas.counters}")
+    return ok
+
+
+def main():
+    if not read_replicas.enabled:
+        sys.exit("No read replicas configured")
+
+    try:
+        token = seed()
+        wait_for_replica(read_replicas.replicas[0])
+        ok = asyncio.run(run_checks(token))
+    finally:
+        Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+
+    print("\nReplica routing behaves as expected" if ok else "\nReplica routing check failed")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
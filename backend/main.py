@@ -13,10 +13,18 @@ try:
 except ImportError:
     CLEANER_DASHBOARD_ENABLED = False
     print("Cleaner dashboard module not available, skipping...")
-from app.database import init_db, SessionLocal
+from app.database import init_db, SessionLocal, async_engine
 from app.services.sla_monitor import background_runner
+from app.tasks.allocation_worker import allocation_workers
 from app.services.cache import cache_service
+from app.services.pagination import PAGINATION_HEADERS
+from app.services.read_replicas import read_replicas
+from app.services import dashboard_counters
+from app.services.loop_monitor import loop_monitor
 from app.middleware.rate_limiter import RateLimitMiddleware
+from app.middleware.loop_monitor import LoopMonitorMiddleware
+from app.middleware.query_stats import QueryStatsMiddleware
+from app.services.query_stats import query_metrics
 
 
 @asynccontextmanager
@@ -32,14 +40,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"Redis not available, using in-memory cache: {e}")
     
+    if settings.LOOP_MONITOR_ENABLED:
+        await loop_monitor.start()
+    
     # Start background tasks
+    dashboard_counters.subscribe()
     await background_runner.start(SessionLocal)
+    if settings.ALLOCATION_QUEUE_ENABLED:
+        await allocation_workers.start(SessionLocal)
     
     yield
     
     # Shutdown
+    await allocation_workers.stop()
     await background_runner.stop()
+    await loop_monitor.stop()
+    await query_metrics.flush()
     await cache_service.disconnect()
+    await async_engine.dispose()
+    read_replicas.dispose()
 
 
 app = FastAPI(
@@ -60,8 +79,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=PAGINATION_HEADERS,
 )
 
+# Per-request query counts (X-DB-* headers in debug mode)
+if settings.QUERY_STATS_ENABLED:
+    app.add_middleware(QueryStatsMiddleware)
+
+# Labels requests for event loop block reports (outermost)
+app.add_middleware(LoopMonitorMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api")
 app.include_router(auth_otp.router, prefix="/api")  # OTP authentication
@@ -0,0 +1,198 @@
+"""
+Concurrent allocation stress test
+
+Runs N allocation workers in parallel processes against the same pending
+bookings and checks that no cleaner ends up double-booked and every
+assignment is consistent.
+
+Bookings are packed into a few time slots so workers compete for the
+same cleaners. Each worker either drains bookings one at a time
+(drain_pending_bookings, the single-booking path) or runs the batch
+allocator; --mode mixed alternates between the two.
+
+Needs a local PostgreSQL (FOR UPDATE SKIP LOCKED and advisory locks):
+
+    DATABASE_URL=postgresql://localhost/cleaning_stress python stress_allocation.py --workers 8
+
+Only the tables allocation needs are created, and they are dropped again
+afterwards, so do not point this at a database you care about. Against
+SQLite it falls back to a single worker as a smoke test.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+SLOTS = 4                    # Distinct start times the bookings are packed into
+DURATION_HOURS = 2.5
+
+
+def seed(cleaner_count: int, booking_count: int) -> datetime:
+    from app.database import Base, engine, SessionLocal
+    from app.models import (
+        User, Address, Employee, EmployeeAccountStatus, ServiceCategory, Service,
+        Booking, BookingStatus
+    )
+    from benchmark_allocation import BENCH_TABLES
+
+    Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+    Base.metadata.create_all(bind=engine, tables=BENCH_TABLES)
+
+    base = (datetime.now(timezone.utc) + timedelta(hours=2)).replace(minute=0, second=0, microsecond=0)
+    if engine.dialect.name == "sqlite":
+        base = base.replace(tzinfo=None)
+
+    db = SessionLocal()
+    try:
+        customer = User(email="stress@example.com", password_hash="x", first_name="Stress", last_name="User")
+        category = ServiceCategory(name="Stress", slug="stress")
+        db.add_all([customer, category])
+        db.flush()
+        service = Service(
+            category_id=category.id, name="Stress Clean", slug="stress-clean",
+            base_price=Decimal("100"), base_duration_hours=Decimal(str(DURATION_HOURS))
+        )
+        address = Address(user_id=customer.id, street_address="1 Stress St", city="Dubai", postal_code="00000")
+        db.add_all([service, address])
+        db.flush()
+
+        for i in range(cleaner_count):
+            db.add(Employee(
+                id=uuid.uuid4(),
+                employee_id=f"CLN-DXB-ST-{i:05d}",
+                phone_number=f"+9716{i:08d}",
+                full_name=f"Stress Cleaner {i}",
+                region_code="DXB",
+                account_status=EmployeeAccountStatus.ACTIVE,
+            ))
+
+        for i in range(booking_count):
+            # Slots one hour apart, so neighbouring slots overlap too
+            db.add(Booking(
+                booking_number=f"ST{i:07d}",
+                customer_id=customer.id,
+                service_id=service.id,
+                address_id=address.id,
+                scheduled_date=base + timedelta(hours=i % SLOTS),
+                property_size_sqft=1000,
+                base_price=Decimal("100"),
+                total_price=Decimal("105"),
+                status=BookingStatus.PENDING_ASSIGNMENT,
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+    return base
+
+
+def worker(worker_id: int, mode: str, start_at: float) -> dict:
+    """Run one allocator in its own process (own engine and connection pool)."""
+    from app.database import SessionLocal
+    from app.services.allocation_engine import drain_pending_bookings
+    from app.services.batch_allocator import run_batch_allocation
+
+    if mode == "mixed":
+        mode = "batch" if worker_id % 2 else "drain"
+
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+
+    db = SessionLocal()
+    try:
+        if mode == "batch":
+            result = asyncio.run(run_batch_allocation(db, horizon_hours=SLOTS + 4))
+            stats = {"processed": result.bookings_considered, "assigned": len(result.assignments)}
+        else:
+            stats = asyncio.run(drain_pending_bookings(db))
+    finally:
+        db.close()
+
+    stats.update(worker=worker_id, mode=mode, seconds=round(time.perf_counter() - started, 3))
+    return stats
+
+
+def verify() -> dict:
+    """Check for double-booked cleaners and count assignments."""
+    from app.database import SessionLocal
+    from app.models import Booking
+
+    db = SessionLocal()
+    try:
+        rows = db.query(Booking.id, Booking.assigned_employee_id, Booking.scheduled_date).filter(
+            Booking.assigned_employee_id != None
+        ).all()
+    finally:
+        db.close()
+
+    by_cleaner = {}
+    for booking_id, cleaner_id, start in rows:
+        by_cleaner.setdefault(cleaner_id, []).append((start, booking_id))
+
+    conflicts = []
+    for cleaner_id, jobs in by_cleaner.items():
+        jobs.sort()
+        for (start_a, id_a), (start_b, id_b) in zip(jobs, jobs[1:]):
+            if start_b < start_a + timedelta(hours=DURATION_HOURS):
+                conflicts.append((str(cleaner_id), id_a, id_b))
+
+    return {"assigned": len(rows), "cleaners_used": len(by_cleaner), "conflicts": conflicts}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=8, help="Parallel allocator processes")
+    parser.add_argument("--cleaners", type=int, default=40, help="Active cleaners")
+    parser.add_argument("--bookings", type=int, default=200, help="Pending bookings")
+    parser.add_argument("--mode", choices=["drain", "batch", "mixed"], default="mixed")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("Set DATABASE_URL to a throwaway PostgreSQL database")
+
+    from app.database import engine, Base
+    from benchmark_allocation import BENCH_TABLES
+
+    workers = args.workers
+    if engine.dialect.name != "postgresql":
+        print(f"{engine.dialect.name} has no row/advisory locks, running a single worker")
+        workers = 1
+
+    seed(args.cleaners, args.bookings)
+    print(f"Seeded {args.cleaners} cleaners, {args.bookings} bookings in {SLOTS} overlapping slots")
+
+    start_at = time.time() + 2
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = [pool.submit(worker, i, args.mode, start_at) for i in range(workers)]
+        results = [f.result() for f in futures]
+    elapsed = time.perf_counter() - started - 2
+
+    for stats in sorted(results, key=lambda s: s["worker"]):
+        print(f"  worker {stats['worker']:>2} [{stats['mode']:>5}] "
+              f"processed={stats['processed']:>4} assigned={stats['assigned']:>4} {stats['seconds']:.2f}s")
+
+    outcome = verify()
+    print(f"Assigned {outcome['assigned']}/{args.bookings} bookings using "
+          f"{outcome['cleaners_used']} cleaners in {elapsed:.2f}s")
+
+    Base.metadata.drop_all(bind=engine, tables=BENCH_TABLES)
+
+    if outcome["conflicts"]:
+        for cleaner_id, id_a, id_b in outcome["conflicts"][:20]:
+            print(f"  DOUBLE-BOOKED cleaner {cleaner_id}: bookings {id_a} and {id_b}")
+        sys.exit(f"FAILED: {len(outcome['conflicts'])} double bookings")
+    print("OK: no double bookings")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Cache single-flight stress test
+
+Fires many concurrent requests for the same uncached utilization key
+(PricingEngine._get_demand_multiplier) and checks that the utilization
+queries run exactly once, then repeats the burst against a stale entry
+and checks that it is refreshed once while every caller is answered
+straight away.
+
+The utilization calculation is replaced by a counter with a fixed delay,
+so no database is needed. With REDIS_URL set, the burst can be split over
+several processes to check the cross-worker lock as well:
+
+    REDIS_URL=redis://localhost:6379/15 python stress_single_flight.py --processes 4
+
+Without Redis the in-memory cache is used and --processes is ignored
+(each process would have its own cache). The test keys are deleted
+afterwards, but use a scratch Redis database all the same.
+
+Run with: python stress_single_flight.py [--requests 500] [--compute-ms 200]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+REGION = "STRESS"
+
+
+def _scheduled_date(offset_days: int) -> datetime:
+    return (datetime.now(timezone.utc) + timedelta(days=offset_days)).replace(
+        hour=10, minute=0, second=0, microsecond=0
+    )
+
+
+async def _burst(requests: int, offset_days: int, compute_ms: int, counter, start_at: float):
+    """Fire `requests` concurrent demand-multiplier lookups for one region/date."""
+    from app.services.cache import cache_service
+    from app.services.pricing_engine import PricingEngine
+
+    class CountingPricingEngine(PricingEngine):
+        async def _calculate_region_utilization(self, region_code, scheduled_date):
+            with counter.get_lock():
+                counter.value += 1
+            await asyncio.sleep(compute_ms / 1000)
+            return Decimal("0.42")
+
+    await cache_service.connect(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    try:
+        engine = CountingPricingEngine(db=None)
+        scheduled = _scheduled_date(offset_days)
+
+        async def one_request():
+            started = time.perf_counter()
+            multiplier, utilization, tier = await engine._get_demand_multiplier(REGION, scheduled, 2.5)
+            return utilization, (time.perf_counter() - started) * 1000
+
+        await asyncio.sleep(max(start_at - time.time(), 0))
+        return await asyncio.gather(*(one_request() for _ in range(requests)))
+    finally:
+        await cache_service.disconnect()
+
+
+def _burst_process(requests, offset_days, compute_ms, counter, start_at, results):
+    outcomes = asyncio.run(_burst(requests, offset_days, compute_ms, counter, start_at))
+    results.put(outcomes)
+
+
+def run_burst(total_requests: int, processes: int, offset_days: int, compute_ms: int):
+    """Run one burst split over `processes`; returns (computations, outcomes)."""
+    counter = multiprocessing.Value("i", 0)
+    start_at = time.time() + 0.5 * processes
+    share = [total_requests // processes + (1 if i < total_requests % processes else 0) for i in range(processes)]
+
+    if processes == 1:
+        outcomes = asyncio.run(_burst(total_requests, offset_days, compute_ms, counter, start_at))
+        return counter.value, outcomes
+
+    results = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_burst_process,
+            args=(share[i], offset_days, compute_ms, counter, start_at, results)
+        )
+        for i in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    outcomes = []
+    for _ in workers:
+        outcomes.extend(results.get())
+    for worker in workers:
+        worker.join()
+    return counter.value, outcomes
+
+
+async def _prepare_stale(offset_days: int, value: str):
+    """Store an entry for the stale burst that is already past its fresh TTL."""
+    from app.services.cache import cache_service
+    from app.services.pricing_engine import PricingEngine
+
+    await cache_service.connect(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    try:
+        key = f"utilization:{REGION}:{_scheduled_date(offset_days).date().isoformat()}"
+        await cache_service.set_with_stale(key, value, ttl=0, stale_ttl=PricingEngine.UTILIZATION_STALE_TTL)
+        return cache_service._using_redis
+    finally:
+        await cache_service.disconnect()
+
+
+async def _cleanup(offset_days_list):
+    from app.services.cache import cache_service
+
+    await cache_service.connect(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    try:
+        for offset_days in offset_days_list:
+            key = f"utilization:{REGION}:{_scheduled_date(offset_days).date().isoformat()}"
+            await cache_service.delete(key)
+            await cache_service.delete(f"lock:{key}")
+    finally:
+        await cache_service.disconnect()
+
+
+def _latency_summary(outcomes) -> str:
+    latencies = sorted(ms for _, ms in outcomes)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    return f"p50={p50:.1f}ms p99={p99:.1f}ms max={latencies[-1]:.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--compute-ms", type=int, default=200)
+    args = parser.parse_args()
+
+    miss_day, stale_day = 30, 31
+    using_redis = asyncio.run(_prepare_stale(stale_day, "0.10"))
+    processes = args.processes if using_redis else 1
+    if args.processes > 1 and not using_redis:
+        print("Redis not available: running in a single process with the in-memory cache")
+
+    failures = []
+    try:
+        # 1. Cold key: one computation, everyone gets its result
+        computations, outcomes = run_burst(args.requests, processes, miss_day, args.compute_ms)
+        values = {utilization for utilization, _ in outcomes}
+        print(f"Miss burst:  {len(outcomes)} requests, {computations} computation(s), "
+              f"values={sorted(map(str, values))}, {_latency_summary(outcomes)}")
+        if computations != 1:
+            failures.append(f"miss burst computed {computations} times, expected 1")
+        if values != {Decimal("0.42")}:
+            failures.append(f"miss burst returned {values}")
+
+        # 2. Stale key: one refresh, nobody waits for it except the refresher
+        computations, outcomes = run_burst(args.requests, processes, stale_day, args.compute_ms)
+        values = {utilization for utilization, _ in outcomes}
+        waited = sum(1 for _, ms in outcomes if ms >= args.compute_ms)
+        print(f"Stale burst: {len(outcomes)} requests, {computations} computation(s), "
+              f"values={sorted(map(str, values))}, {waited} waited, {_latency_summary(outcomes)}")
+        if computations != 1:
+            failures.append(f"stale burst refreshed {computations} times, expected 1")
+        if waited > 1:
+            failures.append(f"{waited} requests waited for the stale refresh, expected at most 1")
+    finally:
+        asyncio.run(_cleanup([miss_day, stale_day]))
+
+    if failures:
+        print("FAILED:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()